@@ -1 +1,14 @@
-from django.contrib import admin
+from config.db_router import replica_reads
+
+
+class ReplicaChangeListMixin:
+    """Serve changelist pages from a read replica (see config.db_router).
+
+    Only GET requests; a POST runs an action or saves list_editable rows.
+    """
+
+    def changelist_view(self, request, extra_context=None):
+        if request.method != "GET":
+            return super().changelist_view(request, extra_context)
+        with replica_reads():
+            return super().changelist_view(request, extra_context)
@@ -0,0 +1,69 @@
+import logging
+import threading
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicFlusher:
+    """Base for in-process accumulators written out by a background thread.
+
+    Subclasses implement ``flush(reason)``. The thread calls it every
+    ``flush_interval`` seconds, or earlier after ``wake()``, and once more on
+    ``close()`` so nothing queued is lost on a clean shutdown.
+    """
+
+    thread_name = "periodic-flusher"
+
+    def __init__(self, flush_interval):
+        self.flush_interval = flush_interval
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        """Start the background flush thread."""
+        if self._thread is None:
+            self._closed = False
+            self._thread = threading.Thread(
+                target=self._run, name=self.thread_name, daemon=True
+            )
+            self._thread.start()
+
+    def wake(self):
+        """Ask the background thread to flush now."""
+        self._wakeup.set()
+
+    def flush(self, reason="manual"):
+        raise NotImplementedError
+
+    def flush_reason(self):
+        """Reason label for a flush done by the background thread."""
+        return "interval"
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            # The thread keeps its own connection, drop it if it went stale
+            close_old_connections()
+            try:
+                self.flush(self.flush_reason())
+            except Exception:
+                logger.exception(
+                    "flusher.flush_failed", extra={"flusher": self.thread_name}
+                )
+
+    def close(self):
+        """Stop the background thread and flush what is left."""
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush("shutdown")
@@ -0,0 +1,220 @@
+"""Index usage statistics and settings-driven JSONB indexes.
+
+Full-document GIN indexes on JSONB columns index every key and value of
+every row, so each insert writes many index entries, while queries rarely
+filter on more than one or two paths. ``index_usage`` reports how often each
+index is scanned against how many row writes it has to absorb, and
+``sync_indexes`` maintains the indexes listed in ``settings.JSONB_INDEXES``
+(``jsonb_path_ops`` GIN indexes for ``@>`` containment, expression indexes on
+single paths) instead of migrations.
+
+Indexes created here carry a comment with a signature of their definition;
+only indexes with such a comment are ever dropped, and a changed definition
+is rebuilt. A ``CREATE INDEX CONCURRENTLY`` that fails leaves an invalid
+index behind, before the comment is written; an invalid index with a
+configured name is rebuilt as well.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+MANAGED_COMMENT = "JSONB_INDEXES:"
+
+METHODS = ("gin", "btree", "hash")
+
+_IDENTIFIER = re.compile(r"^[a-z_][a-z0-9_]{0,62}$")
+
+
+@dataclass(frozen=True)
+class JsonbIndex:
+    name: str
+    table: str
+    # Index element, e.g. "payload jsonb_path_ops" or "((payload->>'version'))"
+    expression: str
+    method: str = "gin"
+    # Optional predicate of a partial index
+    where: str = ""
+
+    @property
+    def comment(self):
+        definition = "|".join(
+            (self.table, self.method, self.expression, self.where)
+        ).encode()
+        return MANAGED_COMMENT + hashlib.blake2b(definition, digest_size=8).hexdigest()
+
+    def create_sql(self, hypertable=False):
+        # CONCURRENTLY is not supported on hypertables; TimescaleDB builds
+        # one chunk per transaction instead so writes are not blocked as long
+        sql = (
+            f"CREATE INDEX {'' if hypertable else 'CONCURRENTLY '}"
+            f"IF NOT EXISTS {self.name} ON {self.table} "
+            f"USING {self.method} ({self.expression})"
+        )
+        if hypertable:
+            sql += " WITH (timescaledb.transaction_per_chunk)"
+        if self.where:
+            sql += f" WHERE {self.where}"
+        return sql
+
+
+def configured_indexes():
+    """Parse ``settings.JSONB_INDEXES`` into ``JsonbIndex`` objects."""
+    tables = {model._meta.db_table for model in apps.get_models()}
+    indexes = []
+    for spec in getattr(settings, "JSONB_INDEXES", []):
+        try:
+            index = JsonbIndex(**spec)
+        except TypeError as exc:
+            raise ImproperlyConfigured(f"Invalid JSONB_INDEXES entry {spec!r}: {exc}")
+        if not _IDENTIFIER.match(index.name):
+            raise ImproperlyConfigured(f"Invalid index name {index.name!r}")
+        if index.table not in tables:
+            raise ImproperlyConfigured(f"Unknown table {index.table!r}")
+        if index.method not in METHODS:
+            raise ImproperlyConfigured(f"Unsupported index method {index.method!r}")
+        if any(other.name == index.name for other in indexes):
+            raise ImproperlyConfigured(f"Duplicate index name {index.name!r}")
+        indexes.append(index)
+    return indexes
+
+
+def _hypertables(cursor):
+    cursor.execute("SELECT to_regclass('timescaledb_information.hypertables')")
+    if cursor.fetchone()[0] is None:
+        return set()
+    cursor.execute("SELECT hypertable_name FROM timescaledb_information.hypertables")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _existing_indexes(cursor):
+    """``{name: (table, comment, valid)}`` of the indexes in the current schema."""
+    cursor.execute(
+        """
+        SELECT i.relname, t.relname, obj_description(i.oid, 'pg_class'),
+            x.indisvalid
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        JOIN pg_class t ON t.oid = x.indrelid
+        WHERE i.relnamespace = current_schema()::regnamespace
+        """
+    )
+    return {
+        name: (table, comment, valid)
+        for name, table, comment, valid in cursor.fetchall()
+    }
+
+
+def sync_indexes(cursor, indexes, tables=None, dry_run=False):
+    """Create, rebuild and drop indexes to match ``indexes``.
+
+    Only tables in ``tables`` are touched when it is given. Returns a list of
+    ``(action, index name)`` with action ``"create"``, ``"rebuild"``,
+    ``"drop"`` or ``"keep"``. Must run outside a transaction.
+    """
+    existing = _existing_indexes(cursor)
+    hypertables = _hypertables(cursor)
+    wanted = {index.name: index for index in indexes}
+    if tables is not None:
+        wanted = {
+            name: index for name, index in wanted.items() if index.table in tables
+        }
+
+    actions = []
+    for name, (table, comment, valid) in sorted(existing.items()):
+        managed = (comment or "").startswith(MANAGED_COMMENT)
+        if name in wanted and not valid:
+            # Left by a failed build of ours, comment or not
+            actions.append(("rebuild", name))
+            continue
+        if name in wanted and not managed:
+            raise ValueError(f"Index {name} exists and is not managed by JSONB_INDEXES")
+        if not managed or (tables is not None and table not in tables):
+            continue
+        if name not in wanted:
+            actions.append(("drop", name))
+        elif comment != wanted[name].comment:
+            actions.append(("rebuild", name))
+        else:
+            actions.append(("keep", name))
+
+    for name in sorted(wanted.keys() - existing.keys()):
+        actions.append(("create", name))
+
+    if dry_run:
+        return actions
+    for action, name in actions:
+        if action in ("drop", "rebuild"):
+            table = existing[name][0]
+            concurrently = "" if table in hypertables else "CONCURRENTLY "
+            cursor.execute(f"DROP INDEX {concurrently}IF EXISTS {name}")
+        if action in ("create", "rebuild"):
+            index = wanted[name]
+            cursor.execute(index.create_sql(index.table in hypertables))
+            cursor.execute(f"COMMENT ON INDEX {name} IS %s", [index.comment])
+    return actions
+
+
+@dataclass
+class IndexUsage:
+    table: str
+    name: str
+    definition: str
+    size: int
+    scans: int
+    tuples_read: int
+    # Row inserts and non-HOT updates, each of which writes to the index
+    writes: int
+
+    @property
+    def writes_per_scan(self):
+        return self.writes / self.scans if self.scans else float("inf")
+
+
+def index_usage(cursor, tables=None):
+    """Return ``IndexUsage`` for the indexes of the current schema.
+
+    Statistics of hypertable chunks (and their indexes, named
+    ``<chunk>_<index>``) are added to the hypertable's. Counters are
+    cumulative since the last ``pg_stat_reset()``.
+    """
+    cursor.execute(
+        """
+        SELECT s.relid, s.relname, s.indexrelname, s.schemaname = current_schema(),
+               pg_get_indexdef(s.indexrelid), pg_relation_size(s.indexrelid),
+               s.idx_scan, s.idx_tup_read
+        FROM pg_stat_user_indexes s
+        """
+    )
+    index_rows = cursor.fetchall()
+    cursor.execute(
+        """
+        SELECT relid, n_tup_ins + n_tup_upd - n_tup_hot_upd
+        FROM pg_stat_user_tables
+        """
+    )
+    writes = dict(cursor.fetchall())
+    cursor.execute("SELECT inhrelid, inhparent FROM pg_inherits")
+    parents = dict(cursor.fetchall())
+
+    usage = {}
+    for relid, table, name, own_schema, definition, size, scans, read in index_rows:
+        if own_schema and (tables is None or table in tables):
+            usage[(relid, name)] = IndexUsage(
+                table, name, definition, size, scans, read, writes.get(relid, 0)
+            )
+    for relid, table, name, own_schema, _, size, scans, read in index_rows:
+        parent = parents.get(relid)
+        if own_schema or parent is None:
+            continue
+        entry = usage.get((parent, name.removeprefix(f"{table}_")))
+        if entry is not None:
+            entry.size += size
+            entry.scans += scans
+            entry.tuples_read += read
+            entry.writes += writes.get(relid, 0)
+    return sorted(usage.values(), key=lambda entry: (entry.table, entry.name))
@@ -0,0 +1,151 @@
+"""Cross-process cache invalidation over Postgres LISTEN/NOTIFY.
+
+Triggers on ``devices``, ``device_types`` and ``rules`` (migration
+``core.0001``) send a notification on ``CHANNEL`` for every row change that
+affects a cached value, with a JSON payload such as
+``{"cache": "rules", "keys": ["<device id>"]}``. They fire for
+``queryset.update()`` and raw SQL as well, which send no Django signals, and
+Postgres delivers the notification only once the change is committed.
+
+With ``CACHE_INVALIDATION_LISTEN`` enabled, every process that caches one of
+these starts an ``InvalidationListener``: a thread holding a dedicated
+connection that LISTENs on the channel and passes the keys to the handler
+registered for the cache. Each handler evicts only those keys. After every
+(re)connect all registered caches are cleared, since notifications sent
+while not listening are lost.
+"""
+
+import json
+import logging
+import select
+import threading
+
+import psycopg2
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from config.metrics import CACHE_INVALIDATIONS_TOTAL
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "cache_invalidation"
+
+_handlers = {}
+
+
+def register(cache, handler):
+    """Call ``handler(keys)`` for notifications of ``cache``.
+
+    ``keys`` is ``None`` when every entry has to be dropped.
+    """
+    _handlers[cache] = handler
+
+
+def _connect():
+    params = connections["default"].get_connection_params()
+    params.pop("cursor_factory", None)
+    conn = psycopg2.connect(**params)
+    conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+    return conn
+
+
+class InvalidationListener:
+    """Thread dispatching ``CHANNEL`` notifications to the registered handlers."""
+
+    thread_name = "cache-invalidation"
+
+    def __init__(self, handlers=None, connect=_connect, poll_interval=5):
+        self.handlers = _handlers if handlers is None else handlers
+        self.connect = connect
+        self.poll_interval = poll_interval
+        self._closed = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is None:
+            self._closed.clear()
+            self._thread = threading.Thread(
+                target=self._run, name=self.thread_name, daemon=True
+            )
+            self._thread.start()
+
+    def close(self):
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+            self._thread = None
+
+    def dispatch(self, payload):
+        """Hand one notification payload to its cache's handler."""
+        try:
+            message = json.loads(payload)
+            cache = message["cache"]
+            keys = [str(key) for key in message["keys"] if key is not None]
+        except (ValueError, KeyError, TypeError):
+            logger.warning("cache.invalidation_malformed", extra={"payload": payload})
+            return
+        handler = self.handlers.get(cache)
+        if handler is None or not keys:
+            return
+        CACHE_INVALIDATIONS_TOTAL.labels(cache=cache).inc(len(keys))
+        # Handlers may query the database from this thread
+        close_old_connections()
+        try:
+            handler(keys)
+        except Exception:
+            logger.exception("cache.invalidation_failed", extra={"cache": cache})
+
+    def clear_all(self):
+        for cache, handler in self.handlers.items():
+            try:
+                handler(None)
+            except Exception:
+                logger.exception("cache.invalidation_failed", extra={"cache": cache})
+
+    def _listen(self):
+        conn = self.connect()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+            logger.info("cache.invalidation_listening")
+            self.clear_all()
+            while not self._closed.is_set():
+                if select.select([conn], [], [], self.poll_interval)[0]:
+                    conn.poll()
+                    while conn.notifies:
+                        self.dispatch(conn.notifies.pop(0).payload)
+        finally:
+            conn.close()
+
+    def _run(self):
+        while not self._closed.is_set():
+            try:
+                self._listen()
+            except (psycopg2.Error, OSError) as exc:
+                logger.warning(
+                    "cache.invalidation_disconnected", extra={"error": str(exc)}
+                )
+                self._closed.wait(self.poll_interval)
+
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def ensure_listener():
+    """Start the process-wide listener if ``CACHE_INVALIDATION_LISTEN`` is on."""
+    global _listener
+
+    if not getattr(settings, "CACHE_INVALIDATION_LISTEN", False):
+        return None
+    if _listener is None:
+        with _listener_lock:
+            if _listener is None:
+                listener = InvalidationListener()
+                listener.start()
+                _listener = listener
+    return _listener
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.core.indexes import index_usage
+
+
+class Command(BaseCommand):
+    help = (
+        "Report scans against row writes per index from pg_stat_user_indexes, "
+        "flagging indexes that cost writes but are rarely or never used"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--table",
+            action="append",
+            help="Only report indexes of this table; repeat for several",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=10000,
+            help="Flag indexes with more row writes than this per scan",
+        )
+
+    def _advice(self, entry, threshold):
+        # Unique indexes enforce constraints, whatever their usage
+        if entry.definition.startswith("CREATE UNIQUE INDEX") or not entry.writes:
+            return ""
+        if not entry.scans:
+            advice = "unused"
+        elif entry.writes_per_scan >= threshold:
+            advice = "write-heavy"
+        else:
+            return ""
+        if "USING gin" in entry.definition and "jsonb_path_ops" not in entry.definition:
+            advice += ": use jsonb_path_ops or expression indexes (JSONB_INDEXES)"
+        return advice
+
+    def handle(self, *args, **options):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT stats_reset FROM pg_stat_database "
+                "WHERE datname = current_database()"
+            )
+            (stats_reset,) = cursor.fetchone()
+            usage = index_usage(cursor, options["table"])
+
+        since = (
+            f"since {stats_reset:%Y-%m-%d %H:%M}" if stats_reset else "(never reset)"
+        )
+        self.stdout.write(f"Index statistics {since}\n")
+        self.stdout.write(
+            f"{'table':<24}{'index':<36}{'MB':>8}{'scans':>10}"
+            f"{'writes':>12}{'writes/scan':>13}  advice"
+        )
+        for entry in usage:
+            ratio = f"{entry.writes_per_scan:.0f}" if entry.scans else "-"
+            advice = self._advice(entry, options["threshold"])
+            line = (
+                f"{entry.table:<24}{entry.name:<36}{entry.size / 2**20:>8.1f}"
+                f"{entry.scans:>10}{entry.writes:>12}{ratio:>13}  {advice}"
+            )
+            self.stdout.write(self.style.WARNING(line) if advice else line)
@@ -0,0 +1,33 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.core.indexes import configured_indexes, sync_indexes
+
+
+class Command(BaseCommand):
+    help = (
+        "Create, rebuild and drop JSONB indexes to match settings.JSONB_INDEXES; "
+        "run after migrate"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only print what would change",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            indexes = configured_indexes()
+            with connection.cursor() as cursor:
+                actions = sync_indexes(cursor, indexes, dry_run=options["dry_run"])
+        except (ImproperlyConfigured, ValueError) as e:
+            raise CommandError(str(e))
+
+        for action, name in actions:
+            line = f"{action:<8}{name}"
+            self.stdout.write(line if action == "keep" else self.style.SUCCESS(line))
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING("Dry run, nothing changed"))
@@ -0,0 +1,87 @@
+from django.db import migrations
+
+# NOTIFY cache_invalidation with the changed rows' keys, taken from the column
+# named by the second trigger argument (see apps/core/invalidation.py)
+CREATE_FUNCTION = """
+CREATE OR REPLACE FUNCTION notify_cache_invalidation() RETURNS trigger AS $$
+DECLARE
+    keys jsonb := '[]'::jsonb;
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        keys := keys || jsonb_build_array(to_jsonb(OLD) -> TG_ARGV[1]);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        keys := keys || jsonb_build_array(to_jsonb(NEW) -> TG_ARGV[1]);
+    END IF;
+    PERFORM pg_notify(
+        'cache_invalidation',
+        jsonb_build_object('cache', TG_ARGV[0], 'keys', keys)::text
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Updates only notify when a cached column changes, so the frequent
+# last_seen / last_triggered_at writes stay silent
+CREATE_TRIGGERS = """
+CREATE TRIGGER devices_cache_invalidation
+    AFTER INSERT OR DELETE ON devices
+    FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation('devices', 'serial_number');
+CREATE TRIGGER devices_cache_invalidation_update
+    AFTER UPDATE ON devices
+    FOR EACH ROW
+    WHEN (
+        OLD.serial_number IS DISTINCT FROM NEW.serial_number
+        OR OLD.status IS DISTINCT FROM NEW.status
+        OR OLD.device_type_id IS DISTINCT FROM NEW.device_type_id
+    )
+    EXECUTE FUNCTION notify_cache_invalidation('devices', 'serial_number');
+
+CREATE TRIGGER device_types_cache_invalidation_update
+    AFTER UPDATE ON device_types
+    FOR EACH ROW
+    WHEN (
+        OLD.metric_name IS DISTINCT FROM NEW.metric_name
+        OR OLD.metric_min IS DISTINCT FROM NEW.metric_min
+        OR OLD.metric_max IS DISTINCT FROM NEW.metric_max
+    )
+    EXECUTE FUNCTION notify_cache_invalidation('device_types', 'id');
+
+CREATE TRIGGER rules_cache_invalidation
+    AFTER INSERT OR DELETE ON rules
+    FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation('rules', 'device_id');
+CREATE TRIGGER rules_cache_invalidation_update
+    AFTER UPDATE ON rules
+    FOR EACH ROW
+    WHEN (
+        OLD.device_id IS DISTINCT FROM NEW.device_id
+        OR OLD.name IS DISTINCT FROM NEW.name
+        OR OLD.comparison_operator IS DISTINCT FROM NEW.comparison_operator
+        OR OLD.threshold IS DISTINCT FROM NEW.threshold
+        OR OLD.action_config IS DISTINCT FROM NEW.action_config
+        OR OLD.is_enabled IS DISTINCT FROM NEW.is_enabled
+    )
+    EXECUTE FUNCTION notify_cache_invalidation('rules', 'device_id');
+"""
+
+DROP = """
+DROP TRIGGER IF EXISTS rules_cache_invalidation_update ON rules;
+DROP TRIGGER IF EXISTS rules_cache_invalidation ON rules;
+DROP TRIGGER IF EXISTS device_types_cache_invalidation_update ON device_types;
+DROP TRIGGER IF EXISTS devices_cache_invalidation_update ON devices;
+DROP TRIGGER IF EXISTS devices_cache_invalidation ON devices;
+DROP FUNCTION IF EXISTS notify_cache_invalidation();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("devices", "0001_initial"),
+        ("rules", "0004_remove_jsonb_gin_indexes"),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_FUNCTION + CREATE_TRIGGERS, reverse_sql=DROP),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+# Window changes change how a rule is evaluated, so they evict it too
+REPLACE_TRIGGER = """
+DROP TRIGGER IF EXISTS rules_cache_invalidation_update ON rules;
+CREATE TRIGGER rules_cache_invalidation_update
+    AFTER UPDATE ON rules
+    FOR EACH ROW
+    WHEN (
+        OLD.device_id IS DISTINCT FROM NEW.device_id
+        OR OLD.name IS DISTINCT FROM NEW.name
+        OR OLD.comparison_operator IS DISTINCT FROM NEW.comparison_operator
+        OR OLD.threshold IS DISTINCT FROM NEW.threshold
+        OR OLD.window_kind IS DISTINCT FROM NEW.window_kind
+        OR OLD.window_seconds IS DISTINCT FROM NEW.window_seconds
+        OR OLD.action_config IS DISTINCT FROM NEW.action_config
+        OR OLD.is_enabled IS DISTINCT FROM NEW.is_enabled
+    )
+    EXECUTE FUNCTION notify_cache_invalidation('rules', 'device_id');
+"""
+
+RESTORE_TRIGGER = """
+DROP TRIGGER IF EXISTS rules_cache_invalidation_update ON rules;
+CREATE TRIGGER rules_cache_invalidation_update
+    AFTER UPDATE ON rules
+    FOR EACH ROW
+    WHEN (
+        OLD.device_id IS DISTINCT FROM NEW.device_id
+        OR OLD.name IS DISTINCT FROM NEW.name
+        OR OLD.comparison_operator IS DISTINCT FROM NEW.comparison_operator
+        OR OLD.threshold IS DISTINCT FROM NEW.threshold
+        OR OLD.action_config IS DISTINCT FROM NEW.action_config
+        OR OLD.is_enabled IS DISTINCT FROM NEW.is_enabled
+    )
+    EXECUTE FUNCTION notify_cache_invalidation('rules', 'device_id');
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_cache_invalidation_triggers"),
+        ("rules", "0005_rule_windows"),
+    ]
+
+    operations = [
+        migrations.RunSQL(REPLACE_TRIGGER, reverse_sql=RESTORE_TRIGGER),
+    ]
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.http import HttpResponse
 from prometheus_client import generate_latest
 
@@ -12,6 +13,10 @@ def health(request):
 
 def metrics(request):
     """Expose Prometheus metrics endpoint."""
+    if getattr(settings, "TELEMETRY_STREAM_ENABLED", False):
+        from apps.telemetry.stream import get_telemetry_stream
+
+        get_telemetry_stream().report_backlog()
     return HttpResponse(
         generate_latest(),
         content_type="text/plain; charset=utf-8",
@@ -2,7 +2,9 @@ from django.contrib import admin
 from django.contrib import messages
 from django.conf import settings
 
+from .cache import get_device_cache
 from .models import Device, DeviceType
+from apps.core.admin import ReplicaChangeListMixin
 from apps.telemetry.models import Telemetry
 
 
@@ -54,6 +56,10 @@ class RecentTelemetryInline(admin.TabularInline):
 @admin.action(description="Activate selected devices")
 def activate_devices(modeladmin, request, queryset):
     updated = queryset.update(status="active")
+    # update() sends no signals
+    get_device_cache().invalidate(
+        list(queryset.values_list("serial_number", flat=True))
+    )
     modeladmin.message_user(
         request,
         f"{updated} device(s) activated.",
@@ -64,6 +70,10 @@ def activate_devices(modeladmin, request, queryset):
 @admin.action(description="Deactivate selected devices")
 def deactivate_devices(modeladmin, request, queryset):
     updated = queryset.update(status="inactive")
+    # update() sends no signals
+    get_device_cache().invalidate(
+        list(queryset.values_list("serial_number", flat=True))
+    )
     modeladmin.message_user(
         request,
         f"{updated} device(s) deactivated.",
@@ -72,7 +82,7 @@ def deactivate_devices(modeladmin, request, queryset):
 
 
 @admin.register(DeviceType)
-class DeviceTypeAdmin(admin.ModelAdmin):
+class DeviceTypeAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = ["name", "description", "created_at"]
     search_fields = ["name", "description"]
     readonly_fields = ["id", "created_at"]
@@ -80,7 +90,7 @@ class DeviceTypeAdmin(admin.ModelAdmin):
 
 
 @admin.register(Device)
-class DeviceAdmin(admin.ModelAdmin):
+class DeviceAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = [
         "name",
         "serial_number",
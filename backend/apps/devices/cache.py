@@ -0,0 +1,278 @@
+"""Serial number to device resolution cache for the ingest hot path.
+
+Lookups go through a process-local LRU first, then an optional shared Redis
+tier, then Postgres. Unknown serial numbers are cached too (negative
+caching), so a flood of readings from unregistered devices never reaches the
+database. Entries are invalidated by the signal handlers in ``signals.py``.
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+import redis
+from django.conf import settings
+
+from apps.core.invalidation import ensure_listener
+from config.metrics import DEVICE_CACHE_LOOKUPS_TOTAL
+
+from .models import Device
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "iot:device:ssn:"
+CLEAR_BATCH = 1000
+
+# Stored in Redis for serial numbers that do not belong to any device
+_NEGATIVE = ""
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceInfo:
+    """The subset of ``Device`` and its ``DeviceType`` needed per reading."""
+
+    id: uuid.UUID
+    status: str
+    device_type_id: uuid.UUID
+    metric_name: str
+    metric_min: float | None
+    metric_max: float | None
+
+    @classmethod
+    def from_db(cls, pk, status, device_type_id, metric_name, metric_min, metric_max):
+        """Build from database values, converting ``Decimal`` bounds to float."""
+        return cls(
+            id=pk,
+            status=status,
+            device_type_id=device_type_id,
+            metric_name=metric_name,
+            metric_min=float(metric_min) if metric_min is not None else None,
+            metric_max=float(metric_max) if metric_max is not None else None,
+        )
+
+    def to_json(self):
+        data = asdict(self)
+        data["id"] = str(self.id)
+        data["device_type_id"] = str(self.device_type_id)
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, raw):
+        data = json.loads(raw)
+        data["id"] = uuid.UUID(data["id"])
+        data["device_type_id"] = uuid.UUID(data["device_type_id"])
+        return cls(**data)
+
+
+def load_devices(serial_numbers):
+    """Resolve serial numbers from the database with a single query."""
+    if not serial_numbers:
+        return {}
+    rows = Device.objects.filter(serial_number__in=serial_numbers).values_list(
+        "serial_number",
+        "id",
+        "status",
+        "device_type_id",
+        "device_type__metric_name",
+        "device_type__metric_min",
+        "device_type__metric_max",
+    )
+    return {ssn: DeviceInfo.from_db(*values) for ssn, *values in rows}
+
+
+class DeviceCache:
+    """Two-tier (local LRU + optional Redis) cache of ``DeviceInfo`` by serial.
+
+    A cached ``None`` means the serial number is known not to exist.
+    """
+
+    def __init__(
+        self,
+        loader=load_devices,
+        max_size=10000,
+        ttl=60,
+        negative_ttl=30,
+        redis_client=None,
+        redis_ttl=300,
+    ):
+        self.loader = loader
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.redis = redis_client
+        self.redis_ttl = redis_ttl
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get_local(self, serial_numbers):
+        """Return ``(found, misses)`` from the process-local tier only.
+
+        ``found`` maps serial number to ``DeviceInfo`` or ``None`` (unknown).
+        """
+        found, misses = {}, set()
+        now = time.monotonic()
+        with self._lock:
+            for ssn in serial_numbers:
+                entry = self._entries.get(ssn)
+                if entry is None or entry[1] < now:
+                    misses.add(ssn)
+                    continue
+                self._entries.move_to_end(ssn)
+                found[ssn] = entry[0]
+        self._count("local", found, misses)
+        return found, misses
+
+    def store_local(self, found, missing=()):
+        """Cache resolved devices and known-unknown serials in the local tier."""
+        now = time.monotonic()
+        with self._lock:
+            for ssn, info in found.items():
+                self._entries[ssn] = (info, now + self.ttl)
+                self._entries.move_to_end(ssn)
+            for ssn in missing:
+                self._entries[ssn] = (None, now + self.negative_ttl)
+                self._entries.move_to_end(ssn)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_many(self, serial_numbers):
+        """Resolve serial numbers to ``DeviceInfo``; unknown ones are omitted."""
+        found, misses = self.get_local(serial_numbers)
+
+        if misses and self.redis is not None:
+            shared = self._redis_get(misses)
+            self.store_local(
+                {ssn: info for ssn, info in shared.items() if info is not None},
+                [ssn for ssn, info in shared.items() if info is None],
+            )
+            found.update(shared)
+            misses -= shared.keys()
+
+        if misses:
+            loaded = self.loader(misses)
+            missing = misses - loaded.keys()
+            self.store_local(loaded, missing)
+            self._redis_set(loaded, missing)
+            found.update(loaded)
+
+        return {ssn: info for ssn, info in found.items() if info is not None}
+
+    def invalidate(self, serial_numbers):
+        """Drop serial numbers from every tier."""
+        serial_numbers = [ssn for ssn in serial_numbers if ssn]
+        if not serial_numbers:
+            return
+        with self._lock:
+            for ssn in serial_numbers:
+                self._entries.pop(ssn, None)
+        if self.redis is not None:
+            try:
+                self.redis.delete(*(REDIS_KEY_PREFIX + ssn for ssn in serial_numbers))
+            except redis.RedisError as exc:
+                logger.warning(
+                    "device_cache.redis_invalidate_failed", extra={"error": str(exc)}
+                )
+
+    def clear(self):
+        """Drop every entry from every tier.
+
+        Used when invalidations may have been missed, e.g. while the listener
+        was disconnected, so entries other processes wrote to Redis meanwhile
+        are stale as well.
+        """
+        with self._lock:
+            self._entries.clear()
+        if self.redis is None:
+            return
+        try:
+            batch = []
+            for key in self.redis.scan_iter(
+                match=REDIS_KEY_PREFIX + "*", count=CLEAR_BATCH
+            ):
+                batch.append(key)
+                if len(batch) >= CLEAR_BATCH:
+                    self.redis.delete(*batch)
+                    batch = []
+            if batch:
+                self.redis.delete(*batch)
+        except redis.RedisError as exc:
+            logger.warning("device_cache.redis_clear_failed", extra={"error": str(exc)})
+
+    def _redis_get(self, serial_numbers):
+        serial_numbers = list(serial_numbers)
+        try:
+            values = self.redis.mget([REDIS_KEY_PREFIX + ssn for ssn in serial_numbers])
+        except redis.RedisError as exc:
+            logger.warning("device_cache.redis_get_failed", extra={"error": str(exc)})
+            return {}
+
+        shared = {}
+        for ssn, raw in zip(serial_numbers, values):
+            if raw is None:
+                continue
+            raw = raw.decode() if isinstance(raw, bytes) else raw
+            shared[ssn] = None if raw == _NEGATIVE else DeviceInfo.from_json(raw)
+        self._count("redis", shared, set(serial_numbers) - shared.keys())
+        return shared
+
+    def _redis_set(self, loaded, missing):
+        if self.redis is None or not (loaded or missing):
+            return
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                for ssn, info in loaded.items():
+                    pipe.set(REDIS_KEY_PREFIX + ssn, info.to_json(), ex=self.redis_ttl)
+                for ssn in missing:
+                    pipe.set(REDIS_KEY_PREFIX + ssn, _NEGATIVE, ex=self.negative_ttl)
+                pipe.execute()
+        except redis.RedisError as exc:
+            logger.warning("device_cache.redis_set_failed", extra={"error": str(exc)})
+
+    @staticmethod
+    def _count(tier, found, misses):
+        hits = sum(1 for info in found.values() if info is not None)
+        if hits:
+            DEVICE_CACHE_LOOKUPS_TOTAL.labels(tier=tier, result="hit").inc(hits)
+        if len(found) - hits:
+            DEVICE_CACHE_LOOKUPS_TOTAL.labels(tier=tier, result="negative_hit").inc(
+                len(found) - hits
+            )
+        if misses:
+            DEVICE_CACHE_LOOKUPS_TOTAL.labels(tier=tier, result="miss").inc(len(misses))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_device_cache():
+    """Return the process-wide device cache configured from settings."""
+    global _cache
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                redis_url = getattr(settings, "DEVICE_CACHE_REDIS_URL", "")
+                redis_client = (
+                    redis.Redis.from_url(redis_url, socket_timeout=0.1)
+                    if redis_url
+                    else None
+                )
+                _cache = DeviceCache(
+                    max_size=getattr(settings, "DEVICE_CACHE_MAX_SIZE", 10000),
+                    ttl=getattr(settings, "DEVICE_CACHE_TTL", 60),
+                    negative_ttl=getattr(settings, "DEVICE_CACHE_NEGATIVE_TTL", 30),
+                    redis_client=redis_client,
+                    redis_ttl=getattr(settings, "DEVICE_CACHE_REDIS_TTL", 300),
+                )
+                ensure_listener()
+    return _cache
@@ -0,0 +1,120 @@
+"""Write-behind coalescing of ``Device.last_seen`` updates.
+
+Updating ``last_seen`` per reading takes a row lock on ``devices`` for every
+message, so the busiest devices contend on the same rows. Instead, ingest
+records the newest timestamp per device in memory and a background thread
+writes all of them with a single ``UPDATE ... FROM (VALUES ...)``.
+"""
+
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, connection
+
+from apps.core.flusher import PeriodicFlusher
+from config.metrics import (
+    DEVICE_LAST_SEEN_FLUSH_DEVICES,
+    DEVICE_LAST_SEEN_FLUSH_DURATION_SECONDS,
+)
+
+from .models import Device
+
+logger = logging.getLogger(__name__)
+
+# Rows per UPDATE statement, keeps the statement and its parameters bounded
+FLUSH_CHUNK_SIZE = 1000
+
+# Only moves last_seen forward, so flushes from several processes commute
+UPDATE_SQL = (
+    f"UPDATE {Device._meta.db_table} AS d SET last_seen = v.seen_at "
+    "FROM (VALUES {values}) AS v(id, seen_at) "
+    "WHERE d.id = v.id AND (d.last_seen IS NULL OR d.last_seen < v.seen_at)"
+)
+
+
+def write_last_seen(pending):
+    """Apply ``{device_id: seen_at}`` in as few statements as possible."""
+    items = list(pending.items())
+    with connection.cursor() as cursor:
+        for start in range(0, len(items), FLUSH_CHUNK_SIZE):
+            chunk = items[start : start + FLUSH_CHUNK_SIZE]
+            values = ", ".join(["(%s::uuid, %s::timestamptz)"] * len(chunk))
+            params = [value for item in chunk for value in item]
+            cursor.execute(UPDATE_SQL.format(values=values), params)
+
+
+class LastSeenTracker(PeriodicFlusher):
+    """Keeps the newest ``last_seen`` per device until the next flush."""
+
+    thread_name = "device-last-seen"
+
+    def __init__(self, writer=write_last_seen, flush_interval=5):
+        super().__init__(flush_interval)
+        self.writer = writer
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def touch(self, device_ids, seen_at):
+        """Record that the devices were seen at ``seen_at``."""
+        with self._lock:
+            self._merge({device_id: seen_at for device_id in device_ids})
+
+    def _merge(self, seen):
+        # Caller holds the lock
+        for device_id, seen_at in seen.items():
+            current = self._pending.get(device_id)
+            if current is None or current < seen_at:
+                self._pending[device_id] = seen_at
+
+    def flush(self, reason="manual"):
+        """Write every pending timestamp and return how many devices were updated."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            start = time.perf_counter()
+            try:
+                self.writer(pending)
+            except (OperationalError, InterfaceError):
+                logger.exception(
+                    "device.last_seen_flush_failed", extra={"devices": len(pending)}
+                )
+                with self._lock:
+                    self._merge(pending)
+                return 0
+
+            DEVICE_LAST_SEEN_FLUSH_DURATION_SECONDS.observe(time.perf_counter() - start)
+            DEVICE_LAST_SEEN_FLUSH_DEVICES.observe(len(pending))
+            return len(pending)
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_last_seen_tracker():
+    """Return the process-wide tracker, starting it on first use."""
+    global _tracker
+
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                tracker = LastSeenTracker(
+                    flush_interval=getattr(
+                        settings, "DEVICE_LAST_SEEN_FLUSH_SECONDS", 5
+                    ),
+                )
+                tracker.start()
+                atexit.register(tracker.close)
+                _tracker = tracker
+    return _tracker
@@ -0,0 +1,68 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.core import invalidation
+
+from .cache import get_device_cache
+from .models import Device, DeviceType
+
+
+def _invalidate(serial_numbers):
+    # Evict now for this process, and again once the change is visible to others
+    cache = get_device_cache()
+    cache.invalidate(serial_numbers)
+    transaction.on_commit(lambda: cache.invalidate(serial_numbers))
+
+
+@receiver(pre_save, sender=Device)
+def remember_previous_serial(sender, instance, **kwargs):
+    """Keep the stored serial number so a renamed device is evicted too."""
+    instance._previous_serial_number = None
+    if instance.pk and not instance._state.adding:
+        instance._previous_serial_number = (
+            Device.objects.filter(pk=instance.pk)
+            .values_list("serial_number", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Device)
+@receiver(post_delete, sender=Device)
+def invalidate_device(sender, instance, **kwargs):
+    """Evict the device, and any negative entry for its serial, from the cache."""
+    _invalidate(
+        [instance.serial_number, getattr(instance, "_previous_serial_number", None)]
+    )
+
+
+@receiver(post_save, sender=DeviceType)
+@receiver(post_delete, sender=DeviceType)
+def invalidate_device_type(sender, instance, **kwargs):
+    """Evict every device of the type, since cached entries carry its bounds."""
+    serial_numbers = Device.objects.filter(device_type_id=instance.pk).values_list(
+        "serial_number", flat=True
+    )
+    _invalidate(list(serial_numbers))
+
+
+def _invalidate_notified_devices(serial_numbers):
+    cache = get_device_cache()
+    if serial_numbers is None:
+        cache.clear()
+    else:
+        cache.invalidate(serial_numbers)
+
+
+def _invalidate_notified_device_types(device_type_ids):
+    if device_type_ids is None:
+        get_device_cache().clear()
+        return
+    serial_numbers = Device.objects.filter(
+        device_type_id__in=device_type_ids
+    ).values_list("serial_number", flat=True)
+    get_device_cache().invalidate(list(serial_numbers))
+
+
+invalidation.register("devices", _invalidate_notified_devices)
+invalidation.register("device_types", _invalidate_notified_device_types)
@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib import messages
 
+from apps.core.admin import ReplicaChangeListMixin
+
 from .models import Event
 
 
@@ -35,7 +37,7 @@ def mark_events_new(modeladmin, request, queryset):
 
 
 @admin.register(Event)
-class EventAdmin(admin.ModelAdmin):
+class EventAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = ["id", "rule", "severity", "status", "timestamp"]
     list_filter = ["severity", "status", "timestamp", "rule"]
     search_fields = ["message", "rule__name"]
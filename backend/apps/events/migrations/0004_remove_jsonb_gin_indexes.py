@@ -0,0 +1,21 @@
+# Generated by Django 5.2.10 on 2026-10-18 00:58
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0003_alter_event_execution_results"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="event",
+            name="idx_event_exec_results_gin",
+        ),
+        migrations.RemoveIndex(
+            model_name="event",
+            name="idx_event_telemetry_snap_gin",
+        ),
+    ]
@@ -1,5 +1,4 @@
 from django.db import models
-from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ValidationError
 
 from apps.rules.models import Rule
@@ -96,10 +95,6 @@ class Event(models.Model):
                 fields=["timestamp", "severity", "status"],
                 name="idx_event_time_sev_status",
             ),
-            GinIndex(fields=["execution_results"], name="idx_event_exec_results_gin"),
-            GinIndex(
-                fields=["telemetry_snapshot"], name="idx_event_telemetry_snap_gin"
-            ),
         ]
 
     def __str__(self):
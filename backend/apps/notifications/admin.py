@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib import messages
 
+from apps.core.admin import ReplicaChangeListMixin
+
 from .models import NotificationTemplate, NotificationDelivery
 
 
@@ -25,7 +27,7 @@ def deactivate_templates(modeladmin, request, queryset):
 
 
 @admin.register(NotificationTemplate)
-class NotificationTemplateAdmin(admin.ModelAdmin):
+class NotificationTemplateAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = [
         "name",
         "priority",
@@ -62,7 +64,7 @@ def reset_attempts(modeladmin, request, queryset):
 
 
 @admin.register(NotificationDelivery)
-class NotificationDeliveryAdmin(admin.ModelAdmin):
+class NotificationDeliveryAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = [
         "id",
         "event",
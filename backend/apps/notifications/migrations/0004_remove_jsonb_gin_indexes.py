@@ -0,0 +1,20 @@
+# Generated by Django 5.2.10 on 2026-10-18 00:58
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "notifications",
+            "0003_rename_recipient_type_notificationdelivery_notification_type",
+        ),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="notificationtemplate",
+            name="idx_notif_templ_recip_gin",
+        ),
+    ]
@@ -1,5 +1,4 @@
 from django.db import models
-from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
 
@@ -78,7 +77,6 @@ class NotificationTemplate(models.Model):
             models.Index(fields=["name"], name="idx_notif_templ_name"),
             models.Index(fields=["is_active"], name="idx_notif_templ_active"),
             models.Index(fields=["priority"], name="idx_notif_templ_priority"),
-            GinIndex(fields=["recipients"], name="idx_notif_templ_recip_gin"),
         ]
 
     def __str__(self):
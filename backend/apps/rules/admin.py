@@ -1,12 +1,17 @@
 from django.contrib import admin
 from django.contrib import messages
 
+from apps.core.admin import ReplicaChangeListMixin
+
+from .engine import invalidate_rules
 from .models import Rule
 
 
 @admin.action(description="Enable selected rules")
 def enable_rules(modeladmin, request, queryset):
     updated = queryset.update(is_enabled=True)
+    # update() sends no signals
+    invalidate_rules(set(queryset.values_list("device_id", flat=True)))
     modeladmin.message_user(
         request,
         f"{updated} rule(s) enabled.",
@@ -17,6 +22,8 @@ def enable_rules(modeladmin, request, queryset):
 @admin.action(description="Disable selected rules")
 def disable_rules(modeladmin, request, queryset):
     updated = queryset.update(is_enabled=False)
+    # update() sends no signals
+    invalidate_rules(set(queryset.values_list("device_id", flat=True)))
     modeladmin.message_user(
         request,
         f"{updated} rule(s) disabled.",
@@ -25,17 +32,24 @@ def disable_rules(modeladmin, request, queryset):
 
 
 @admin.register(Rule)
-class RuleAdmin(admin.ModelAdmin):
+class RuleAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = [
         "name",
         "device",
         "comparison_operator",
         "threshold",
+        "window_kind",
         "is_enabled",
         "last_triggered_at",
         "created_at",
     ]
-    list_filter = ["is_enabled", "comparison_operator", "device", "created_at"]
+    list_filter = [
+        "is_enabled",
+        "comparison_operator",
+        "window_kind",
+        "device",
+        "created_at",
+    ]
     search_fields = ["name", "description", "device__name", "device__serial_number"]
     readonly_fields = ["id", "created_at", "updated_at", "last_triggered_at"]
     date_hierarchy = "created_at"
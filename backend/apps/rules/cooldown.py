@@ -0,0 +1,197 @@
+"""Cooldown of triggered rules, decided without reading the ``rules`` row.
+
+A rule whose actions set ``cooldown_minutes`` fires at most once per the
+longest of them. Reading and updating ``last_triggered_at`` for every match
+would serialize on the row of a hot rule, so ``CooldownGate`` keeps, per rule,
+the time until which it is cooling down in memory:
+
+- A rule cooling down in this process is suppressed without any I/O.
+- Otherwise, with Redis configured, the process claims the rule with
+  ``SET NX PX <cooldown>``. Only one process wins the claim; a losing process
+  reads the remaining ``PTTL`` once and then suppresses locally as well.
+- ``last_triggered_at`` of fired rules is coalesced in memory and written by a
+  background thread with one ``UPDATE ... FROM (VALUES ...)`` per flush. After
+  a restart, the value loaded with the rule seeds the gate.
+
+Without Redis the gate is per process. When Redis fails, the gate falls back
+to the in-memory decision, so an outage may let a rule fire once per process.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+import redis
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, connection
+
+from apps.core.flusher import PeriodicFlusher
+from config.metrics import (
+    RULE_COOLDOWN_DECISIONS_TOTAL,
+    RULE_LAST_TRIGGERED_FLUSH_RULES,
+)
+
+from .models import Rule
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "iot:rules:cooldown:"
+
+# Rows per UPDATE statement, keeps the statement and its parameters bounded
+FLUSH_CHUNK_SIZE = 1000
+
+# Only moves last_triggered_at forward, so flushes from several processes commute
+UPDATE_SQL = (
+    f"UPDATE {Rule._meta.db_table} AS r SET last_triggered_at = v.triggered_at "
+    "FROM (VALUES {values}) AS v(id, triggered_at) "
+    "WHERE r.id = v.id "
+    "AND (r.last_triggered_at IS NULL OR r.last_triggered_at < v.triggered_at)"
+)
+
+
+def write_last_triggered(pending):
+    """Apply ``{rule_id: triggered_at}`` in as few statements as possible."""
+    items = list(pending.items())
+    with connection.cursor() as cursor:
+        for start in range(0, len(items), FLUSH_CHUNK_SIZE):
+            chunk = items[start : start + FLUSH_CHUNK_SIZE]
+            values = ", ".join(["(%s::uuid, %s::timestamptz)"] * len(chunk))
+            params = [value for item in chunk for value in item]
+            cursor.execute(UPDATE_SQL.format(values=values), params)
+
+
+class CooldownGate(PeriodicFlusher):
+    """Decides whether matched rules may fire, and records when they did."""
+
+    thread_name = "rule-cooldown"
+
+    def __init__(
+        self,
+        redis_client=None,
+        writer=write_last_triggered,
+        flush_interval=5,
+        clock=time.time,
+    ):
+        super().__init__(flush_interval)
+        self.redis = redis_client
+        self.writer = writer
+        self.clock = clock
+        # rule id -> epoch seconds until which the rule is cooling down
+        self._until = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def allow(self, rule):
+        """Return whether ``rule`` may fire now, starting its cooldown if so."""
+        now = self.clock()
+        with self._lock:
+            until = self._until.get(rule.id)
+            if until is None and rule.last_triggered_at is not None:
+                until = rule.last_triggered_at.timestamp() + rule.cooldown
+            if until is not None and now < until:
+                RULE_COOLDOWN_DECISIONS_TOTAL.labels(result="suppressed").inc()
+                return False
+
+        if rule.cooldown > 0 and self.redis is not None:
+            remaining = self._claim(rule)
+            if remaining:
+                with self._lock:
+                    self._until[rule.id] = now + remaining
+                RULE_COOLDOWN_DECISIONS_TOTAL.labels(result="suppressed_shared").inc()
+                return False
+
+        with self._lock:
+            if rule.cooldown > 0:
+                self._until[rule.id] = now + rule.cooldown
+            self._pending[rule.id] = max(now, self._pending.get(rule.id, now))
+        RULE_COOLDOWN_DECISIONS_TOTAL.labels(result="allowed").inc()
+        return True
+
+    def allow_matches(self, matches):
+        """Keep the ``(rule, reading)`` matches whose rule may fire.
+
+        A rule with a cooldown fires once per batch at most.
+        """
+        return [(rule, reading) for rule, reading in matches if self.allow(rule)]
+
+    def _claim(self, rule):
+        """Return 0 if this process claimed ``rule``, else the seconds left."""
+        key = f"{REDIS_KEY_PREFIX}{rule.id}"
+        try:
+            if self.redis.set(key, 1, nx=True, px=int(rule.cooldown * 1000)):
+                return 0
+            # Expired between the two commands, let the next match claim it
+            return max(self.redis.pttl(key), 0) / 1000
+        except redis.RedisError as exc:
+            logger.warning("rules.cooldown_redis_failed", extra={"error": str(exc)})
+            return 0
+
+    def flush(self, reason="manual"):
+        """Write pending ``last_triggered_at`` values, return how many rules."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                now = self.clock()
+                self._until = {
+                    rule_id: until
+                    for rule_id, until in self._until.items()
+                    if until > now
+                }
+            if not pending:
+                return 0
+
+            try:
+                self.writer(
+                    {
+                        rule_id: datetime.fromtimestamp(triggered, timezone.utc)
+                        for rule_id, triggered in pending.items()
+                    }
+                )
+            except (OperationalError, InterfaceError):
+                logger.exception(
+                    "rules.last_triggered_flush_failed", extra={"rules": len(pending)}
+                )
+                with self._lock:
+                    for rule_id, triggered in pending.items():
+                        self._pending[rule_id] = max(
+                            triggered, self._pending.get(rule_id, triggered)
+                        )
+                return 0
+
+            RULE_LAST_TRIGGERED_FLUSH_RULES.observe(len(pending))
+            return len(pending)
+
+
+_gate = None
+_gate_lock = threading.Lock()
+
+
+def get_cooldown_gate():
+    """Return the process-wide gate, starting its flush thread on first use."""
+    global _gate
+
+    if _gate is None:
+        with _gate_lock:
+            if _gate is None:
+                redis_url = getattr(settings, "RULE_COOLDOWN_REDIS_URL", "")
+                gate = CooldownGate(
+                    redis_client=(
+                        redis.Redis.from_url(redis_url, socket_timeout=0.5)
+                        if redis_url
+                        else None
+                    ),
+                    flush_interval=getattr(
+                        settings, "RULE_LAST_TRIGGERED_FLUSH_SECONDS", 5
+                    ),
+                )
+                gate.start()
+                atexit.register(gate.close)
+                _gate = gate
+    return _gate
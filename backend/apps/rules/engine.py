@@ -0,0 +1,319 @@
+"""In-process index of enabled rules for evaluating readings.
+
+Enabled rules are loaded per device, with one query over
+``idx_rule_device_enabled`` for every device of a batch, and kept grouped by
+operator with each operator's thresholds in a sorted array. Matching a
+reading is then two bisects per operator instead of a scan over every rule:
+``value > threshold`` holds for exactly the thresholds left of
+``bisect_left(thresholds, value)``, ``value < threshold`` for those right of
+``bisect_right(thresholds, value)``, and so on.
+
+``invalidate`` drops devices from the index and their rules are reloaded on
+the next reading. The signal handlers in ``signals.py`` call it when a rule
+is saved or deleted.
+
+Other processes learn about changes, including ``queryset.update()`` and
+raw SQL, through ``apps.core.invalidation``.
+
+Windowed rules (sustained, rolling average, rate of change) are evaluated
+for every reading of their device against incremental state kept by
+``windows.py``.
+
+``triggered_rows`` additionally drops rules that are cooling down, see
+``cooldown.py``.
+
+``evaluate_batch`` matches a batch of readings at once against a columnar
+snapshot of every enabled rule (see ``vectorized.py``), rebuilt after any
+invalidation.
+
+Nothing calls these entry points yet: the ingest pipeline does not evaluate
+readings and no code turns a match into an ``Event``. The consumer that
+executes rule actions is meant to pass the rows ``persist_rows`` accepted to
+``triggered_rows``.
+"""
+
+import math
+import threading
+import uuid
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.db import transaction
+
+from apps.core.invalidation import ensure_listener
+
+from .cooldown import get_cooldown_gate
+from .models import Rule
+from .vectorized import RuleSnapshot
+from .windows import get_window_store
+
+Op = Rule.RuleOperator
+
+# (start, stop) slices of the sorted thresholds that match, given
+# low = bisect_left(thresholds, value) and high = bisect_right(...)
+_MATCHING = {
+    Op.GT: lambda low, high: ((0, low),),
+    Op.GTE: lambda low, high: ((0, high),),
+    Op.LT: lambda low, high: ((high, None),),
+    Op.LTE: lambda low, high: ((low, None),),
+    Op.EQ: lambda low, high: ((low, high),),
+    Op.NEQ: lambda low, high: ((0, low), (high, None)),
+}
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class CompiledRule:
+    """The fields of an enabled ``Rule`` needed to evaluate and act on it."""
+
+    id: uuid.UUID
+    device_id: uuid.UUID
+    name: str
+    operator: str
+    threshold: float
+    action_config: list
+    # Seconds, the longest ``cooldown_minutes`` of the rule's actions
+    cooldown: float = 0.0
+    # As loaded; the cooldown gate keeps the current value
+    last_triggered_at: datetime | None = None
+    window_kind: str = Rule.WindowKind.POINT
+    window_seconds: float = 0.0
+
+    @classmethod
+    def from_db(
+        cls,
+        pk,
+        device_id,
+        name,
+        operator,
+        threshold,
+        action_config,
+        last_triggered_at=None,
+        window_kind=Rule.WindowKind.POINT,
+        window_seconds=None,
+    ):
+        cooldown = max(
+            (item.get("cooldown_minutes") or 0 for item in action_config), default=0
+        )
+        return cls(
+            pk,
+            device_id,
+            name,
+            operator,
+            float(threshold),
+            action_config,
+            cooldown * 60.0,
+            last_triggered_at,
+            window_kind,
+            float(window_seconds or 0),
+        )
+
+
+class DeviceRules:
+    """Enabled rules of one device, sorted by threshold per operator.
+
+    Windowed rules are kept apart in ``windowed``, they see every reading.
+    """
+
+    __slots__ = ("_groups", "windowed")
+
+    def __init__(self, rules=()):
+        grouped, windowed = {}, []
+        for rule in sorted(rules, key=lambda rule: rule.threshold):
+            if rule.window_kind != Rule.WindowKind.POINT:
+                windowed.append(rule)
+            else:
+                grouped.setdefault(rule.operator, []).append(rule)
+        self._groups = [
+            (_MATCHING[operator], [rule.threshold for rule in group], group)
+            for operator, group in grouped.items()
+        ]
+        self.windowed = tuple(windowed)
+
+    def __len__(self):
+        return sum(len(group) for _, _, group in self._groups) + len(self.windowed)
+
+    def match(self, value):
+        """Return the point rules whose condition holds for ``value``."""
+        if value is None or math.isnan(value):
+            return []
+        matched = []
+        for slices, thresholds, group in self._groups:
+            low = bisect_left(thresholds, value)
+            high = bisect_right(thresholds, value, low)
+            for start, stop in slices(low, high):
+                matched.extend(group[start:stop])
+        return matched
+
+
+def load_rules(device_ids=None):
+    """Load enabled rules as ``{device_id: [rule]}``, of every device by default."""
+    rules = {}
+    queryset = Rule.objects.filter(is_enabled=True)
+    if device_ids is not None:
+        queryset = queryset.filter(device_id__in=device_ids)
+    rows = queryset.values_list(
+        "id",
+        "device_id",
+        "name",
+        "comparison_operator",
+        "threshold",
+        "action_config",
+        "last_triggered_at",
+        "window_kind",
+        "window_seconds",
+    )
+    for row in rows:
+        rule = CompiledRule.from_db(*row)
+        rules.setdefault(rule.device_id, []).append(rule)
+    return rules
+
+
+class RuleIndex:
+    """Process-local ``DeviceRules`` by device, loaded on first use.
+
+    ``windows`` keeps the state of windowed rules, the process-wide
+    ``WindowStore`` by default.
+    """
+
+    def __init__(self, loader=load_rules, windows=None):
+        self.loader = loader
+        self.windows = windows
+        self._devices = {}
+        self._snapshot = None
+        self._lock = threading.Lock()
+        # Bumped by every invalidation, so a load racing one is not kept
+        self._generation = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._devices)
+
+    def rules_for(self, device_ids):
+        """Return ``{device_id: DeviceRules}``, loading missing devices at once."""
+        found, misses = {}, set()
+        with self._lock:
+            for device_id in device_ids:
+                entry = self._devices.get(device_id)
+                if entry is None:
+                    misses.add(device_id)
+                else:
+                    found[device_id] = entry
+            generation = self._generation
+
+        if misses:
+            loaded = self.loader(misses)
+            entries = {
+                device_id: DeviceRules(loaded.get(device_id, ()))
+                for device_id in misses
+            }
+            with self._lock:
+                if generation == self._generation:
+                    self._devices.update(entries)
+            found.update(entries)
+        return found
+
+    def match(self, device_id, value):
+        return self.rules_for([device_id])[device_id].match(value)
+
+    def match_rows(self, rows):
+        """Return ``(rule, row)`` for every rule matched by ``TelemetryRow`` rows.
+
+        Rows update the state of windowed rules in batch order.
+        """
+        devices = self.rules_for({row.device_id for row in rows})
+        windowed = [rule for entry in devices.values() for rule in entry.windowed]
+        if windowed:
+            windows = self.windows if self.windows is not None else get_window_store()
+            windows.prepare(windowed)
+
+        matches = []
+        for row in rows:
+            entry = devices[row.device_id]
+            matches.extend((rule, row) for rule in entry.match(row.value))
+            for rule in entry.windowed:
+                if windows.update(rule, row.timestamp, row.value):
+                    matches.append((rule, row))
+        return matches
+
+    def snapshot(self):
+        """Return a ``RuleSnapshot`` of every enabled point rule."""
+        with self._lock:
+            if self._snapshot is not None:
+                return self._snapshot
+            generation = self._generation
+
+        snapshot = RuleSnapshot(
+            rule
+            for rules in self.loader(None).values()
+            for rule in rules
+            if rule.window_kind == Rule.WindowKind.POINT
+        )
+        with self._lock:
+            if generation == self._generation:
+                self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self, device_ids):
+        """Drop devices so their rules are reloaded on the next reading."""
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+            for device_id in device_ids:
+                self._devices.pop(device_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+            self._devices.clear()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_rule_index():
+    """Return the process-wide rule index."""
+    global _index
+
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = RuleIndex()
+                ensure_listener()
+    return _index
+
+
+def invalidate_rules(device_ids):
+    """Reload the rules of ``device_ids`` after a change to them."""
+    device_ids = [device_id for device_id in device_ids if device_id]
+    if not device_ids:
+        return
+    # Evict now for this process, and again once the change is visible to others
+    index = get_rule_index()
+    index.invalidate(device_ids)
+    transaction.on_commit(lambda: index.invalidate(device_ids))
+
+
+def match_rows(rows):
+    """Match ``TelemetryRow`` rows against the enabled rules of their devices."""
+    if not rows:
+        return []
+    return get_rule_index().match_rows(rows)
+
+
+def triggered_rows(rows):
+    """Like ``match_rows``, without the rules that are cooling down."""
+    return get_cooldown_gate().allow_matches(match_rows(rows))
+
+
+def evaluate_batch(device_ids, values, timestamps=None):
+    """Match a batch of readings given as arrays in one vectorized pass.
+
+    Returns ``(snapshot, matches)``; ``matches.rule`` indexes
+    ``snapshot.rules`` and ``matches.reading`` the batch. Windowed rules keep
+    state per reading and are only evaluated by ``match_rows``.
+    """
+    snapshot = get_rule_index().snapshot()
+    return snapshot, snapshot.evaluate(device_ids, values, timestamps)
@@ -0,0 +1,120 @@
+import operator
+import random
+import time
+import uuid
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.rules.engine import CompiledRule, DeviceRules
+from apps.rules.vectorized import OPERATORS, RuleSnapshot
+
+PYTHON_OPERATORS = {
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "eq": operator.eq,
+    "neq": operator.ne,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rule evaluation strategies on synthetic readings and rules: a "
+        "per-reading Python scan, the per-device bisect index and the vectorized "
+        "batch evaluation. No database access"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readings", type=int, default=100000)
+        parser.add_argument("--rules", type=int, default=10000)
+        parser.add_argument(
+            "--devices",
+            type=int,
+            default=100,
+            help="Devices the rules and readings are spread over",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Readings per vectorized batch",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def _rules(self, rng, devices, count):
+        # Integer thresholds so eq/neq rules match some readings too
+        return [
+            CompiledRule(
+                uuid.UUID(int=rng.getrandbits(128)),
+                rng.choice(devices),
+                f"rule {number}",
+                rng.choice(OPERATORS),
+                float(rng.randint(0, 100)),
+                [],
+            )
+            for number in range(count)
+        ]
+
+    def _report(self, name, seconds, readings, matches):
+        self.stdout.write(
+            f"{name:<12}{seconds:>10.3f}{readings / seconds:>16,.0f}{matches:>12,}"
+        )
+
+    def handle(self, *args, **options):
+        if min(options["readings"], options["devices"], options["batch_size"]) < 1:
+            raise CommandError("--readings, --devices and --batch-size must be >= 1")
+        rng = random.Random(options["seed"])
+        devices = [
+            uuid.UUID(int=rng.getrandbits(128)) for _ in range(options["devices"])
+        ]
+        rules = self._rules(rng, devices, options["rules"])
+        count = options["readings"]
+        device_ids = [rng.choice(devices) for _ in range(count)]
+        values = [
+            float(rng.randint(0, 100)) + rng.choice((0.0, 0.5)) for _ in range(count)
+        ]
+
+        by_device = {}
+        for rule in rules:
+            by_device.setdefault(rule.device_id, []).append(rule)
+        self.stdout.write(
+            f"{count:,} readings, {len(rules):,} rules over {len(devices):,} devices\n"
+        )
+        self.stdout.write(
+            f"{'strategy':<12}{'seconds':>10}{'readings/s':>16}{'matches':>12}"
+        )
+
+        began = time.perf_counter()
+        matches = 0
+        for device_id, value in zip(device_ids, values):
+            for rule in by_device.get(device_id, ()):
+                if PYTHON_OPERATORS[rule.operator](value, rule.threshold):
+                    matches += 1
+        self._report("scan", time.perf_counter() - began, count, matches)
+
+        began = time.perf_counter()
+        index = {
+            device_id: DeviceRules(group) for device_id, group in by_device.items()
+        }
+        empty = DeviceRules()
+        matches = sum(
+            len(index.get(device_id, empty).match(value))
+            for device_id, value in zip(device_ids, values)
+        )
+        self._report("bisect", time.perf_counter() - began, count, matches)
+
+        began = time.perf_counter()
+        snapshot = RuleSnapshot(rules)
+        values = np.array(values)
+        timestamps = np.arange(count)
+        matches = 0
+        for start in range(0, count, options["batch_size"]):
+            stop = start + options["batch_size"]
+            matches += len(
+                snapshot.evaluate(
+                    device_ids[start:stop], values[start:stop], timestamps[start:stop]
+                ).rule
+            )
+        self._report("vectorized", time.perf_counter() - began, count, matches)
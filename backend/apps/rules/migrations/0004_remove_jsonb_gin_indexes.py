@@ -0,0 +1,17 @@
+# Generated by Django 5.2.10 on 2026-10-18 00:58
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rules", "0003_remove_rule_cooldown_minutes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="rule",
+            name="idx_rule_action_config_gin",
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.10 on 2026-10-18 01:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rules", "0004_remove_jsonb_gin_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RuleWindowState",
+            fields=[
+                (
+                    "rule",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="window_state",
+                        serialize=False,
+                        to="rules.rule",
+                    ),
+                ),
+                ("state", models.JSONField()),
+                ("updated_at", models.DateTimeField()),
+            ],
+            options={
+                "db_table": "rule_window_states",
+            },
+        ),
+        migrations.AddField(
+            model_name="rule",
+            name="window_kind",
+            field=models.CharField(
+                choices=[
+                    ("point", "Each reading"),
+                    ("sustained", "Value sustained for the window"),
+                    ("average", "Rolling average over the window"),
+                    ("rate", "Rate of change per second over the window"),
+                ],
+                default="point",
+                max_length=10,
+            ),
+        ),
+        migrations.AddField(
+            model_name="rule",
+            name="window_seconds",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Window length of sustained, average and rate rules",
+                null=True,
+            ),
+        ),
+    ]
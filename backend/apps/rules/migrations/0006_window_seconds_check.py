@@ -0,0 +1,35 @@
+# Generated by Django 5.2.10 on 2026-10-18 01:40
+
+from django.db import migrations, models
+
+# Rules saved without validation would divide by zero or fire on every
+# reading; evaluate them per reading as before windows existed
+RESET_INVALID_WINDOWS = """
+UPDATE rules SET window_kind = 'point'
+WHERE window_kind <> 'point' AND (window_seconds IS NULL OR window_seconds <= 0);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("devices", "0001_initial"),
+        ("rules", "0005_rule_windows"),
+    ]
+
+    operations = [
+        migrations.RunSQL(RESET_INVALID_WINDOWS, reverse_sql=migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name="rule",
+            constraint=models.CheckConstraint(
+                condition=models.Q(
+                    models.Q(("window_kind", "point")),
+                    models.Q(
+                        ("window_seconds__gt", 0), ("window_seconds__isnull", False)
+                    ),
+                    _connector="OR",
+                ),
+                name="rule_window_seconds_positive",
+            ),
+        ),
+    ]
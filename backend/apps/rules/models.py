@@ -1,7 +1,6 @@
 import uuid
 
 from django.db import models
-from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ValidationError
 
 from apps.devices.models import Device
@@ -46,12 +45,26 @@ class Rule(models.Model):
         EQ = "eq", "Equal (=)"
         NEQ = "neq", "Not Equal (!=)"
 
+    class WindowKind(models.TextChoices):
+        POINT = "point", "Each reading"
+        SUSTAINED = "sustained", "Value sustained for the window"
+        AVERAGE = "average", "Rolling average over the window"
+        RATE = "rate", "Rate of change per second over the window"
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     device = models.ForeignKey(Device, on_delete=models.CASCADE, related_name="rules")
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
     comparison_operator = models.CharField(max_length=10, choices=RuleOperator.choices)
     threshold = models.DecimalField(max_digits=15, decimal_places=4)
+    window_kind = models.CharField(
+        max_length=10, choices=WindowKind.choices, default=WindowKind.POINT
+    )
+    window_seconds = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Window length of sustained, average and rate rules",
+    )
     action_config = models.JSONField(
         validators=[validate_action_config],
         help_text=(
@@ -73,8 +86,43 @@ class Rule(models.Model):
             ),
             models.Index(fields=["is_enabled"], name="idx_rule_is_enabled"),
             models.Index(fields=["last_triggered_at"], name="idx_rule_last_triggered"),
-            GinIndex(fields=["action_config"], name="idx_rule_action_config_gin"),
         ]
+        constraints = [
+            # A NULL comparison would pass the check, so test for it explicitly
+            models.CheckConstraint(
+                condition=models.Q(
+                    models.Q(window_kind="point"),
+                    models.Q(window_seconds__isnull=False, window_seconds__gt=0),
+                    _connector=models.Q.OR,
+                ),
+                name="rule_window_seconds_positive",
+            ),
+        ]
+
+    def clean(self):
+        """Validate that windowed rules have a window length."""
+        super().clean()
+        windowed = self.window_kind != self.WindowKind.POINT
+        if windowed and not self.window_seconds:
+            raise ValidationError(
+                {"window_seconds": "Windowed rules need a window length"}
+            )
 
     def __str__(self):
         return f"{self.name} - {self.device.name}"
+
+
+class RuleWindowState(models.Model):
+    """Periodic snapshot of a windowed rule's in-memory state."""
+
+    rule = models.OneToOneField(
+        Rule, on_delete=models.CASCADE, primary_key=True, related_name="window_state"
+    )
+    state = models.JSONField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "rule_window_states"
+
+    def __str__(self):
+        return f"Window state of {self.rule_id} at {self.updated_at}"
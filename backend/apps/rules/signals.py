@@ -0,0 +1,41 @@
+import uuid
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.core import invalidation
+
+from .engine import get_rule_index, invalidate_rules
+from .models import Rule
+
+
+@receiver(pre_save, sender=Rule)
+def remember_previous_device(sender, instance, **kwargs):
+    """Keep the stored device so a rule moved to another device is evicted."""
+    instance._previous_device_id = None
+    if instance.pk and not instance._state.adding:
+        instance._previous_device_id = (
+            Rule.objects.filter(pk=instance.pk)
+            .values_list("device_id", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Rule)
+@receiver(post_delete, sender=Rule)
+def invalidate_rule(sender, instance, **kwargs):
+    """Rebuild the rule index entries of the rule's device."""
+    invalidate_rules(
+        [instance.device_id, getattr(instance, "_previous_device_id", None)]
+    )
+
+
+def _invalidate_notified(device_ids):
+    index = get_rule_index()
+    if device_ids is None:
+        index.clear()
+    else:
+        index.invalidate([uuid.UUID(device_id) for device_id in device_ids])
+
+
+invalidation.register("rules", _invalidate_notified)
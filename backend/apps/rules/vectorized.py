@@ -0,0 +1,124 @@
+"""Columnar snapshot of enabled rules for matching whole batches of readings.
+
+``RuleSnapshot`` keeps every enabled rule in one array of integer keys
+sorted by (device, operator, threshold), the threshold replaced by its rank
+among all distinct thresholds. For a reading, the rules of each
+(device, operator) group with a threshold below, equal to or above its value
+are then contiguous ranges of that array, found with ``np.searchsorted`` for
+all readings and all six operators at once. The ranges are expanded into
+``(rule, reading)`` index pairs without a Python loop.
+
+The same matches as ``DeviceRules.match`` are returned, for a batch at a
+time.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from .models import Rule
+
+OPERATORS = tuple(Rule.RuleOperator.values)
+
+
+class BatchMatches(NamedTuple):
+    # Indices into ``RuleSnapshot.rules`` and into the batch, pairwise
+    rule: np.ndarray
+    reading: np.ndarray
+
+
+class RuleSnapshot:
+    """Immutable columnar view of ``CompiledRule`` objects."""
+
+    def __init__(self, rules):
+        rules = list(rules)
+        self.device_codes = {}
+        for rule in rules:
+            self.device_codes.setdefault(rule.device_id, len(self.device_codes))
+        operator_codes = {operator: code for code, operator in enumerate(OPERATORS)}
+
+        devices = np.fromiter(
+            (self.device_codes[rule.device_id] for rule in rules), np.int64, len(rules)
+        )
+        operators = np.fromiter(
+            (operator_codes[rule.operator] for rule in rules), np.int64, len(rules)
+        )
+        groups = devices * len(OPERATORS) + operators
+        thresholds = np.fromiter(
+            (rule.threshold for rule in rules), np.float64, len(rules)
+        )
+        self._levels = np.unique(thresholds)
+        # Group g's keys are g * stride + threshold rank, below (g + 1) * stride
+        self._stride = len(self._levels) + 1
+        keys = groups * self._stride + np.searchsorted(self._levels, thresholds)
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self.rules = [rules[index] for index in order]
+
+    def __len__(self):
+        return len(self.rules)
+
+    def evaluate(self, device_ids, values, timestamps=None):
+        """Match a batch of readings against every rule of their devices.
+
+        ``device_ids`` and ``values`` are sequences of equal length,
+        ``timestamps`` an optional array of ``datetime64`` or epoch seconds.
+        Matches are grouped by reading, ordered by timestamp (batch order
+        without ``timestamps``). NaN values and devices without rules match
+        nothing.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        codes = np.fromiter(
+            (self.device_codes.get(device_id, -1) for device_id in device_ids),
+            np.int64,
+            len(values),
+        )
+        readings = np.flatnonzero((codes >= 0) & ~np.isnan(values))
+        if timestamps is not None:
+            times = np.asarray(timestamps)[readings]
+            readings = readings[np.argsort(times, kind="stable")]
+        values = values[readings]
+
+        # One row per reading, one column per operator
+        base = (codes[readings] * len(OPERATORS))[:, None] + np.arange(len(OPERATORS))
+        base *= self._stride
+        start = np.searchsorted(self._keys, base)
+        stop = np.searchsorted(self._keys, base + self._stride)
+        # Thresholds below the value, and up to and including it
+        low = np.searchsorted(
+            self._keys, base + np.searchsorted(self._levels, values)[:, None]
+        )
+        high = np.searchsorted(
+            self._keys,
+            base + np.searchsorted(self._levels, values, side="right")[:, None],
+        )
+
+        ranges = {
+            "gt": [(start, low)],
+            "gte": [(start, high)],
+            "lt": [(high, stop)],
+            "lte": [(low, stop)],
+            "eq": [(low, high)],
+            "neq": [(start, low), (high, stop)],
+        }
+        starts, stops = [], []
+        for column, operator in enumerate(OPERATORS):
+            for range_start, range_stop in ranges[operator]:
+                starts.append(range_start[:, column])
+                stops.append(range_stop[:, column])
+        # Row-major, so a reading's ranges are adjacent and the expanded
+        # matches come out in reading order without sorting them
+        starts = np.stack(starts, axis=1)
+        return _expand(
+            starts.ravel(),
+            np.stack(stops, axis=1).ravel(),
+            np.repeat(readings, starts.shape[1]),
+        )
+
+
+def _expand(starts, stops, readings):
+    """Turn ``[start, stop)`` rule ranges into one index pair per rule."""
+    lengths = np.maximum(stops - starts, 0)
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    rule = np.repeat(starts, lengths) + np.arange(lengths.sum()) - offsets
+    return BatchMatches(rule, np.repeat(readings, lengths))
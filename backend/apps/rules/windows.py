@@ -0,0 +1,275 @@
+"""Incremental state of windowed rules (sustained, rolling average, rate).
+
+A windowed rule compares a value derived from the readings of the last
+``window_seconds`` with its threshold, instead of each reading alone:
+
+- ``sustained``: the reading value, matched once the condition has held for
+  every reading of the last window.
+- ``average``: the mean of the readings in the window, once readings span a
+  whole window.
+- ``rate``: the change per second from the newest reading at or before the
+  window start to the current one.
+
+Each rule keeps a ``WindowState`` in memory: a ring buffer of
+``(timestamp, value)`` samples and their running sum, or only the start of
+the current run for ``sustained``. A reading appends one sample and evicts
+the ones that left the window, so evaluation is amortized O(1) and never
+queries ``telemetry``. Readings older than the newest one seen by a rule are
+skipped for it, and a ring buffer holds at most ``RULE_WINDOW_MAX_SAMPLES``,
+dropping the oldest samples beyond that.
+
+``WindowStore`` writes the states that changed to ``rule_window_states``
+every ``RULE_WINDOW_SNAPSHOT_SECONDS`` from a background thread, and loads
+them back when a rule is first evaluated after a restart. A state is reset
+when its rule's kind, operator or threshold changed since the snapshot.
+State is per process, so all readings of a device have to be evaluated by
+the same process for windowed rules to see every reading.
+"""
+
+import atexit
+import json
+import logging
+import math
+import operator
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, connection
+
+from apps.core.flusher import PeriodicFlusher
+from config.metrics import RULE_WINDOW_SNAPSHOT_RULES
+
+from .models import Rule, RuleWindowState
+
+logger = logging.getLogger(__name__)
+
+Kind = Rule.WindowKind
+
+COMPARE = {
+    Rule.RuleOperator.GT: operator.gt,
+    Rule.RuleOperator.GTE: operator.ge,
+    Rule.RuleOperator.LT: operator.lt,
+    Rule.RuleOperator.LTE: operator.le,
+    Rule.RuleOperator.EQ: operator.eq,
+    Rule.RuleOperator.NEQ: operator.ne,
+}
+
+# Skips states of rules deleted since they were evaluated
+UPSERT_SQL = (
+    f"INSERT INTO {RuleWindowState._meta.db_table} (rule_id, state, updated_at) "
+    "SELECT v.rule_id, v.state, now() "
+    "FROM unnest(%s::uuid[], %s::jsonb[]) AS v(rule_id, state) "
+    f"JOIN {Rule._meta.db_table} AS r ON r.id = v.rule_id "
+    "ON CONFLICT (rule_id) DO UPDATE "
+    "SET state = EXCLUDED.state, updated_at = EXCLUDED.updated_at"
+)
+
+
+def _signature(rule):
+    return [rule.window_kind, rule.operator, rule.threshold]
+
+
+class WindowState:
+    """Samples of one windowed rule, with their running sum."""
+
+    __slots__ = ("signature", "start", "last", "since", "samples", "total")
+
+    def __init__(self, signature, start=None, last=None, since=None, samples=()):
+        self.signature = signature
+        # First and newest reading seen, and start of the current sustained run
+        self.start = start
+        self.last = last
+        self.since = since
+        self.samples = deque(tuple(sample) for sample in samples)
+        self.total = math.fsum(value for _, value in self.samples)
+
+    def update(self, rule, timestamp, value, max_samples):
+        """Add a reading and return whether the rule's condition holds."""
+        if value is None or math.isnan(value):
+            return False
+        # Rules saved without validation; the database rejects them now
+        if (rule.window_seconds or 0) <= 0:
+            return False
+        if self.last is not None and timestamp < self.last:
+            return False
+        if self.start is None:
+            self.start = timestamp
+        self.last = timestamp
+        compare = COMPARE[rule.operator]
+
+        if rule.window_kind == Kind.SUSTAINED:
+            if not compare(value, rule.threshold):
+                self.since = None
+                return False
+            if self.since is None:
+                self.since = timestamp
+            return timestamp - self.since >= rule.window_seconds
+
+        self.samples.append((timestamp, value))
+        self.total += value
+        cutoff = timestamp - rule.window_seconds
+        if rule.window_kind == Kind.AVERAGE:
+            while self.samples[0][0] <= cutoff:
+                self._pop()
+        else:
+            # Keep the newest sample at or before the window start
+            while len(self.samples) > 1 and self.samples[1][0] <= cutoff:
+                self._pop()
+        while len(self.samples) > max_samples:
+            self._pop()
+
+        if rule.window_kind == Kind.AVERAGE:
+            if timestamp - self.start < rule.window_seconds:
+                return False
+            return compare(self.total / len(self.samples), rule.threshold)
+
+        first_timestamp, first_value = self.samples[0]
+        if first_timestamp > cutoff:
+            return False
+        rate = (value - first_value) / (timestamp - first_timestamp)
+        return compare(rate, rule.threshold)
+
+    def _pop(self):
+        self.total -= self.samples.popleft()[1]
+
+    def to_json(self):
+        return json.dumps(
+            {
+                "signature": self.signature,
+                "start": self.start,
+                "last": self.last,
+                "since": self.since,
+                "samples": list(self.samples),
+            },
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            data["signature"],
+            data["start"],
+            data["last"],
+            data["since"],
+            data["samples"],
+        )
+
+
+def load_states(rule_ids):
+    """Load snapshots as ``{rule_id: state dict}`` with one query."""
+    rows = RuleWindowState.objects.filter(rule_id__in=rule_ids).values_list(
+        "rule_id", "state"
+    )
+    return dict(rows)
+
+
+def write_states(snapshots):
+    """Upsert ``{rule_id: state JSON}`` with a single statement."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            UPSERT_SQL,
+            [[str(rule_id) for rule_id in snapshots], list(snapshots.values())],
+        )
+
+
+class WindowStore(PeriodicFlusher):
+    """Window states by rule, snapshotted by a background thread."""
+
+    thread_name = "rule-windows"
+
+    def __init__(
+        self,
+        loader=load_states,
+        writer=write_states,
+        flush_interval=30,
+        max_samples=4096,
+    ):
+        super().__init__(flush_interval)
+        self.loader = loader
+        self.writer = writer
+        self.max_samples = max_samples
+        self._states = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._states)
+
+    def prepare(self, rules):
+        """Load the snapshots of rules not evaluated yet, all at once."""
+        with self._lock:
+            misses = {rule.id: rule for rule in rules if rule.id not in self._states}
+        if not misses:
+            return
+        loaded = self.loader(list(misses))
+        with self._lock:
+            for rule_id, rule in misses.items():
+                data = loaded.get(rule_id)
+                if data is not None and data["signature"] == _signature(rule):
+                    self._states.setdefault(rule_id, WindowState.from_json(data))
+
+    def update(self, rule, timestamp, value):
+        """Feed one reading to ``rule`` and return whether it matched.
+
+        ``timestamp`` is a ``datetime``; call ``prepare`` first to resume
+        from a snapshot.
+        """
+        signature = _signature(rule)
+        with self._lock:
+            state = self._states.get(rule.id)
+            if state is None or state.signature != signature:
+                state = self._states[rule.id] = WindowState(signature)
+            self._dirty.add(rule.id)
+            return state.update(rule, timestamp.timestamp(), value, self.max_samples)
+
+    def flush(self, reason="manual"):
+        """Snapshot the states changed since the last flush, return how many."""
+        with self._flush_lock:
+            with self._lock:
+                dirty, self._dirty = self._dirty, set()
+                snapshots = {
+                    rule_id: self._states[rule_id].to_json()
+                    for rule_id in dirty
+                    if rule_id in self._states
+                }
+            if not snapshots:
+                return 0
+
+            try:
+                self.writer(snapshots)
+            except (OperationalError, InterfaceError):
+                logger.exception(
+                    "rules.window_snapshot_failed", extra={"rules": len(snapshots)}
+                )
+                with self._lock:
+                    self._dirty |= snapshots.keys()
+                return 0
+
+            RULE_WINDOW_SNAPSHOT_RULES.observe(len(snapshots))
+            return len(snapshots)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_window_store():
+    """Return the process-wide store, starting its snapshot thread on first use."""
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = WindowStore(
+                    flush_interval=getattr(
+                        settings, "RULE_WINDOW_SNAPSHOT_SECONDS", 30
+                    ),
+                    max_samples=getattr(settings, "RULE_WINDOW_MAX_SAMPLES", 4096),
+                )
+                store.start()
+                atexit.register(store.close)
+                _store = store
+    return _store
@@ -1,39 +1,38 @@
-import csv
-import json
-
 from django.contrib import admin
-from django.http import HttpResponse
 
+from apps.core.admin import ReplicaChangeListMixin
+
+from .export import stream_export
 from .models import Telemetry
 
 
 @admin.action(description="Export selected telemetry to CSV")
 def export_to_csv(modeladmin, request, queryset):
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = 'attachment; filename="telemetry_export.csv"'
+    return stream_export(queryset, "csv")
+
 
-    writer = csv.writer(response)
-    writer.writerow(["ID", "Device", "Device Serial", "Timestamp", "Payload"])
+@admin.action(description="Export selected telemetry to NDJSON")
+def export_to_ndjson(modeladmin, request, queryset):
+    return stream_export(queryset, "ndjson")
 
-    for telemetry in queryset.select_related("device"):
-        writer.writerow(
-            [
-                telemetry.id,
-                telemetry.device.name,
-                telemetry.device.serial_number,
-                telemetry.timestamp.isoformat(),
-                json.dumps(telemetry.payload),
-            ]
-        )
 
-    return response
+@admin.action(description="Export selected telemetry to Parquet")
+def export_to_parquet(modeladmin, request, queryset):
+    return stream_export(queryset, "parquet")
 
 
 @admin.register(Telemetry)
-class TelemetryAdmin(admin.ModelAdmin):
-    list_display = ["id", "device", "timestamp"]
+class TelemetryAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
+    list_display = ["id", "device", "timestamp", "metric", "value"]
     list_filter = ["device", "timestamp"]
     search_fields = ["device__name", "device__serial_number"]
-    readonly_fields = ["id", "timestamp", "payload"]
+    readonly_fields = [
+        "id",
+        "timestamp",
+        "payload",
+        "value",
+        "metric",
+        "schema_version",
+    ]
     date_hierarchy = "timestamp"
-    actions = [export_to_csv]
+    actions = [export_to_csv, export_to_ndjson, export_to_parquet]
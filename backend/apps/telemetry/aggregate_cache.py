@@ -0,0 +1,297 @@
+"""Redis cache of per-device aggregate query results.
+
+Dashboards ask for the same ``(device, resolution, window)`` buckets over
+and over. Results are cached under the bucket-aligned window:
+
+* windows that end in the past are kept until evicted, windows reaching
+  past now expire after ``TELEMETRY_AGG_CACHE_LIVE_TTL_SECONDS``;
+* each device has a write generation, bumped by ``note_written`` after the
+  ingest pipeline commits rows for it, together with the earliest
+  timestamp written. An entry of an older generation keeps its buckets
+  before that timestamp and only the buckets from there on (normally just
+  the trailing one) are recomputed;
+* ``TELEMETRY_AGG_CACHE_MAX_BYTES`` caps the entries' total size, least
+  recently used entries are evicted first. The cap is kept here rather than
+  with Redis ``maxmemory`` so the cache can share an instance with data that
+  must not be evicted.
+
+Rows written outside the ingest pipeline do not bump the generation; live
+windows pick them up when they expire.
+"""
+
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+import redis
+from django.conf import settings
+from django.utils import timezone
+
+from config.db_router import pin_primary
+from config.metrics import TELEMETRY_AGG_CACHE_LOOKUPS_TOTAL
+
+from .rollups import align, choose_rollup, fetch_buckets
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "iot:telemetry:agg:"
+LRU_KEY = KEY_PREFIX + "lru"
+SIZES_KEY = KEY_PREFIX + "sizes"
+BYTES_KEY = KEY_PREFIX + "bytes"
+
+# Writes remembered per device; an entry more generations behind is rebuilt
+WRITE_HISTORY = 64
+EVICT_BATCH = 100
+
+_FIELDS = ("min", "max", "avg", "count", "last")
+
+# Entry, size and byte total change together. A separate read of the old
+# size would race with concurrent stores and evictions and let the total
+# drift from the entries actually held.
+STORE_SCRIPT = """
+local previous = tonumber(redis.call('HGET', KEYS[2], KEYS[1]) or 0)
+if ARGV[2] == '' then
+    redis.call('SET', KEYS[1], ARGV[1])
+else
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+end
+redis.call('HSET', KEYS[2], KEYS[1], #ARGV[1])
+redis.call('ZADD', KEYS[4], ARGV[3], KEYS[1])
+return redis.call('INCRBY', KEYS[3], #ARGV[1] - previous)
+"""
+
+# Removes entries oldest first until the total fits the cap; an entry
+# already evicted by another process has no size left to subtract
+EVICT_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local used = tonumber(redis.call('GET', KEYS[3]) or 0)
+local freed, removed = 0, 0
+for i = 4, #KEYS do
+    if used - freed <= limit then
+        break
+    end
+    local size = redis.call('HGET', KEYS[1], KEYS[i])
+    if size then
+        freed = freed + tonumber(size)
+    end
+    redis.call('DEL', KEYS[i])
+    redis.call('HDEL', KEYS[1], KEYS[i])
+    redis.call('ZREM', KEYS[2], KEYS[i])
+    removed = removed + 1
+end
+return {redis.call('INCRBY', KEYS[3], -freed), removed, freed}
+"""
+
+
+def _epoch(moment):
+    return int(moment.timestamp())
+
+
+def _from_epoch(seconds):
+    return datetime.fromtimestamp(seconds, dt_timezone.utc)
+
+
+class AggregateCache:
+    def __init__(self, redis_client, live_ttl=60, max_bytes=64 * 2**20):
+        self.redis = redis_client
+        self.live_ttl = live_ttl
+        self.max_bytes = max_bytes
+        self._store_script = redis_client.register_script(STORE_SCRIPT)
+        self._evict_script = redis_client.register_script(EVICT_SCRIPT)
+
+    def entry_key(self, rollup, device_id, start, end):
+        return f"{KEY_PREFIX}{device_id}:{rollup.name}:{_epoch(start)}:{_epoch(end)}"
+
+    def get(self, rollup, device_id, start, end, compute):
+        """Buckets of ``rollup`` in the aligned window ``[start, end)``.
+
+        ``compute(start, end)`` returns the buckets of a sub-window from the
+        database.
+        """
+        key = self.entry_key(rollup, device_id, start, end)
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                pipe.get(key)
+                pipe.get(f"{KEY_PREFIX}gen:{device_id}")
+                raw, generation = pipe.execute()
+            generation = int(generation or 0)
+            entry = json.loads(raw) if raw else None
+            dirty_from = end
+            if entry is not None and entry["gen"] != generation:
+                dirty_from = self._dirty_from(device_id, entry["gen"], generation)
+                if dirty_from is None:
+                    entry = None
+                else:
+                    dirty_from = max(start, align(dirty_from, rollup.bucket))
+        except redis.RedisError as exc:
+            logger.warning("telemetry.agg_cache_failed", extra={"error": str(exc)})
+            return compute(start, end)
+
+        if entry is not None and dirty_from >= end:
+            self._touch(key)
+            TELEMETRY_AGG_CACHE_LOOKUPS_TOTAL.labels(result="hit").inc()
+            return self._decode(entry["buckets"])
+
+        # A replica may not have replayed the write that bumped the generation
+        # yet, and what is read here may stay cached for good
+        pin_primary()
+        if entry is not None:
+            kept = [
+                bucket
+                for bucket in self._decode(entry["buckets"])
+                if bucket["bucket"] < dirty_from
+            ]
+            buckets = kept + compute(dirty_from, end)
+            result = "partial"
+        else:
+            buckets = compute(start, end)
+            result = "miss"
+        TELEMETRY_AGG_CACHE_LOOKUPS_TOTAL.labels(result=result).inc()
+
+        try:
+            self._store(key, generation, buckets, live=end > timezone.now())
+        except redis.RedisError as exc:
+            logger.warning("telemetry.agg_cache_failed", extra={"error": str(exc)})
+        return buckets
+
+    def note_written(self, rows):
+        """Bump the generation of every device in ``rows``."""
+        earliest = {}
+        for row in rows:
+            current = earliest.get(row.device_id)
+            if current is None or row.timestamp < current:
+                earliest[row.device_id] = row.timestamp
+        if not earliest:
+            return
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                for device_id in earliest:
+                    pipe.incr(f"{KEY_PREFIX}gen:{device_id}")
+                generations = pipe.execute()
+            with self.redis.pipeline(transaction=False) as pipe:
+                for (device_id, timestamp), generation in zip(
+                    earliest.items(), generations
+                ):
+                    writes_key = f"{KEY_PREFIX}writes:{device_id}"
+                    pipe.zadd(
+                        writes_key, {f"{generation}:{_epoch(timestamp)}": generation}
+                    )
+                    pipe.zremrangebyrank(writes_key, 0, -WRITE_HISTORY - 1)
+                pipe.execute()
+        except redis.RedisError as exc:
+            # Live entries still expire; past windows rarely receive late rows
+            logger.warning(
+                "telemetry.agg_cache_invalidate_failed", extra={"error": str(exc)}
+            )
+
+    def _dirty_from(self, device_id, cached, generation):
+        """Earliest timestamp written after generation ``cached``.
+
+        ``None`` when some of those writes are no longer remembered.
+        """
+        writes = self.redis.zrangebyscore(
+            f"{KEY_PREFIX}writes:{device_id}", cached + 1, generation
+        )
+        if not writes or len(writes) != generation - cached:
+            return None
+        return _from_epoch(min(int(write.split(b":")[1]) for write in writes))
+
+    def _touch(self, key):
+        try:
+            self.redis.zadd(LRU_KEY, {key: time.time()})
+        except redis.RedisError as exc:
+            logger.warning("telemetry.agg_cache_failed", extra={"error": str(exc)})
+
+    def _store(self, key, generation, buckets, live):
+        data = json.dumps(
+            {"gen": generation, "buckets": self._encode(buckets)},
+            separators=(",", ":"),
+        ).encode()
+        if len(data) > self.max_bytes:
+            return
+        used = self._store_script(
+            keys=[key, SIZES_KEY, BYTES_KEY, LRU_KEY],
+            args=[data, self.live_ttl if live else "", time.time()],
+        )
+        if used > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        # Expired live entries still count until they are evicted here
+        while True:
+            candidates = self.redis.zrange(LRU_KEY, 0, EVICT_BATCH - 1)
+            if not candidates:
+                break
+            used, removed, freed = self._evict_script(
+                keys=[SIZES_KEY, LRU_KEY, BYTES_KEY, *candidates],
+                args=[self.max_bytes],
+            )
+            if removed:
+                logger.info(
+                    "telemetry.agg_cache_evicted",
+                    extra={"entries": removed, "bytes": freed},
+                )
+            if used <= self.max_bytes:
+                break
+
+    @staticmethod
+    def _encode(buckets):
+        return [
+            [_epoch(bucket["bucket"]), *(bucket[field] for field in _FIELDS)]
+            for bucket in buckets
+        ]
+
+    @staticmethod
+    def _decode(rows):
+        return [
+            {"bucket": _from_epoch(row[0]), **dict(zip(_FIELDS, row[1:]))}
+            for row in rows
+        ]
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_aggregate_cache():
+    """Return the process-wide cache, ``None`` when not configured."""
+    global _cache
+
+    redis_url = getattr(settings, "TELEMETRY_AGG_CACHE_REDIS_URL", "")
+    if redis_url and _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AggregateCache(
+                    redis.Redis.from_url(redis_url, socket_timeout=0.5),
+                    live_ttl=getattr(
+                        settings, "TELEMETRY_AGG_CACHE_LIVE_TTL_SECONDS", 60
+                    ),
+                    max_bytes=getattr(
+                        settings, "TELEMETRY_AGG_CACHE_MAX_BYTES", 64 * 2**20
+                    ),
+                )
+    return _cache if redis_url else None
+
+
+def note_written(rows):
+    """Invalidate cached aggregates overlapping newly written ``rows``."""
+    cache = get_aggregate_cache()
+    if cache is not None and rows:
+        cache.note_written(rows)
+
+
+def query_aggregates(device_id, start, end, max_points):
+    """``rollups.query_rollups`` served through the cache when configured."""
+    rollup = choose_rollup(start, end, max_points)
+    start = align(start, rollup.bucket)
+    end = align(end, rollup.bucket, up=True)
+
+    def compute(window_start, window_end):
+        return fetch_buckets(rollup, device_id, window_start, window_end)
+
+    cache = get_aggregate_cache()
+    if cache is None:
+        return rollup, compute(start, end)
+    return rollup, cache.get(rollup, device_id, start, end, compute)
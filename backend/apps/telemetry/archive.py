@@ -0,0 +1,415 @@
+"""Parquet cold storage for telemetry that is about to expire.
+
+Before retention drops old chunks, ``archive_expiring`` writes every UTC day
+that falls out of the hot table within ``TELEMETRY_ARCHIVE_LEAD_DAYS`` to
+Parquet files under ``TELEMETRY_ARCHIVE_DIR``, Hive-partitioned as::
+
+    day=2026-01-31/device_type=<uuid>/part-0.parquet
+
+Rows are sorted by device and time inside each file, so row-group
+statistics let readers skip data for other devices. A day is written to a
+temporary directory and renamed into place when complete.
+
+Devices may send readings with an old ``ts``, so rows can still arrive for
+a day after it was archived. Each run compares an archived day's row count
+and highest id, read from the Parquet footers, with the table. Rows missing
+from the archive are appended as another ``part-<n>.parquet`` per device
+type; archived files are never rewritten, so rows already dropped from the
+table stay archived.
+
+With archiving enabled the retention policy is not installed;
+``drop_archived`` drops expired chunks after they were archived instead, and
+refuses while an expired day has rows missing from its archive.
+
+``archive_batches`` reads archived ranges back with partition pruning and
+predicate pushdown, in the batch format used by ``export.py``.
+"""
+
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from apps.devices.models import Device
+
+from .export import EXPORT_BATCH_ROWS, EXPORT_CHUNK_SIZE, EXPORT_FIELDS
+from .models import Telemetry
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SCHEMA = pa.schema(
+    [
+        ("id", pa.int64()),
+        ("device_id", pa.string()),
+        ("device", pa.string()),
+        ("serial_number", pa.string()),
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("payload", pa.string()),
+        ("value", pa.float64()),
+        ("metric", pa.string()),
+        ("schema_version", pa.string()),
+    ]
+)
+
+ARCHIVE_ROW_GROUP_ROWS = 100000
+
+PARTITION_SCHEMA = pa.schema([("day", pa.string()), ("device_type", pa.string())])
+PARTITIONING = ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+
+# Ordered by device type first so one Parquet writer is open at a time
+DAY_SQL = f"""
+    SELECT d.device_type_id::text, t.id, t.device_id::text, d.name,
+           d.serial_number, t.timestamp, t.payload::text, t.value, t.metric,
+           t.schema_version
+    FROM {Telemetry._meta.db_table} AS t
+    JOIN {Device._meta.db_table} AS d ON d.id = t.device_id
+    WHERE t.timestamp >= %s AND t.timestamp < %s
+    ORDER BY d.device_type_id, t.device_id, t.timestamp
+"""
+
+
+# Rows of a day, and how many were written after the archive's newest row
+CHANGES_SQL = f"""
+    SELECT count(*), count(*) FILTER (WHERE id > %s)
+    FROM {Telemetry._meta.db_table}
+    WHERE timestamp >= %s AND timestamp < %s
+"""
+
+
+def archive_root():
+    return Path(getattr(settings, "TELEMETRY_ARCHIVE_DIR", "telemetry-archive"))
+
+
+def day_path(root, day):
+    return root / f"day={day.isoformat()}"
+
+
+def day_bounds(day):
+    start = datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+class _DayWriter:
+    """One Parquet file per device type, written in large row groups.
+
+    Files are written under a hidden name and renamed into place when
+    complete, so readers of a day already archived never see partial files.
+    """
+
+    def __init__(self, directory, part="part-0.parquet"):
+        self.directory = directory
+        self.part = part
+        self.device_type = None
+        self._writer = None
+        self._path = None
+        self._pending = []
+        self._pending_rows = 0
+
+    def write(self, device_type, table):
+        if device_type != self.device_type:
+            self.close()
+            directory = self.directory / f"device_type={device_type}"
+            directory.mkdir(exist_ok=True)
+            self._path = directory / self.part
+            self._writer = pq.ParquetWriter(
+                self._temporary(), ARCHIVE_SCHEMA, compression="zstd"
+            )
+            self.device_type = device_type
+        # Cursor chunks are small; buffer them as Arrow data, not Python rows
+        self._pending.append(table)
+        self._pending_rows += table.num_rows
+        if self._pending_rows >= ARCHIVE_ROW_GROUP_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if self._pending:
+            self._writer.write_table(
+                pa.concat_tables(self._pending), ARCHIVE_ROW_GROUP_ROWS
+            )
+            self._pending, self._pending_rows = [], 0
+
+    def _temporary(self):
+        return self._path.with_name(f".{self._path.name}.tmp")
+
+    def close(self):
+        if self._writer is not None:
+            self._flush()
+            self._writer.close()
+            self._writer = None
+            os.replace(self._temporary(), self._path)
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._temporary().unlink(missing_ok=True)
+
+
+def _write_day(day, directory, part="part-0.parquet", skip_ids=None):
+    """Write the day's rows, except ids in ``skip_ids``; return the count."""
+    written = 0
+    writer = _DayWriter(directory, part)
+    try:
+        with connection.chunked_cursor() as cursor:
+            cursor.execute(DAY_SQL, day_bounds(day))
+            while rows := cursor.fetchmany(EXPORT_CHUNK_SIZE):
+                for device_type, group in _split_by_type(rows):
+                    table = _to_table(group)
+                    if skip_ids is not None:
+                        table = table.filter(
+                            pc.invert(pc.is_in(table["id"], value_set=skip_ids))
+                        )
+                    if table.num_rows:
+                        writer.write(device_type, table)
+                        written += table.num_rows
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    return written
+
+
+def _parts(target):
+    return sorted(target.glob("device_type=*/part-*.parquet"))
+
+
+def archived_summary(target):
+    """``(rows, highest id)`` of an archived day, from the Parquet footers."""
+    rows, highest = 0, 0
+    column = ARCHIVE_SCHEMA.get_field_index("id")
+    for path in _parts(target):
+        metadata = pq.read_metadata(path)
+        rows += metadata.num_rows
+        for index in range(metadata.num_row_groups):
+            statistics = metadata.row_group(index).column(column).statistics
+            if statistics is not None and statistics.has_min_max:
+                highest = max(highest, statistics.max)
+    return rows, highest
+
+
+def has_unarchived_rows(day, root=None):
+    """Whether the table holds rows of an archived ``day`` missing from it.
+
+    More rows in the table than in the archive, or any row newer than the
+    archive's highest id, means readings arrived after the day was archived.
+    """
+    rows, highest = archived_summary(day_path(root or archive_root(), day))
+    with connection.cursor() as cursor:
+        cursor.execute(CHANGES_SQL, [highest, *day_bounds(day)])
+        table_rows, newer = cursor.fetchone()
+    return table_rows > rows or newer > 0
+
+
+def _append_late_rows(day, target):
+    """Archive the day's rows missing from ``target`` as a new part file."""
+    parts = _parts(target)
+    ids = [pq.read_table(path, columns=["id"])["id"].combine_chunks() for path in parts]
+    archived_ids = pa.concat_arrays([pa.array([], type=pa.int64()), *ids])
+    numbers = [int(path.stem.split("-")[1]) for path in parts]
+    part = f"part-{max(numbers, default=-1) + 1}.parquet"
+    written = _write_day(day, target, part, skip_ids=archived_ids)
+    if not written:
+        return None
+    logger.info(
+        "telemetry.archived_late_rows",
+        extra={"day": day.isoformat(), "rows": written},
+    )
+    return written
+
+
+def archive_day(day, root=None):
+    """Write one UTC day to Parquet; return the rows written.
+
+    For a day already archived, only rows that arrived since are written;
+    ``None`` when there are none.
+    """
+    root = root or archive_root()
+    target = day_path(root, day)
+    if target.exists():
+        if not has_unarchived_rows(day, root):
+            return None
+        return _append_late_rows(day, target)
+    staging = root / f".{target.name}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+
+    try:
+        written = _write_day(day, staging)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    os.replace(staging, target)
+    logger.info(
+        "telemetry.archived_day", extra={"day": day.isoformat(), "rows": written}
+    )
+    return written
+
+
+def _split_by_type(rows):
+    """Yield ``(device_type_id, rows)`` runs; rows arrive sorted by type."""
+    start = 0
+    for index in range(1, len(rows) + 1):
+        if index == len(rows) or rows[index][0] != rows[start][0]:
+            yield rows[start][0], [row[1:] for row in rows[start:index]]
+            start = index
+
+
+def _to_table(rows):
+    columns = list(zip(*rows))
+    return pa.Table.from_arrays(
+        [
+            pa.array(column, type=field.type)
+            for column, field in zip(columns, ARCHIVE_SCHEMA)
+        ],
+        schema=ARCHIVE_SCHEMA,
+    )
+
+
+def expiry_cutoff(now=None):
+    """Rows older than this are dropped by retention."""
+    now = now or timezone.now()
+    return now - timedelta(days=getattr(settings, "TELEMETRY_RETENTION_DAYS", 90))
+
+
+def archive_expiring(now=None, root=None):
+    """Archive every day that expires within the lead time.
+
+    Returns ``[(day, rows)]`` for the days written, or added to, by this call.
+    """
+    lead = timedelta(days=getattr(settings, "TELEMETRY_ARCHIVE_LEAD_DAYS", 2))
+    # Only whole days, the day containing the horizon is archived next run
+    until = (expiry_cutoff(now) + lead).astimezone(dt_timezone.utc).date()
+    archived = []
+    day = oldest_day()
+    while day is not None and day < until:
+        rows = archive_day(day, root)
+        if rows is not None:
+            archived.append((day, rows))
+        day += timedelta(days=1)
+    return archived
+
+
+def oldest_day():
+    """UTC date of the oldest row in the hot table, ``None`` when empty."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT min(timestamp) FROM {Telemetry._meta.db_table}")
+        (oldest,) = cursor.fetchone()
+    return oldest.astimezone(dt_timezone.utc).date() if oldest else None
+
+
+def is_archived(until, root=None):
+    """Whether every day up to and including ``until``'s day is archived.
+
+    A day with rows missing from its archive counts as not archived.
+    """
+    root = root or archive_root()
+    day = oldest_day()
+    last = until.astimezone(dt_timezone.utc).date()
+    while day is not None and day <= last:
+        if not day_path(root, day).exists():
+            return False
+        if has_unarchived_rows(day, root):
+            logger.warning("telemetry.archive_stale", extra={"day": day.isoformat()})
+            return False
+        day += timedelta(days=1)
+    return True
+
+
+def drop_archived(now=None, root=None):
+    """Drop chunks past retention, but only once they are archived.
+
+    Returns the number of dropped chunks, or ``None`` when nothing was
+    dropped because TimescaleDB is missing or a day is not archived yet.
+    """
+    cutoff = expiry_cutoff(now)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'")
+        if cursor.fetchone() is None:
+            return None
+    if not is_archived(cutoff, root):
+        logger.warning(
+            "telemetry.archive_incomplete", extra={"cutoff": cutoff.isoformat()}
+        )
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT drop_chunks(%s::regclass, older_than => %s)",
+            [Telemetry._meta.db_table, cutoff],
+        )
+        return len(cursor.fetchall())
+
+
+def archive_filter(start, end, device_id=None):
+    """Dataset expression for ``[start, end)``, optionally for one device.
+
+    The ``day`` terms prune whole partitions; the others are pushed down to
+    Parquet row-group statistics.
+    """
+    timestamp_type = ARCHIVE_SCHEMA.field("timestamp").type
+    first_day = start.astimezone(dt_timezone.utc).date().isoformat()
+    last_day = end.astimezone(dt_timezone.utc).date().isoformat()
+    expression = (ds.field("day") >= first_day) & (ds.field("day") <= last_day)
+    expression &= ds.field("timestamp") >= pa.scalar(start, timestamp_type)
+    expression &= ds.field("timestamp") < pa.scalar(end, timestamp_type)
+    if device_id is not None:
+        expression &= ds.field("device_id") == str(device_id)
+    return expression
+
+
+def archive_dataset(root=None):
+    """The archive as a ``pyarrow.dataset``, ``None`` when nothing is archived."""
+    root = root or archive_root()
+    if not root.exists():
+        return None
+    return ds.dataset(
+        root,
+        schema=pa.unify_schemas([ARCHIVE_SCHEMA, PARTITION_SCHEMA]),
+        format="parquet",
+        partitioning=PARTITIONING,
+        # Days still being written live in hidden staging directories
+        ignore_prefixes=["."],
+    )
+
+
+def read_archive(start, end, device_id=None, columns=None, root=None):
+    """Return archived rows in ``[start, end)`` as a ``pyarrow.Table``."""
+    dataset = archive_dataset(root)
+    if dataset is None:
+        table = ARCHIVE_SCHEMA.empty_table()
+        return table.select(columns) if columns else table
+    return dataset.to_table(
+        columns=columns or ARCHIVE_SCHEMA.names,
+        filter=archive_filter(start, end, device_id),
+    )
+
+
+def archive_batches(start, end, device_id=None, root=None):
+    """Yield archived rows as lists of tuples in ``export.EXPORT_FIELDS`` order.
+
+    Rows come grouped by day and device rather than in global time order.
+    """
+    dataset = archive_dataset(root)
+    if dataset is None:
+        return
+    for batch in dataset.to_batches(
+        columns=[field for field, _ in EXPORT_FIELDS],
+        filter=archive_filter(start, end, device_id),
+        batch_size=EXPORT_BATCH_ROWS,
+    ):
+        rows = list(zip(*(column.to_pylist() for column in batch.columns)))
+        if rows:
+            yield [
+                (pk, name, serial, timestamp, json.loads(payload), *rest)
+                for pk, name, serial, timestamp, payload, *rest in rows
+            ]
@@ -0,0 +1,198 @@
+"""Async telemetry ingest backed by a pooled asyncpg connection.
+
+Used by the ASGI deployment so that one process can hold many concurrent
+device connections without a worker thread blocking on Postgres per request.
+Validation is shared with the sync pipeline in ``ingest.py``; only device
+resolution and persistence are re-implemented on top of asyncpg.
+"""
+
+import asyncio
+import json
+import logging
+
+import asyncpg
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from apps.devices.cache import DeviceInfo, get_device_cache
+from apps.devices.last_seen import get_last_seen_tracker
+from apps.devices.models import Device, DeviceType
+
+from .aggregate_cache import note_written
+from .ingest import (
+    claim_readings,
+    enqueue_rows,
+    log_ingested,
+    match_devices,
+    parse_batch,
+    release_claims,
+)
+from .latest import (
+    UPSERT_SQL,
+    get_latest_tracker,
+    mirror_latest,
+    newest_per_device,
+    upsert_params,
+)
+from .models import Telemetry
+from .rows import COLUMNS
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_loop = None
+_pool_lock = None
+
+
+def _connect_kwargs():
+    db = settings.DATABASES["default"]
+    return {
+        "host": db.get("HOST") or None,
+        "port": int(db["PORT"]) if db.get("PORT") else None,
+        "user": db.get("USER") or None,
+        "password": db.get("PASSWORD") or None,
+        "database": db.get("NAME"),
+        "timeout": db.get("OPTIONS", {}).get("connect_timeout", 10),
+    }
+
+
+async def get_pool():
+    """Return the connection pool for the running event loop, creating it once."""
+    global _pool, _pool_loop, _pool_lock
+
+    loop = asyncio.get_running_loop()
+    if _pool_loop is not loop:
+        _pool, _pool_loop, _pool_lock = None, loop, asyncio.Lock()
+    if _pool is not None:
+        return _pool
+
+    async with _pool_lock:
+        if _pool is None:
+            _pool = await asyncpg.create_pool(
+                min_size=getattr(settings, "TELEMETRY_ASYNC_POOL_MIN_SIZE", 1),
+                max_size=getattr(settings, "TELEMETRY_ASYNC_POOL_MAX_SIZE", 10),
+                **_connect_kwargs(),
+            )
+            logger.info("telemetry.async_pool_created")
+    return _pool
+
+
+async def close_pool():
+    """Close the pool of the running event loop, if any."""
+    global _pool
+    if _pool is not None and _pool_loop is asyncio.get_running_loop():
+        pool, _pool = _pool, None
+        await pool.close()
+
+
+async def aresolve_devices(serial_numbers):
+    """Async counterpart of ``ingest.resolve_devices``.
+
+    Only the process-local tier of the device cache is consulted; the Redis
+    tier uses a blocking client and would stall the event loop.
+    """
+    if not serial_numbers:
+        return {}
+    cache = get_device_cache()
+    found, misses = cache.get_local(serial_numbers)
+
+    if misses:
+        pool = await get_pool()
+        records = await pool.fetch(
+            "SELECT d.serial_number, d.id, d.status, d.device_type_id, "
+            "t.metric_name, t.metric_min, t.metric_max "
+            f"FROM {Device._meta.db_table} d "
+            f"JOIN {DeviceType._meta.db_table} t ON t.id = d.device_type_id "
+            "WHERE d.serial_number = ANY($1::text[])",
+            list(misses),
+        )
+        loaded = {
+            record["serial_number"]: DeviceInfo.from_db(*list(record.values())[1:])
+            for record in records
+        }
+        cache.store_local(loaded, misses - loaded.keys())
+        found.update(loaded)
+
+    return {ssn: info for ssn, info in found.items() if info is not None}
+
+
+async def awrite_telemetry(rows):
+    """Persist rows with asyncpg's binary COPY."""
+    if not rows:
+        return 0
+    pool = await get_pool()
+    await pool.copy_records_to_table(
+        Telemetry._meta.db_table,
+        columns=COLUMNS,
+        records=[row.values() for row in rows],
+    )
+    if getattr(settings, "TELEMETRY_AGG_CACHE_REDIS_URL", ""):
+        await sync_to_async(note_written, thread_sensitive=False)(rows)
+    return len(rows)
+
+
+async def atouch_last_seen(device_ids, seen_at):
+    """Async counterpart of ``ingest.touch_last_seen``."""
+    if not device_ids:
+        return
+    if getattr(settings, "DEVICE_LAST_SEEN_WRITE_BEHIND", False):
+        get_last_seen_tracker().touch(device_ids, seen_at)
+        return
+    pool = await get_pool()
+    await pool.execute(
+        f"UPDATE {Device._meta.db_table} SET last_seen = $1 "
+        "WHERE id = ANY($2::uuid[])",
+        seen_at,
+        list(device_ids),
+    )
+
+
+async def arecord_latest(rows):
+    """Async counterpart of ``latest.record_latest``."""
+    if not rows:
+        return
+    if getattr(settings, "TELEMETRY_LATEST_WRITE_BEHIND", False):
+        get_latest_tracker().record(rows)
+        return
+    pool = await get_pool()
+    changed = await pool.fetch(
+        UPSERT_SQL.format("$1", "$2", "$3", "$4"),
+        *upsert_params(newest_per_device(rows)),
+    )
+    if changed:
+        await sync_to_async(mirror_latest, thread_sensitive=False)(
+            [tuple(record) for record in changed]
+        )
+
+
+async def aingest_readings(items, received_at=None):
+    """Async counterpart of ``ingest.ingest_readings``."""
+    received_at = received_at or timezone.now()
+    results, readings = parse_batch(items, received_at)
+    # Deduplication may talk to Redis, keep it off the event loop
+    claimed = {}
+    if getattr(settings, "TELEMETRY_DEDUP_ENABLED", False):
+        claimed = await sync_to_async(claim_readings, thread_sensitive=False)(
+            readings, results
+        )
+    devices = await aresolve_devices({reading.ssn for reading in readings.values()})
+    rows = match_devices(readings, devices, results)
+    if claimed:
+        await sync_to_async(release_claims, thread_sensitive=False)(claimed, results)
+
+    try:
+        queued = False
+        if rows and getattr(settings, "TELEMETRY_STREAM_ENABLED", False):
+            queued = await sync_to_async(enqueue_rows, thread_sensitive=False)(rows)
+        if not queued:
+            await awrite_telemetry(rows)
+    except Exception:
+        if claimed:
+            await sync_to_async(release_claims, thread_sensitive=False)(claimed)
+        raise
+    await atouch_last_seen({row.device_id for row in rows}, received_at)
+    await arecord_latest(rows)
+
+    log_ingested(results, rows)
+    return results
@@ -0,0 +1,175 @@
+"""In-process write buffer that micro-batches telemetry inserts.
+
+Single-reading requests each produce one row. Instead of one COPY and commit
+per request, rows are queued here and written together once ``flush_rows``
+are waiting or every ``flush_interval`` seconds, whichever comes first.
+"""
+
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError
+
+from apps.core.flusher import PeriodicFlusher
+from config.metrics import (
+    TELEMETRY_BUFFER_DROPPED_TOTAL,
+    TELEMETRY_BUFFER_FLUSH_DURATION_SECONDS,
+    TELEMETRY_BUFFER_FLUSH_ROWS,
+    TELEMETRY_BUFFER_ROWS,
+)
+
+from .dedup import get_deduplicator
+
+logger = logging.getLogger(__name__)
+
+
+class TelemetryWriteBuffer(PeriodicFlusher):
+    """Thread-safe bounded buffer of ``TelemetryRow`` rows.
+
+    A background thread flushes on the interval. Reaching ``flush_rows`` wakes
+    it early; reaching ``max_rows`` makes the caller flush inline, so a slow
+    database pushes back on ingest instead of growing memory. Rows are dropped
+    only when the database rejects them, or when rows requeued after a
+    connection failure no longer fit.
+
+    Rows can carry the deduplication key claimed for their reading. The keys
+    of dropped rows are passed to ``release``, so the client's retry of a
+    reading that was answered as accepted is not rejected as a duplicate.
+    """
+
+    thread_name = "telemetry-write-buffer"
+
+    def __init__(
+        self,
+        writer,
+        flush_rows=500,
+        flush_interval=0.2,
+        max_rows=50000,
+        release=None,
+    ):
+        super().__init__(flush_interval)
+        self.writer = writer
+        self.release = release
+        self.flush_rows = flush_rows
+        self.max_rows = max(max_rows, flush_rows)
+
+        self._rows = []
+        # Deduplication key of each row, or None
+        self._keys = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._rows)
+
+    def add(self, rows, keys=None):
+        """Queue rows for writing, with the dedup key of each row if any."""
+        if not rows:
+            return
+        with self._lock:
+            self._rows.extend(rows)
+            self._keys.extend(keys if keys is not None else [None] * len(rows))
+            depth = len(self._rows)
+        TELEMETRY_BUFFER_ROWS.set(depth)
+
+        if depth >= self.max_rows:
+            # The background thread is not keeping up, push back on the caller
+            self.flush("backpressure")
+        elif depth >= self.flush_rows:
+            if self.running:
+                self.wake()
+            else:
+                self.flush("size")
+
+    def flush(self, reason="manual"):
+        """Write every queued row now and return how many were written."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+                keys, self._keys = self._keys, []
+            if not rows:
+                return 0
+
+            start = time.perf_counter()
+            try:
+                self.writer(rows)
+            except (OperationalError, InterfaceError):
+                # Connection trouble is transient, retry on the next flush
+                logger.exception(
+                    "telemetry.buffer_flush_failed", extra={"rows": len(rows)}
+                )
+                self._requeue(rows, keys)
+                return 0
+            except Exception:
+                # Retrying rows the database rejected would block every later flush
+                logger.exception(
+                    "telemetry.buffer_flush_rejected", extra={"rows": len(rows)}
+                )
+                TELEMETRY_BUFFER_DROPPED_TOTAL.inc(len(rows))
+                self._release(keys)
+                return 0
+
+            TELEMETRY_BUFFER_FLUSH_DURATION_SECONDS.labels(reason=reason).observe(
+                time.perf_counter() - start
+            )
+            TELEMETRY_BUFFER_FLUSH_ROWS.labels(reason=reason).observe(len(rows))
+            TELEMETRY_BUFFER_ROWS.set(len(self))
+            return len(rows)
+
+    def _requeue(self, rows, keys):
+        dropped = []
+        with self._lock:
+            self._rows[:0] = rows
+            self._keys[:0] = keys
+            overflow = len(self._rows) - self.max_rows
+            if overflow > 0:
+                # Keep the newest readings, they matter most for rules and dashboards
+                dropped = self._keys[:overflow]
+                del self._rows[:overflow]
+                del self._keys[:overflow]
+                TELEMETRY_BUFFER_DROPPED_TOTAL.inc(overflow)
+            TELEMETRY_BUFFER_ROWS.set(len(self._rows))
+        self._release(dropped)
+
+    def _release(self, keys):
+        keys = [key for key in keys if key is not None]
+        if keys and self.release is not None:
+            self.release(keys)
+
+    def flush_reason(self):
+        return "size" if len(self) >= self.flush_rows else "interval"
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_write_buffer():
+    """Return the process-wide buffer, starting it on first use."""
+    global _buffer
+
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                from .ingest import write_telemetry
+
+                flush_ms = getattr(settings, "TELEMETRY_WRITE_BUFFER_FLUSH_MS", 200)
+                buffer = TelemetryWriteBuffer(
+                    write_telemetry,
+                    flush_rows=getattr(
+                        settings, "TELEMETRY_WRITE_BUFFER_FLUSH_ROWS", 500
+                    ),
+                    flush_interval=flush_ms / 1000,
+                    max_rows=getattr(
+                        settings, "TELEMETRY_WRITE_BUFFER_MAX_ROWS", 50000
+                    ),
+                    release=lambda keys: get_deduplicator().release(keys),
+                )
+                buffer.start()
+                atexit.register(buffer.close)
+                _buffer = buffer
+    return _buffer
@@ -0,0 +1,135 @@
+"""Bounded deduplication window for telemetry ingest.
+
+Gateways retry on timeouts, so the same reading can arrive more than once.
+Each reading with a ``message_id`` or a device timestamp gets a key; the
+first request to claim a key writes the reading, later ones inside the
+window are answered as accepted duplicates and never reach the insert.
+
+Claims go to a process-local LRU first and, when configured, to Redis with
+``SET NX EX`` so that retries landing on another process are caught too.
+An LRU is used rather than a Bloom filter: a false positive would silently
+drop a real reading.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+from django.conf import settings
+
+from config.metrics import TELEMETRY_DEDUP_LOOKUPS_TOTAL
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "iot:telemetry:dedup:"
+
+
+class Deduplicator:
+    """Remembers claimed keys for ``window`` seconds."""
+
+    def __init__(self, window=600, max_size=100000, redis_client=None):
+        self.window = window
+        self.max_size = max_size
+        self.redis = redis_client
+
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._seen)
+
+    def claim(self, keys):
+        """Claim keys; return ``True`` for each key seen for the first time.
+
+        A key repeated within ``keys`` is only new the first time.
+        """
+        fresh = [False] * len(keys)
+        candidates = {}
+        now = time.monotonic()
+        with self._lock:
+            for position, key in enumerate(keys):
+                expires = self._seen.get(key)
+                if (expires is not None and expires > now) or key in candidates:
+                    continue
+                candidates[key] = position
+                self._seen[key] = now + self.window
+                self._seen.move_to_end(key)
+            while len(self._seen) > self.max_size:
+                self._seen.popitem(last=False)
+
+        shared_hits = set(self._redis_claim(list(candidates)))
+        for key, position in candidates.items():
+            fresh[position] = key not in shared_hits
+
+        self._count("local", "hit", len(keys) - len(candidates))
+        self._count("redis", "hit", len(shared_hits))
+        self._count(
+            "local" if self.redis is None else "redis",
+            "miss",
+            len(candidates) - len(shared_hits),
+        )
+        return fresh
+
+    def release(self, keys):
+        """Forget keys whose readings were not written after all."""
+        with self._lock:
+            for key in keys:
+                self._seen.pop(key, None)
+        if self.redis is not None and keys:
+            try:
+                self.redis.delete(*(REDIS_KEY_PREFIX + key for key in keys))
+            except redis.RedisError as exc:
+                logger.warning(
+                    "telemetry.dedup_redis_release_failed", extra={"error": str(exc)}
+                )
+
+    def clear(self):
+        with self._lock:
+            self._seen.clear()
+
+    def _redis_claim(self, keys):
+        """Return the keys another process already claimed."""
+        if self.redis is None or not keys:
+            return []
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.set(REDIS_KEY_PREFIX + key, 1, nx=True, ex=self.window)
+                claimed = pipe.execute()
+        except redis.RedisError as exc:
+            # Fail open: storing a rare duplicate beats dropping readings
+            logger.warning("telemetry.dedup_redis_failed", extra={"error": str(exc)})
+            return []
+        return [key for key, ok in zip(keys, claimed) if not ok]
+
+    @staticmethod
+    def _count(tier, result, amount):
+        if amount:
+            TELEMETRY_DEDUP_LOOKUPS_TOTAL.labels(tier=tier, result=result).inc(amount)
+
+
+_deduplicator = None
+_deduplicator_lock = threading.Lock()
+
+
+def get_deduplicator():
+    """Return the process-wide deduplicator configured from settings."""
+    global _deduplicator
+
+    if _deduplicator is None:
+        with _deduplicator_lock:
+            if _deduplicator is None:
+                redis_url = getattr(settings, "TELEMETRY_DEDUP_REDIS_URL", "")
+                _deduplicator = Deduplicator(
+                    window=getattr(settings, "TELEMETRY_DEDUP_WINDOW_SECONDS", 600),
+                    max_size=getattr(settings, "TELEMETRY_DEDUP_MAX_KEYS", 100000),
+                    redis_client=(
+                        redis.Redis.from_url(redis_url, socket_timeout=0.1)
+                        if redis_url
+                        else None
+                    ),
+                )
+    return _deduplicator
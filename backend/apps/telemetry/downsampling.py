@@ -0,0 +1,204 @@
+"""Downsampling of raw telemetry series for charts.
+
+``series_chunks`` streams a device's raw readings through a server-side
+cursor, and the samplers consume it chunk by chunk, so memory is bounded by
+the chunk size and the number of output points rather than the window.
+
+Two methods are offered, both over equal time buckets of the window:
+
+* ``lttb``: Largest-Triangle-Three-Buckets keeps the point of each bucket
+  that forms the largest triangle with the previously kept point and the
+  average of the next bucket. It preserves the visual shape of the line.
+* ``minmax``: the minimum and maximum of each bucket, so no spike is lost.
+"""
+
+import numpy as np
+
+from config.db_router import read_connection
+
+from .models import Telemetry
+
+CHUNK_SIZE = 10000
+
+METHODS = ("lttb", "minmax")
+
+SERIES_SQL = f"""
+    SELECT extract(epoch FROM timestamp)::double precision, value
+    FROM {Telemetry._meta.db_table}
+    WHERE device_id = %s AND timestamp >= %s AND timestamp < %s
+      AND value IS NOT NULL
+    ORDER BY timestamp
+"""
+
+_EMPTY = np.empty(0)
+
+
+def series_chunks(device_id, start, end, chunk_size=CHUNK_SIZE):
+    """Yield ``(times, values)`` arrays of raw readings in time order.
+
+    Times are epoch seconds. Rows are fetched ``chunk_size`` at a time from
+    a server-side cursor, on a read replica when configured, instead of being
+    loaded all at once.
+    """
+    with read_connection(Telemetry).chunked_cursor() as cursor:
+        cursor.execute(SERIES_SQL, [device_id, start, end])
+        while rows := cursor.fetchmany(chunk_size):
+            chunk = np.array(rows, dtype=np.float64)
+            yield chunk[:, 0], chunk[:, 1]
+
+
+def _bucket_ids(times, origin, width, count):
+    return np.minimum(((times - origin) // width).astype(np.int64), count - 1)
+
+
+def _segment_starts(ids):
+    """Offsets at which the (sorted) bucket ids change."""
+    return np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+
+
+def minmax_downsample(chunks, start, end, points):
+    """Return ``(times, values)`` with the min and max of each bucket."""
+    count = max(points // 2, 1)
+    origin = start.timestamp()
+    width = (end.timestamp() - origin) / count
+    min_v, max_v = np.full(count, np.inf), np.full(count, -np.inf)
+    min_t, max_t = np.zeros(count), np.zeros(count)
+
+    for times, values in chunks:
+        ids = _bucket_ids(times, origin, width, count)
+        # Within each bucket, rows ordered by value: first is min, last is max
+        order = np.lexsort((values, ids))
+        first = _segment_starts(ids[order])
+        last = np.r_[first[1:] - 1, len(order) - 1]
+        buckets = ids[order[first]]
+        low, high = order[first], order[last]
+
+        # A bucket can span two chunks, so merge with what it already holds
+        lower = values[low] < min_v[buckets]
+        min_v[buckets[lower]] = values[low[lower]]
+        min_t[buckets[lower]] = times[low[lower]]
+        higher = values[high] > max_v[buckets]
+        max_v[buckets[higher]] = values[high[higher]]
+        max_t[buckets[higher]] = times[high[higher]]
+
+    filled = np.isfinite(min_v)
+    pair_t = np.column_stack((min_t[filled], max_t[filled]))
+    pair_v = np.column_stack((min_v[filled], max_v[filled]))
+    swap = pair_t[:, 0] > pair_t[:, 1]
+    pair_t[swap] = pair_t[swap, ::-1]
+    pair_v[swap] = pair_v[swap, ::-1]
+    times, values = pair_t.ravel(), pair_v.ravel()
+    # Buckets with a single reading report it as both min and max
+    keep = np.r_[True, (times[1:] != times[:-1]) | (values[1:] != values[:-1])]
+    return times[keep], values[keep]
+
+
+def _lttb_select(times, values, starts, anchor, tail=None):
+    """Pick one point per bucket segment; return ``(indices, last pick)``.
+
+    Each segment needs the average of the next one, so without ``tail`` the
+    last segment is only used as the next bucket and not picked from.
+    """
+    sizes = np.diff(np.r_[starts, len(times)])
+    avg_t = np.add.reduceat(times, starts) / sizes
+    avg_v = np.add.reduceat(values, starts) / sizes
+    if tail is not None:
+        avg_t, avg_v = np.r_[avg_t, tail[0]], np.r_[avg_v, tail[1]]
+    ends = np.r_[starts[1:], len(times)]
+
+    picked = []
+    anchor_t, anchor_v = anchor
+    for segment in range(len(avg_t) - 1):
+        seg_t = times[starts[segment] : ends[segment]]
+        seg_v = values[starts[segment] : ends[segment]]
+        next_t, next_v = avg_t[segment + 1], avg_v[segment + 1]
+        # Twice the triangle area; the factor does not change the argmax
+        rise = (anchor_t - next_t) * (seg_v - anchor_v)
+        area = np.abs(rise - (anchor_t - seg_t) * (next_v - anchor_v))
+        best = int(area.argmax())
+        anchor_t, anchor_v = seg_t[best], seg_v[best]
+        picked.append(starts[segment] + best)
+    return np.array(picked, dtype=np.int64), (anchor_t, anchor_v)
+
+
+def lttb_downsample(chunks, start, end, points):
+    """Return ``(times, values)`` reduced to at most ``points`` with LTTB.
+
+    The first and last readings are always kept. Rows are held only until
+    the bucket after theirs is complete.
+    """
+    count = max(points - 2, 1)
+    origin = start.timestamp()
+    width = (end.timestamp() - origin) / count
+    out_t, out_v = [], []
+    buffer_t, buffer_v = _EMPTY, _EMPTY
+    anchor = None
+
+    for times, values in chunks:
+        if anchor is None:
+            anchor = (times[0], values[0])
+            out_t.append(times[:1])
+            out_v.append(values[:1])
+            times, values = times[1:], values[1:]
+        buffer_t = np.concatenate((buffer_t, times))
+        buffer_v = np.concatenate((buffer_v, values))
+
+        starts = _segment_starts(_bucket_ids(buffer_t, origin, width, count))
+        # The last bucket may still grow, so it cannot serve as a next bucket
+        if len(starts) < 3:
+            continue
+        complete = starts[-1]
+        picked, anchor = _lttb_select(
+            buffer_t[:complete], buffer_v[:complete], starts[:-1], anchor
+        )
+        out_t.append(buffer_t[picked])
+        out_v.append(buffer_v[picked])
+        buffer_t, buffer_v = buffer_t[starts[-2] :], buffer_v[starts[-2] :]
+
+    if anchor is None:
+        return _EMPTY, _EMPTY
+    if len(buffer_t):
+        tail = (buffer_t[-1], buffer_v[-1])
+        buffer_t, buffer_v = buffer_t[:-1], buffer_v[:-1]
+        if len(buffer_t):
+            starts = _segment_starts(_bucket_ids(buffer_t, origin, width, count))
+            picked, _ = _lttb_select(buffer_t, buffer_v, starts, anchor, tail)
+            out_t.append(buffer_t[picked])
+            out_v.append(buffer_v[picked])
+        out_t.append(np.array([tail[0]]))
+        out_v.append(np.array([tail[1]]))
+    return np.concatenate(out_t), np.concatenate(out_v)
+
+
+SAMPLERS = {"lttb": lttb_downsample, "minmax": minmax_downsample}
+
+
+def downsample(chunks, start, end, points, method="lttb"):
+    """Return ``(times, values, raw_count, method)`` for a chunked series.
+
+    Series with at most ``points`` readings are returned as they are, with
+    method ``"raw"``.
+    """
+    chunks = iter(chunks)
+    head, raw_count = [], 0
+    for times, values in chunks:
+        head.append((times, values))
+        raw_count += len(times)
+        if raw_count > points:
+            break
+    else:
+        if not head:
+            return _EMPTY, _EMPTY, 0, "raw"
+        times = np.concatenate([times for times, _ in head])
+        values = np.concatenate([values for _, values in head])
+        return times, values, raw_count, "raw"
+
+    def counted():
+        nonlocal raw_count
+        yield from head
+        for times, values in chunks:
+            raw_count += len(times)
+            yield times, values
+
+    times, values = SAMPLERS[method](counted(), start, end, points)
+    return times, values, raw_count, method
@@ -0,0 +1,378 @@
+"""Telemetry ingest pipeline: decode, validate and persist device readings."""
+
+import csv
+import hashlib
+import io
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+
+import redis
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.devices.cache import get_device_cache
+from apps.devices.last_seen import get_last_seen_tracker
+from apps.devices.models import Device
+
+from .aggregate_cache import note_written
+from .buffer import get_write_buffer
+from .dedup import get_deduplicator
+from .latest import record_latest
+from .models import Telemetry
+from .rows import COLUMNS, TelemetryRow
+from .stream import get_telemetry_stream
+from .validation import (
+    PayloadSchema,
+    compile_validator,
+    get_schema,
+    validate_ranges,
+)
+
+logger = logging.getLogger(__name__)
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl")
+
+MESSAGE_ID_MAX_LENGTH = 128
+
+COPY_SQL = (
+    f"COPY {Telemetry._meta.db_table} ({', '.join(COLUMNS)}) "
+    "FROM STDIN WITH (FORMAT csv)"
+)
+
+
+@dataclass(slots=True)
+class Reading:
+    """A single validated reading that has not been matched to a device yet."""
+
+    ssn: str
+    value: float
+    schema_version: str
+    schema: PayloadSchema
+    timestamp: datetime
+    message_id: str | None = None
+    # False when the server receive time stands in for a missing ``ts``
+    device_timestamp: bool = False
+
+    def payload(self):
+        """Return the JSON document stored in ``Telemetry.payload``."""
+        payload = {
+            "version": self.schema_version,
+            "serial_number": self.ssn,
+            "value": self.value,
+        }
+        if self.message_id is not None:
+            payload["message_id"] = self.message_id
+        return payload
+
+    def dedup_key(self):
+        """Key identifying a retry of this reading, or ``None`` if there is none.
+
+        Without a message id or a device timestamp two identical readings
+        cannot be told apart from a retry, so they are never deduplicated.
+        """
+        if self.message_id is not None:
+            return f"{self.ssn}|id|{self.message_id}"
+        if not self.device_timestamp:
+            return None
+        digest = hashlib.blake2b(
+            json.dumps(self.payload(), sort_keys=True).encode(), digest_size=8
+        ).hexdigest()
+        return f"{self.ssn}|{self.timestamp.isoformat()}|{digest}"
+
+
+def decode_batch(body, content_type):
+    """Decode a request body into a list of raw readings.
+
+    A JSON array and NDJSON (one object per line) are both accepted. Malformed
+    NDJSON lines are kept as ``ValidationError`` items so they are rejected
+    individually instead of failing the whole batch.
+    """
+    text = body.decode("utf-8") if isinstance(body, bytes) else body
+
+    if content_type in NDJSON_CONTENT_TYPES:
+        items = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except json.JSONDecodeError as exc:
+                items.append(ValidationError(f"Invalid JSON: {exc.msg}"))
+        return items
+
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as exc:
+        raise ValidationError(f"Invalid JSON: {exc.msg}")
+    if not isinstance(data, list):
+        raise ValidationError("Batch body must be a JSON array")
+    return data
+
+
+def parse_reading(item, received_at):
+    """Validate one raw reading and return it as a ``Reading``."""
+    if isinstance(item, ValidationError):
+        raise item
+    if not isinstance(item, dict):
+        raise ValidationError("Reading must be a JSON object")
+
+    ssn = item.get("ssn")
+    if not isinstance(ssn, str) or not ssn:
+        raise ValidationError("ssn is required and must be a string")
+
+    schema_version = item.get("schema_version")
+    if not isinstance(schema_version, str) or not schema_version:
+        raise ValidationError("schema_version is required and must be a string")
+    schema = get_schema(schema_version)
+
+    # Range checks run later, vectorized over the batch, in match_devices
+    value = item.get("value")
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValidationError("value is required and must be a number")
+
+    timestamp = received_at
+    ts = item.get("ts")
+    if ts is not None:
+        timestamp = parse_datetime(ts) if isinstance(ts, str) else None
+        if timestamp is None:
+            raise ValidationError("ts must be an ISO 8601 date-time")
+        if timezone.is_naive(timestamp):
+            timestamp = timestamp.replace(tzinfo=dt_timezone.utc)
+
+    message_id = item.get("message_id")
+    if message_id is not None and not (
+        isinstance(message_id, str) and 0 < len(message_id) <= MESSAGE_ID_MAX_LENGTH
+    ):
+        raise ValidationError(
+            f"message_id must be a string of 1 to {MESSAGE_ID_MAX_LENGTH} characters"
+        )
+
+    return Reading(
+        ssn=ssn,
+        value=value,
+        schema_version=schema_version,
+        schema=schema,
+        timestamp=timestamp,
+        message_id=message_id,
+        device_timestamp=ts is not None,
+    )
+
+
+def resolve_devices(serial_numbers):
+    """Map serial numbers to ``DeviceInfo`` through the device cache."""
+    if not serial_numbers:
+        return {}
+    return get_device_cache().get_many(serial_numbers)
+
+
+def write_telemetry(rows):
+    """Persist ``TelemetryRow`` rows with a single COPY."""
+    if not rows:
+        return 0
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # None becomes an empty unquoted field, which COPY reads as NULL
+    writer.writerows(row.values() for row in rows)
+    buffer.seek(0)
+
+    with connection.cursor() as cursor:
+        cursor.copy_expert(COPY_SQL, buffer)
+    transaction.on_commit(lambda: note_written(rows))
+    return len(rows)
+
+
+def enqueue_rows(rows):
+    """Append rows to the ingest stream; return False if it is full or down."""
+    try:
+        return bool(get_telemetry_stream().append(rows))
+    except redis.RedisError as exc:
+        logger.warning("telemetry.stream_append_failed", extra={"error": str(exc)})
+        return False
+
+
+def persist_rows(rows, keys=None):
+    """Queue rows on the ingest stream, the write buffer, or write them now.
+
+    If the stream is enabled but Redis is down, rows are written directly so
+    an accepted reading is never lost. ``keys`` are the dedup keys claimed for
+    the rows, released by the write buffer for rows it has to drop.
+    """
+    if not rows:
+        return
+    if getattr(settings, "TELEMETRY_STREAM_ENABLED", False) and enqueue_rows(rows):
+        return
+    if getattr(settings, "TELEMETRY_WRITE_BUFFER_ENABLED", False):
+        get_write_buffer().add(rows, keys)
+    else:
+        write_telemetry(rows)
+
+
+def touch_last_seen(device_ids, seen_at):
+    """Bump ``Device.last_seen`` for every device in the batch at once.
+
+    With write-behind enabled the update is coalesced in memory and written
+    by ``LastSeenTracker`` a few seconds later.
+    """
+    if not device_ids:
+        return
+    if getattr(settings, "DEVICE_LAST_SEEN_WRITE_BEHIND", False):
+        get_last_seen_tracker().touch(device_ids, seen_at)
+    else:
+        Device.objects.filter(pk__in=device_ids).update(last_seen=seen_at)
+
+
+def _accepted(index):
+    return {"index": index, "status": "accepted"}
+
+
+def _duplicate(index):
+    # Answered like the original so a retrying client stops retrying
+    return {"index": index, "status": "accepted", "duplicate": True}
+
+
+def _rejected(index, error):
+    message = error.messages[0] if isinstance(error, ValidationError) else str(error)
+    return {"index": index, "status": "rejected", "error": message}
+
+
+def parse_batch(items, received_at):
+    """Validate raw readings without touching the database.
+
+    Returns ``(results, readings)`` where ``results`` already holds the
+    rejections and ``readings`` maps input index to a parsed ``Reading``.
+    """
+    results = [None] * len(items)
+    readings = {}
+    for index, item in enumerate(items):
+        try:
+            readings[index] = parse_reading(item, received_at)
+        except ValidationError as exc:
+            results[index] = _rejected(index, exc)
+    return results, readings
+
+
+def claim_readings(readings, results):
+    """Drop readings already ingested inside the deduplication window.
+
+    Duplicates are removed from ``readings`` and answered in ``results``.
+    Returns ``{index: key}`` for the keys this batch claimed, so they can be
+    released for readings that end up not being written.
+    """
+    if not getattr(settings, "TELEMETRY_DEDUP_ENABLED", False):
+        return {}
+    keyed = {}
+    for index, reading in readings.items():
+        key = reading.dedup_key()
+        if key is not None:
+            keyed[index] = key
+    if not keyed:
+        return {}
+
+    claimed = {}
+    fresh = get_deduplicator().claim(list(keyed.values()))
+    for (index, key), is_new in zip(keyed.items(), fresh):
+        if is_new:
+            claimed[index] = key
+        else:
+            del readings[index]
+            results[index] = _duplicate(index)
+    return claimed
+
+
+def release_claims(claimed, results=None):
+    """Release claimed keys, only those of rejected readings if ``results``."""
+    keys = [
+        key
+        for index, key in claimed.items()
+        if results is None or results[index]["status"] == "rejected"
+    ]
+    if keys:
+        get_deduplicator().release(keys)
+
+
+def match_devices(readings, devices, results):
+    """Attach readings to resolved devices and return rows ready to write.
+
+    Value ranges depend on the device type, so they are checked here, for
+    the whole batch at once.
+    """
+    matched = []
+    for index, reading in readings.items():
+        device = devices.get(reading.ssn)
+        if device is None:
+            results[index] = _rejected(index, "Unknown device serial number")
+        elif device.status == Device.DeviceStatus.INACTIVE:
+            results[index] = _rejected(index, "Device is inactive")
+        else:
+            validator = compile_validator(
+                reading.schema, device.metric_min, device.metric_max
+            )
+            matched.append((index, reading, device, validator))
+
+    in_range = validate_ranges(
+        [reading.value for _, reading, _, _ in matched],
+        [validator for _, _, _, validator in matched],
+    )
+
+    rows = []
+    for valid, (index, reading, device, validator) in zip(in_range, matched):
+        if valid:
+            rows.append(
+                TelemetryRow(
+                    device.id, reading.timestamp, reading.payload(), device.metric_name
+                )
+            )
+            results[index] = _accepted(index)
+        else:
+            results[index] = _rejected(index, validator.error)
+    return rows
+
+
+def log_ingested(results, rows):
+    duplicates = sum(1 for result in results if result.get("duplicate"))
+    logger.info(
+        "telemetry.ingested",
+        extra={
+            "accepted": len(rows),
+            "duplicates": duplicates,
+            "rejected": len(results) - len(rows) - duplicates,
+        },
+    )
+
+
+def ingest_readings(items, received_at=None):
+    """Validate and persist a batch of raw readings.
+
+    Returns one result dict per input item, in input order. Invalid readings
+    are rejected individually; all accepted readings are written together.
+    """
+    received_at = received_at or timezone.now()
+    results, readings = parse_batch(items, received_at)
+    claimed = claim_readings(readings, results)
+    devices = resolve_devices({reading.ssn for reading in readings.values()})
+    rows = match_devices(readings, devices, results)
+    release_claims(claimed, results)
+    # Rows follow the accepted readings in input order
+    keys = [
+        claimed.get(index)
+        for index in readings
+        if results[index]["status"] == "accepted"
+    ]
+
+    try:
+        persist_rows(rows, keys)
+    except Exception:
+        # Let the client's retry through instead of dropping it as a duplicate
+        release_claims(claimed)
+        raise
+    touch_last_seen({row.device_id for row in rows}, received_at)
+    record_latest(rows)
+
+    log_ingested(results, rows)
+    return results
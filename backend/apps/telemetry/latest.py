@@ -0,0 +1,299 @@
+"""Newest reading per device, for fleet overviews.
+
+Answering "current value of every device" from ``telemetry`` needs a
+``DISTINCT ON`` over the whole hypertable. Instead ingest upserts the newest
+reading of each device in the batch into ``device_latest_telemetry`` with a
+single statement, and mirrors the rows that changed into one Redis hash.
+
+The fleet snapshot endpoint reads the hash (or the table without Redis) and
+renders it at most once per ``TELEMETRY_LATEST_SNAPSHOT_TTL_SECONDS`` per
+process, so wallboards polling every second cost one read per interval.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import threading
+import time
+
+import redis
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, connection
+from django.utils import timezone
+
+from apps.core.flusher import PeriodicFlusher
+from config.metrics import TELEMETRY_LATEST_UPSERT_DURATION_SECONDS
+
+from .models import DeviceLatestTelemetry
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY = "iot:telemetry:latest"
+
+# Hash field set when the hash was filled from the whole table. It lives in
+# the hash so losing the hash loses it too, and a hash recreated by a single
+# ingest afterwards is recognized as partial
+COMPLETE_FIELD = "__complete__"
+
+# Only moves a device's reading forward, so concurrent upserts commute.
+# RETURNING yields just the rows that changed, which are the ones to mirror.
+UPSERT_SQL = (
+    f"INSERT INTO {DeviceLatestTelemetry._meta.db_table} AS l "
+    "(device_id, timestamp, value, metric) "
+    "SELECT * FROM unnest({0}::uuid[], {1}::timestamptz[], "
+    "{2}::double precision[], {3}::varchar[]) "
+    "ON CONFLICT (device_id) DO UPDATE "
+    "SET timestamp = EXCLUDED.timestamp, value = EXCLUDED.value, "
+    "metric = EXCLUDED.metric "
+    "WHERE l.timestamp < EXCLUDED.timestamp "
+    "RETURNING device_id, timestamp, value, metric"
+)
+
+
+def newest_per_device(rows, latest=None):
+    """Merge ``TelemetryRow`` objects into ``{device_id: (ts, value, metric)}``."""
+    latest = {} if latest is None else latest
+    for row in rows:
+        current = latest.get(row.device_id)
+        if current is None or current[0] < row.timestamp:
+            latest[row.device_id] = (row.timestamp, row.value, row.metric)
+    return latest
+
+
+def upsert_params(latest):
+    """Column arrays for ``UPSERT_SQL``, one element per device."""
+    return (
+        [str(device_id) for device_id in latest],
+        [reading[0] for reading in latest.values()],
+        [reading[1] for reading in latest.values()],
+        [reading[2] for reading in latest.values()],
+    )
+
+
+def encode_entry(device_id, timestamp, value, metric):
+    """JSON for one device as stored in Redis and returned by the snapshot."""
+    return json.dumps(
+        {
+            "device": str(device_id),
+            "value": value,
+            "metric": metric,
+            "ts": timestamp.isoformat(),
+        },
+        separators=(",", ":"),
+    )
+
+
+def mirror_latest(changed, client=None, complete=False):
+    """Copy upserted ``(device_id, ts, value, metric)`` rows into Redis.
+
+    ``complete`` marks the hash as holding every device, when ``changed`` is
+    the whole table.
+    """
+    client = client if client is not None else get_latest_redis()
+    if client is None or not (changed or complete):
+        return
+    mapping = {str(row[0]): encode_entry(*row) for row in changed}
+    if complete:
+        mapping[COMPLETE_FIELD] = "1"
+    try:
+        client.hset(REDIS_KEY, mapping=mapping)
+    except redis.RedisError as exc:
+        # The table stays authoritative; the next update of a device fixes it
+        logger.warning("telemetry.latest_mirror_failed", extra={"error": str(exc)})
+
+
+def forget_latest(device_ids, client=None):
+    """Drop deleted devices from the Redis mirror."""
+    client = client if client is not None else get_latest_redis()
+    if client is None or not device_ids:
+        return
+    try:
+        client.hdel(REDIS_KEY, *(str(device_id) for device_id in device_ids))
+    except redis.RedisError as exc:
+        logger.warning("telemetry.latest_forget_failed", extra={"error": str(exc)})
+
+
+def write_latest(latest):
+    """Upsert ``{device_id: (ts, value, metric)}`` and mirror what changed."""
+    if not latest:
+        return []
+    start = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute(UPSERT_SQL.format("%s", "%s", "%s", "%s"), upsert_params(latest))
+        changed = cursor.fetchall()
+    TELEMETRY_LATEST_UPSERT_DURATION_SECONDS.observe(time.perf_counter() - start)
+    mirror_latest(changed)
+    return changed
+
+
+class LatestTelemetryTracker(PeriodicFlusher):
+    """Keeps the newest reading per device until the next flush."""
+
+    thread_name = "telemetry-latest"
+
+    def __init__(self, writer=write_latest, flush_interval=1):
+        super().__init__(flush_interval)
+        self.writer = writer
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def record(self, rows):
+        with self._lock:
+            newest_per_device(rows, self._pending)
+
+    def flush(self, reason="manual"):
+        """Upsert every pending reading and return how many devices were sent."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            try:
+                self.writer(pending)
+            except (OperationalError, InterfaceError):
+                logger.exception(
+                    "telemetry.latest_flush_failed", extra={"devices": len(pending)}
+                )
+                with self._lock:
+                    # Readings recorded since are newer and win the merge
+                    for device_id, reading in pending.items():
+                        current = self._pending.get(device_id)
+                        if current is None or current[0] < reading[0]:
+                            self._pending[device_id] = reading
+                return 0
+            return len(pending)
+
+
+class FleetSnapshot:
+    """Renders the latest reading of every device, at most once per ``ttl``."""
+
+    def __init__(self, ttl=1.0, redis_client=None):
+        self.ttl = ttl
+        self.redis = redis_client
+        self._rendered = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return ``(body, etag)`` of the current snapshot JSON."""
+        with self._lock:
+            if self._rendered is None or time.monotonic() >= self._expires:
+                self._rendered = self._render()
+                self._expires = time.monotonic() + self.ttl
+            return self._rendered
+
+    def clear(self):
+        with self._lock:
+            self._rendered = None
+
+    def _render(self):
+        entries = self._read_redis()
+        if entries is None:
+            entries = self._read_table()
+        # Entries are already JSON, so the body is assembled without decoding
+        data = ",".join(entries)
+        body = '{"generated_at":%s,"data":[%s]}' % (
+            json.dumps(timezone.now().isoformat()),
+            data,
+        )
+        # The ETag ignores generated_at so an unchanged fleet answers 304
+        etag = hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+        return body.encode(), f'"{etag}"'
+
+    def _read_redis(self):
+        """Entries of the mirror, ``None`` unless it holds every device."""
+        if self.redis is None:
+            return None
+        try:
+            mirrored = self.redis.hgetall(REDIS_KEY)
+        except redis.RedisError as exc:
+            logger.warning("telemetry.latest_read_failed", extra={"error": str(exc)})
+            return None
+        complete = COMPLETE_FIELD.encode()
+        if complete not in mirrored:
+            return None
+        return [
+            entry.decode() for field, entry in mirrored.items() if field != complete
+        ]
+
+    def _read_table(self):
+        rows = list(
+            DeviceLatestTelemetry.objects.values_list(
+                "device_id", "timestamp", "value", "metric"
+            )
+        )
+        # Redis lost the hash, or never had every device: refill it
+        mirror_latest(rows, self.redis, complete=True)
+        return [encode_entry(*row) for row in rows]
+
+
+_redis_client = None
+_redis_lock = threading.Lock()
+_tracker = None
+_tracker_lock = threading.Lock()
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_latest_redis():
+    """Return the Redis client of the mirror, ``None`` when not configured."""
+    global _redis_client
+
+    redis_url = getattr(settings, "TELEMETRY_LATEST_REDIS_URL", "")
+    if redis_url and _redis_client is None:
+        with _redis_lock:
+            if _redis_client is None:
+                _redis_client = redis.Redis.from_url(redis_url, socket_timeout=0.5)
+    return _redis_client if redis_url else None
+
+
+def get_latest_tracker():
+    """Return the process-wide write-behind tracker, starting it on first use."""
+    global _tracker
+
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                tracker = LatestTelemetryTracker(
+                    flush_interval=getattr(
+                        settings, "TELEMETRY_LATEST_FLUSH_SECONDS", 1
+                    ),
+                )
+                tracker.start()
+                atexit.register(tracker.close)
+                _tracker = tracker
+    return _tracker
+
+
+def get_fleet_snapshot():
+    """Return the process-wide fleet snapshot renderer."""
+    global _snapshot
+
+    if _snapshot is None:
+        with _snapshot_lock:
+            if _snapshot is None:
+                _snapshot = FleetSnapshot(
+                    ttl=getattr(settings, "TELEMETRY_LATEST_SNAPSHOT_TTL_SECONDS", 1),
+                    redis_client=get_latest_redis(),
+                )
+    return _snapshot
+
+
+def record_latest(rows):
+    """Update the latest reading of every device in the batch.
+
+    With write-behind enabled the upsert is coalesced in memory and done by
+    ``LatestTelemetryTracker`` every ``TELEMETRY_LATEST_FLUSH_SECONDS``.
+    """
+    if not rows:
+        return
+    if getattr(settings, "TELEMETRY_LATEST_WRITE_BEHIND", False):
+        get_latest_tracker().record(rows)
+    else:
+        write_latest(newest_per_device(rows))
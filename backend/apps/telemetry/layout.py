@@ -0,0 +1,125 @@
+"""Physical layout of the telemetry hypertable.
+
+Three settings decide how TimescaleDB stores telemetry:
+
+* ``chunk_interval``: time span of one chunk. Chunks are the unit of
+  retention, compression and chunk exclusion; the recent chunks and their
+  indexes should fit in memory.
+* ``segmentby``: columns whose values are stored once per compressed
+  segment. With ``device_id`` every segment holds a single device, so a
+  per-device range scan decompresses only that device's data.
+* ``orderby``: order of rows inside a segment. Min/max metadata is kept per
+  segment on these columns, so ``timestamp DESC`` lets time filters skip
+  segments and serves newest-first reads without a sort.
+
+``setup_timescaledb`` applies the configured layout and ``benchmark_layout``
+compares candidates on a sample of real data.
+"""
+
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from .models import Telemetry
+
+DEFAULT_CHUNK_INTERVAL = "7 days"
+DEFAULT_SEGMENTBY = "device_id"
+DEFAULT_ORDERBY = "timestamp DESC"
+
+_ORDER_OPTIONS = {"ASC", "DESC", "NULLS", "FIRST", "LAST"}
+
+
+@dataclass(frozen=True)
+class Layout:
+    chunk_interval: str
+    # Comma-separated column lists, as TimescaleDB takes them
+    segmentby: str
+    orderby: str
+
+    @property
+    def label(self):
+        return f"{self.chunk_interval} / {self.segmentby or '-'} / {self.orderby}"
+
+    def validate(self):
+        """Raise ``ValueError`` unless the segmentby/orderby columns exist."""
+        columns = {field.column for field in Telemetry._meta.concrete_fields}
+        for column in _split(self.segmentby):
+            if column not in columns:
+                raise ValueError(f"Unknown segmentby column {column!r}")
+        for term in _split(self.orderby):
+            column, *options = term.split()
+            if column not in columns:
+                raise ValueError(f"Unknown orderby column {column!r}")
+            if not {option.upper() for option in options} <= _ORDER_OPTIONS:
+                raise ValueError(f"Invalid orderby term {term!r}")
+        if not self.orderby:
+            raise ValueError("orderby must not be empty")
+        return self
+
+
+def _split(columns):
+    return [column.strip() for column in columns.split(",") if column.strip()]
+
+
+def configured_layout():
+    """The layout from ``TELEMETRY_CHUNK_TIME_INTERVAL`` and friends."""
+    return Layout(
+        chunk_interval=getattr(
+            settings, "TELEMETRY_CHUNK_TIME_INTERVAL", DEFAULT_CHUNK_INTERVAL
+        ),
+        segmentby=getattr(settings, "TELEMETRY_COMPRESS_SEGMENTBY", DEFAULT_SEGMENTBY),
+        orderby=getattr(settings, "TELEMETRY_COMPRESS_ORDERBY", DEFAULT_ORDERBY),
+    ).validate()
+
+
+def parse_layout(spec):
+    """Parse an ``INTERVAL|SEGMENTBY|ORDERBY`` layout spec.
+
+    For example ``"1 day|device_id|timestamp DESC"``; an empty segmentby
+    compresses all devices together.
+    """
+    parts = [part.strip() for part in spec.split("|")]
+    if len(parts) != 3 or not parts[0]:
+        raise ValueError(f"Expected INTERVAL|SEGMENTBY|ORDERBY, got {spec!r}")
+    return Layout(*parts).validate()
+
+
+def create_hypertable(cursor, table, layout):
+    """Make ``table`` a hypertable, or set the chunk interval if it is one.
+
+    A new interval applies to chunks created from now on.
+    """
+    cursor.execute(
+        """
+        SELECT create_hypertable(
+            %s,
+            'timestamp',
+            chunk_time_interval => %s::interval,
+            if_not_exists => TRUE,
+            migrate_data => TRUE
+        );
+        """,
+        [table, layout.chunk_interval],
+    )
+    # create_hypertable() leaves an existing hypertable's interval unchanged
+    cursor.execute(
+        "SELECT set_chunk_time_interval(%s, %s::interval);",
+        [table, layout.chunk_interval],
+    )
+
+
+def enable_compression(cursor, table, layout):
+    """Enable compression on ``table`` with the layout's segmentby/orderby.
+
+    TimescaleDB refuses to change these while compressed chunks exist.
+    """
+    cursor.execute(
+        f"""
+        ALTER TABLE {table} SET (
+            timescaledb.compress,
+            timescaledb.compress_segmentby = %s,
+            timescaledb.compress_orderby = %s
+        );
+        """,
+        [layout.segmentby, layout.orderby],
+    )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from apps.telemetry.archive import archive_expiring, archive_root, drop_archived
+
+
+class Command(BaseCommand):
+    help = (
+        "Archive telemetry days that expire within TELEMETRY_ARCHIVE_LEAD_DAYS "
+        "to Parquet, partitioned by day and device type"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--drop",
+            action="store_true",
+            help="Also drop chunks past retention once they are archived",
+        )
+
+    def handle(self, *args, **options):
+        archived = archive_expiring()
+        for day, rows in archived:
+            self.stdout.write(f"{day.isoformat()}: {rows} rows")
+        self.stdout.write(
+            self.style.SUCCESS(f"Archived {len(archived)} days to {archive_root()}")
+        )
+
+        if options["drop"]:
+            dropped = drop_archived()
+            if dropped is None:
+                self.stdout.write(self.style.WARNING("No chunks dropped"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"Dropped {dropped} chunks"))
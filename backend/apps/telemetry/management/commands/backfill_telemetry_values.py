@@ -0,0 +1,77 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.devices.models import Device, DeviceType
+from apps.telemetry.models import Telemetry
+
+# Non-numeric legacy values are left NULL instead of failing the batch
+BACKFILL_SQL = f"""
+    UPDATE {Telemetry._meta.db_table} AS t
+    SET value = CASE WHEN jsonb_typeof(t.payload -> 'value') = 'number'
+                     THEN (t.payload ->> 'value')::double precision END,
+        schema_version = t.payload ->> 'version',
+        metric = dt.metric_name
+    FROM {Device._meta.db_table} AS d
+    JOIN {DeviceType._meta.db_table} AS dt ON dt.id = d.device_type_id
+    WHERE d.id = t.device_id
+      AND t.timestamp >= %s AND t.timestamp < %s
+      AND t.value IS NULL AND t.schema_version IS NULL
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the typed value, metric and schema_version columns of existing "
+        "telemetry rows from their JSON payload, one time window per transaction"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--window-hours",
+            type=float,
+            default=6,
+            help="Time range updated per batch; keep it at or below the chunk interval",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0,
+            help="Seconds to pause between batches to limit load",
+        )
+
+    def handle(self, *args, **options):
+        if options["window_hours"] <= 0:
+            raise CommandError("--window-hours must be positive")
+        window = timedelta(hours=options["window_hours"])
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT min(timestamp), max(timestamp) "
+                f"FROM {Telemetry._meta.db_table} "
+                "WHERE value IS NULL AND schema_version IS NULL"
+            )
+            start, end = cursor.fetchone()
+        if start is None:
+            self.stdout.write("Nothing to backfill")
+            return
+
+        # Walking time windows lets TimescaleDB touch one chunk at a time and
+        # keeps every transaction (and the rows it locks) bounded
+        total = 0
+        while start <= end:
+            stop = start + window
+            with connection.cursor() as cursor:
+                cursor.execute(BACKFILL_SQL, [start, stop])
+                updated = cursor.rowcount
+            total += updated
+            self.stdout.write(
+                f"{start.isoformat()} .. {stop.isoformat()}: {updated} rows"
+            )
+            start = stop
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {total} telemetry rows"))
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import random
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.devices.models import Device
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark POST /api/v1/telemetry throughput against one or more running "
+        "servers (e.g. WSGI vs ASGI) and report requests per second"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target",
+            action="append",
+            required=True,
+            help="NAME=URL of an ingest endpoint, repeat to compare servers",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=5000,
+            help="Requests sent to each target",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=200,
+            help="Concurrent keep-alive connections per target",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1,
+            help="Readings per request (1 sends single readings)",
+        )
+
+    def _build_bodies(self, count, batch_size):
+        serials = list(
+            Device.objects.exclude(status=Device.DeviceStatus.INACTIVE).values_list(
+                "serial_number", flat=True
+            )[:1000]
+        )
+        if not serials:
+            raise CommandError("No active devices to send telemetry for")
+
+        def reading():
+            return {
+                "schema_version": "1.0",
+                "ssn": random.choice(serials),
+                "value": round(random.uniform(0, 100), 2),
+            }
+
+        bodies = []
+        for _ in range(count):
+            data = (
+                reading() if batch_size == 1 else [reading() for _ in range(batch_size)]
+            )
+            bodies.append(json.dumps(data).encode())
+        return bodies
+
+    async def _send(self, reader, writer, host, path, body):
+        head = (
+            f"POST {path} HTTP/1.1\r\n"
+            f"Host: {host}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "\r\n"
+        )
+        writer.write(head.encode() + body)
+        await writer.drain()
+
+        status = int((await reader.readline()).split()[1])
+        length, keep_alive = 0, True
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode().partition(":")
+            name, value = name.strip().lower(), value.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "connection" and value == "close":
+                keep_alive = False
+        await reader.readexactly(length)
+        return status, keep_alive
+
+    async def _worker(self, url, queue, latencies, errors):
+        connection = None
+        while True:
+            try:
+                body = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            start = time.perf_counter()
+            try:
+                if connection is None:
+                    connection = await asyncio.open_connection(url.hostname, url.port)
+                status, keep_alive = await self._send(
+                    *connection, url.netloc, url.path, body
+                )
+                if status == 202:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors.append(status)
+                if not keep_alive:
+                    connection[1].close()
+                    connection = None
+            except (OSError, asyncio.IncompleteReadError, ValueError) as exc:
+                errors.append(type(exc).__name__)
+                connection = None
+        if connection is not None:
+            connection[1].close()
+
+    async def _run_target(self, url, bodies, concurrency):
+        queue = asyncio.Queue()
+        for body in bodies:
+            queue.put_nowait(body)
+        latencies, errors = [], []
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                self._worker(url, queue, latencies, errors)
+                for _ in range(min(concurrency, len(bodies)))
+            )
+        )
+        elapsed = time.perf_counter() - start
+        return elapsed, latencies, errors
+
+    def handle(self, *args, **options):
+        if min(options["requests"], options["concurrency"], options["batch_size"]) < 1:
+            raise CommandError(
+                "--requests, --concurrency and --batch-size must be >= 1"
+            )
+        targets = []
+        for target in options["target"]:
+            name, _, raw_url = target.partition("=")
+            url = urlsplit(raw_url)
+            if not name or url.scheme != "http" or not url.hostname:
+                raise CommandError(f"Invalid --target {target!r}, expected NAME=URL")
+            if url.port is None:
+                url = urlsplit(f"http://{url.hostname}:80{url.path}")
+            targets.append((name, url))
+
+        bodies = self._build_bodies(options["requests"], options["batch_size"])
+        self.stdout.write(
+            f"Sending {len(bodies)} requests x {options['batch_size']} reading(s) "
+            f"with {options['concurrency']} connections per target\n"
+        )
+        self.stdout.write(
+            f"{'target':<12}{'req/s':>10}{'readings/s':>12}"
+            f"{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}"
+        )
+
+        for name, url in targets:
+            elapsed, latencies, errors = asyncio.run(
+                self._run_target(url, bodies, options["concurrency"])
+            )
+            rps = len(latencies) / elapsed
+            # Percentiles need two successful requests
+            if len(latencies) >= 2:
+                quantiles = statistics.quantiles(latencies, n=100)
+                p50, p99 = (f"{quantiles[q] * 1000:.1f}" for q in (49, 98))
+            else:
+                p50 = p99 = "-"
+            self.stdout.write(
+                f"{name:<12}{rps:>10.0f}{rps * options['batch_size']:>12.0f}"
+                f"{p50:>10}{p99:>10}{len(errors):>8}"
+            )
+            if errors:
+                self.stdout.write(
+                    self.style.WARNING(f"{name}: first errors {errors[:5]}")
+                )
@@ -0,0 +1,185 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.telemetry.layout import (
+    DEFAULT_CHUNK_INTERVAL,
+    DEFAULT_ORDERBY,
+    Layout,
+    configured_layout,
+    create_hypertable,
+    enable_compression,
+    parse_layout,
+)
+from apps.telemetry.models import Telemetry
+
+SCRATCH_TABLE = "telemetry_layout_benchmark"
+
+RANGE_SQL = f"""
+    SELECT timestamp, value FROM {SCRATCH_TABLE}
+    WHERE device_id = %s AND timestamp >= %s AND timestamp < %s
+    ORDER BY timestamp DESC
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy a sample of recent telemetry into scratch hypertables with candidate "
+        "chunk intervals and compression settings, and report compression ratio "
+        "and per-device range scan latency for each"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--layout",
+            action="append",
+            help=(
+                'Candidate "INTERVAL|SEGMENTBY|ORDERBY", e.g. '
+                '"1 day|device_id|timestamp DESC"; repeat to compare. Defaults to '
+                "the configured layout and TimescaleDB's defaults"
+            ),
+        )
+        parser.add_argument(
+            "--sample-days",
+            type=int,
+            default=7,
+            help="Days of the newest telemetry copied into each candidate",
+        )
+        parser.add_argument(
+            "--queries",
+            type=int,
+            default=200,
+            help="Per-device range scans timed per candidate",
+        )
+        parser.add_argument(
+            "--window-hours",
+            type=float,
+            default=24,
+            help="Time range of each scan",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def _layouts(self, specs):
+        try:
+            if specs:
+                return [parse_layout(spec) for spec in specs]
+            return [
+                configured_layout(),
+                Layout(DEFAULT_CHUNK_INTERVAL, "", DEFAULT_ORDERBY),
+            ]
+        except ValueError as e:
+            raise CommandError(str(e))
+
+    def _sample_bounds(self, cursor, days):
+        cursor.execute(f"SELECT max(timestamp) FROM {Telemetry._meta.db_table}")
+        (newest,) = cursor.fetchone()
+        if newest is None:
+            raise CommandError("No telemetry to sample")
+        return newest - timedelta(days=days), newest
+
+    def _build_queries(self, cursor, start, end, count, window, seed):
+        """The same device/time ranges are scanned on every candidate."""
+        cursor.execute(
+            f"SELECT DISTINCT device_id FROM {Telemetry._meta.db_table} "
+            "WHERE timestamp >= %s AND timestamp <= %s",
+            [start, end],
+        )
+        devices = [row[0] for row in cursor.fetchall()]
+        rng = random.Random(seed)
+        span = max((end - start - window).total_seconds(), 0)
+        return [
+            (
+                rng.choice(devices),
+                start + timedelta(seconds=rng.uniform(0, span)),
+            )
+            for _ in range(count)
+        ]
+
+    def _load(self, cursor, layout, start, end):
+        table = Telemetry._meta.db_table
+        cursor.execute(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}")
+        cursor.execute(
+            f"CREATE TABLE {SCRATCH_TABLE} (LIKE {table} INCLUDING DEFAULTS)"
+        )
+        create_hypertable(cursor, SCRATCH_TABLE, layout)
+        cursor.execute(f"CREATE INDEX ON {SCRATCH_TABLE} (device_id, timestamp DESC)")
+        cursor.execute(
+            f"INSERT INTO {SCRATCH_TABLE} SELECT * FROM {table} "
+            "WHERE timestamp >= %s AND timestamp <= %s",
+            [start, end],
+        )
+        cursor.execute(f"ANALYZE {SCRATCH_TABLE}")
+
+    def _compress(self, cursor, layout):
+        enable_compression(cursor, SCRATCH_TABLE, layout)
+        cursor.execute(
+            "SELECT count(compress_chunk(chunk)) FROM show_chunks(%s) AS chunk",
+            [SCRATCH_TABLE],
+        )
+        (chunks,) = cursor.fetchone()
+        cursor.execute(f"ANALYZE {SCRATCH_TABLE}")
+        return chunks
+
+    def _size(self, cursor):
+        cursor.execute("SELECT hypertable_size(%s)", [SCRATCH_TABLE])
+        return cursor.fetchone()[0]
+
+    def _time_queries(self, cursor, queries, window):
+        # The first pass only warms the cache; the second one is reported
+        for _ in range(2):
+            latencies = []
+            for device_id, start in queries:
+                began = time.perf_counter()
+                cursor.execute(RANGE_SQL, [device_id, start, start + window])
+                cursor.fetchall()
+                latencies.append(time.perf_counter() - began)
+        if len(latencies) < 2:
+            return latencies[0] * 1000, latencies[0] * 1000
+        quantiles = statistics.quantiles(latencies, n=100)
+        return quantiles[49] * 1000, quantiles[98] * 1000
+
+    def handle(self, *args, **options):
+        layouts = self._layouts(options["layout"])
+        window = timedelta(hours=options["window_hours"])
+        if options["queries"] < 1:
+            raise CommandError("--queries must be at least 1")
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'")
+            if cursor.fetchone() is None:
+                raise CommandError("TimescaleDB is not installed in this database")
+
+            start, end = self._sample_bounds(cursor, options["sample_days"])
+            queries = self._build_queries(
+                cursor, start, end, options["queries"], window, options["seed"]
+            )
+            self.stdout.write(
+                f"Sample {start:%Y-%m-%d %H:%M} to {end:%Y-%m-%d %H:%M}, "
+                f"{len(queries)} scans of {options['window_hours']:g} hours\n"
+            )
+            self.stdout.write(
+                f"{'layout':<44}{'chunks':>7}{'raw MB':>9}{'comp MB':>9}"
+                f"{'ratio':>7}{'raw p50/p99 ms':>17}{'comp p50/p99 ms':>17}"
+            )
+
+            try:
+                for layout in layouts:
+                    self._load(cursor, layout, start, end)
+                    raw_size = self._size(cursor)
+                    raw_p50, raw_p99 = self._time_queries(cursor, queries, window)
+                    chunks = self._compress(cursor, layout)
+                    size = self._size(cursor)
+                    p50, p99 = self._time_queries(cursor, queries, window)
+                    self.stdout.write(
+                        f"{layout.label:<44}{chunks:>7}"
+                        f"{raw_size / 2**20:>9.1f}{size / 2**20:>9.1f}"
+                        f"{raw_size / max(size, 1):>7.1f}"
+                        f"{f'{raw_p50:.2f}/{raw_p99:.2f}':>17}"
+                        f"{f'{p50:.2f}/{p99:.2f}':>17}"
+                    )
+            finally:
+                cursor.execute(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}")
@@ -0,0 +1,103 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.telemetry.mqtt import (
+    MqttIngestBridge,
+    create_client,
+    default_client_id,
+    parse_broker_url,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Subscribe to telemetry topics on an MQTT broker and ingest the readings "
+        "through the same pipeline as POST /api/v1/telemetry"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--broker",
+            default=getattr(settings, "MQTT_BROKER_URL", "mqtt://localhost:1883"),
+            help="Broker URL, mqtt[s]://[user:password@]host[:port]",
+        )
+        parser.add_argument(
+            "--topic",
+            action="append",
+            help="Topic filter to subscribe to, repeatable",
+        )
+        parser.add_argument(
+            "--group",
+            default=getattr(settings, "MQTT_SHARED_GROUP", "iot-hub"),
+            help="Shared subscription group; empty subscribes every process to all",
+        )
+        parser.add_argument(
+            "--client-id",
+            default=getattr(settings, "MQTT_CLIENT_ID", "") or default_client_id(),
+            help=(
+                "Client id of the persistent session; unique per bridge and stable "
+                "across its restarts"
+            ),
+        )
+        parser.add_argument(
+            "--qos",
+            type=int,
+            choices=(0, 1),
+            default=getattr(settings, "MQTT_QOS", 1),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=getattr(settings, "MQTT_BATCH_SIZE", 500),
+            help="Readings ingested together",
+        )
+        parser.add_argument(
+            "--flush-ms",
+            type=int,
+            default=getattr(settings, "MQTT_FLUSH_MS", 200),
+            help="Ingest waiting readings at least this often",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            broker = parse_broker_url(options["broker"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        topics = options["topic"] or [
+            getattr(settings, "MQTT_TELEMETRY_TOPIC", "telemetry/#")
+        ]
+
+        # Unacknowledged messages are redelivered when this id reconnects
+        client = create_client(options["client_id"])
+        if broker["username"]:
+            client.username_pw_set(broker["username"], broker["password"])
+        if broker["tls"]:
+            client.tls_set()
+
+        bridge = MqttIngestBridge(
+            client,
+            topics,
+            shared_group=options["group"],
+            qos=options["qos"],
+            batch_size=options["batch_size"],
+            flush_interval=options["flush_ms"] / 1000,
+        )
+        signal.signal(signal.SIGTERM, lambda *_: client.disconnect())
+
+        # The loop makes the first connection, retrying while the broker is down
+        client.connect_async(broker["host"], broker["port"])
+        bridge.start()
+        self.stdout.write(
+            f"Ingesting {', '.join(topic for topic, _ in bridge.subscriptions())} "
+            f"from {broker['host']}:{broker['port']}"
+        )
+        try:
+            client.loop_forever(retry_first_connection=True)
+        except KeyboardInterrupt:
+            client.disconnect()
+        finally:
+            # Readings still waiting are ingested; their messages are acked only
+            # if the connection is still up, otherwise the broker redelivers them
+            bridge.close()
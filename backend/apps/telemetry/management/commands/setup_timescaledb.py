@@ -1,10 +1,18 @@
 import os
 import logging
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.db import connection
 from django.conf import settings
 from psycopg2 import ProgrammingError, OperationalError
 
+from apps.core.indexes import configured_indexes, sync_indexes
+from apps.telemetry.layout import (
+    configured_layout,
+    create_hypertable,
+    enable_compression,
+)
+from apps.telemetry.rollups import ROLLUPS, create_view_sql
+
 logger = logging.getLogger(__name__)
 
 
@@ -25,31 +33,21 @@ class Command(BaseCommand):
             if not isinstance(e, (ProgrammingError, OperationalError)):
                 raise
 
-    def _create_hypertable(self, cursor):
+    def _create_hypertable(self, cursor, layout):
         """Create TimescaleDB hypertable for telemetry data."""
-        cursor.execute(
-            """
-            SELECT create_hypertable(
-                'telemetry',
-                'timestamp',
-                if_not_exists => TRUE,
-                migrate_data => TRUE
-            );
-        """
+        create_hypertable(cursor, "telemetry", layout)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created hypertable for telemetry "
+                f"(chunk interval {layout.chunk_interval})"
+            )
         )
-        self.stdout.write(self.style.SUCCESS("Created hypertable for telemetry"))
 
     def _create_indexes(self, cursor):
-        """Create necessary indexes for telemetry data."""
-        cursor.execute(
-            """
-            CREATE INDEX IF NOT EXISTS idx_telemetry_payload_gin
-            ON telemetry USING gin (payload);
-        """
-        )
-        self.stdout.write(
-            self.style.SUCCESS("Created GIN index on payload JSONB column")
-        )
+        """Create the JSONB indexes configured for telemetry."""
+        actions = sync_indexes(cursor, configured_indexes(), tables={"telemetry"})
+        for action, name in actions:
+            self.stdout.write(self.style.SUCCESS(f"JSONB index {name}: {action}"))
 
     def _configure_retention(self, cursor):
         """Configure data retention policy for telemetry."""
@@ -59,6 +57,19 @@ class Command(BaseCommand):
             int(os.getenv("TELEMETRY_RETENTION_DAYS", "365")),
         )
 
+        if getattr(settings, "TELEMETRY_ARCHIVE_ENABLED", False):
+            # The policy could drop chunks before they are archived; the
+            # archive task drops them itself once they are on disk
+            cursor.execute(
+                "SELECT remove_retention_policy('telemetry', if_exists => TRUE);"
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Retention ({retention_days} days) enforced by the archive task"
+                )
+            )
+            return
+
         cursor.execute(
             """
             SELECT add_retention_policy(
@@ -73,9 +84,16 @@ class Command(BaseCommand):
             self.style.SUCCESS(f"Added retention policy: {retention_days} days")
         )
 
-    def _configure_compression(self, cursor):
+    def _configure_compression(self, cursor, layout):
         """Configure compression policy for telemetry data."""
         try:
+            enable_compression(cursor, "telemetry", layout)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Enabled compression (segmentby '{layout.segmentby}', "
+                    f"orderby '{layout.orderby}')"
+                )
+            )
             compression_days = getattr(
                 settings,
                 "TELEMETRY_COMPRESSION_DAYS",
@@ -107,16 +125,65 @@ class Command(BaseCommand):
                 )
             )
 
+    def _create_continuous_aggregates(self, cursor):
+        """Create the 1m/1h/1d per-device rollups and their refresh policies."""
+        for rollup in ROLLUPS:
+            cursor.execute(create_view_sql(rollup))
+            cursor.execute(
+                """
+                SELECT add_continuous_aggregate_policy(
+                    %s,
+                    start_offset => INTERVAL %s,
+                    end_offset => INTERVAL %s,
+                    schedule_interval => INTERVAL %s,
+                    if_not_exists => TRUE
+                );
+            """,
+                [
+                    rollup.view,
+                    rollup.refresh_start,
+                    rollup.refresh_end,
+                    rollup.refresh_every,
+                ],
+            )
+            self.stdout.write(
+                self.style.SUCCESS(f"Created continuous aggregate {rollup.view}")
+            )
+
+    def _refresh_continuous_aggregates(self, cursor):
+        """Materialize existing data; policies only cover recent buckets."""
+        # Finest first, each rollup is computed from the previous one
+        for rollup in ROLLUPS:
+            cursor.execute(
+                "CALL refresh_continuous_aggregate(%s, NULL, NULL);", [rollup.view]
+            )
+            self.stdout.write(self.style.SUCCESS(f"Refreshed {rollup.view}"))
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--skip-refresh",
+            action="store_true",
+            help="Do not materialize existing data into the continuous aggregates",
+        )
+
     def handle(self, *args, **options):
         """Main entry point for TimescaleDB setup."""
+        try:
+            layout = configured_layout()
+        except ValueError as e:
+            raise CommandError(f"Invalid telemetry layout settings: {e}")
+
         with connection.cursor() as cursor:
             self.stdout.write("Setting up TimescaleDB hypertables...")
 
             self._drop_constraints(cursor)
-            self._create_hypertable(cursor)
+            self._create_hypertable(cursor, layout)
             self._create_indexes(cursor)
             self._configure_retention(cursor)
-            self._configure_compression(cursor)
+            self._configure_compression(cursor, layout)
+            self._create_continuous_aggregates(cursor)
+            if not options["skip_refresh"]:
+                self._refresh_continuous_aggregates(cursor)
 
             self.stdout.write(
                 self.style.SUCCESS("\nTimescaleDB setup completed successfully!")
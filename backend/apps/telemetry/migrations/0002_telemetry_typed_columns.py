@@ -0,0 +1,28 @@
+# Generated by Django 5.2.10 on 2026-10-18 00:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("telemetry", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="telemetry",
+            name="metric",
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name="telemetry",
+            name="schema_version",
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name="telemetry",
+            name="value",
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.10 on 2026-10-18 00:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("devices", "0001_initial"),
+        ("telemetry", "0002_telemetry_typed_columns"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeviceLatestTelemetry",
+            fields=[
+                (
+                    "device",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="latest_telemetry",
+                        serialize=False,
+                        to="devices.device",
+                    ),
+                ),
+                ("timestamp", models.DateTimeField()),
+                ("value", models.FloatField(blank=True, null=True)),
+                ("metric", models.CharField(blank=True, max_length=20, null=True)),
+            ],
+            options={
+                "verbose_name_plural": "Device latest telemetry",
+                "db_table": "device_latest_telemetry",
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.10 on 2026-10-18 00:58
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("telemetry", "0003_device_latest_telemetry"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="telemetry",
+            name="idx_telemetry_payload_gin",
+        ),
+    ]
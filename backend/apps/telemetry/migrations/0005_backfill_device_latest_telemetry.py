@@ -0,0 +1,39 @@
+from django.db import migrations
+
+# One index probe per device over idx_telemetry_device_time, instead of a
+# DISTINCT ON over the whole hypertable. Rows from before the typed columns
+# were backfilled fall back to the numeric payload value.
+BACKFILL = """
+INSERT INTO device_latest_telemetry AS l (device_id, timestamp, value, metric)
+SELECT d.id, t.timestamp, t.value, t.metric
+FROM devices AS d
+CROSS JOIN LATERAL (
+    SELECT
+        timestamp,
+        COALESCE(
+            value,
+            CASE WHEN jsonb_typeof(payload -> 'value') = 'number'
+                THEN (payload ->> 'value')::double precision
+            END
+        ) AS value,
+        metric
+    FROM telemetry
+    WHERE device_id = d.id
+    ORDER BY timestamp DESC
+    LIMIT 1
+) AS t
+ON CONFLICT (device_id) DO UPDATE
+SET timestamp = EXCLUDED.timestamp, value = EXCLUDED.value, metric = EXCLUDED.metric
+WHERE l.timestamp < EXCLUDED.timestamp;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("telemetry", "0004_remove_jsonb_gin_indexes"),
+    ]
+
+    operations = [
+        migrations.RunSQL(BACKFILL, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -1,5 +1,4 @@
 from django.db import models
-from django.contrib.postgres.indexes import GinIndex
 
 from apps.devices.models import Device
 
@@ -15,6 +14,11 @@ class Telemetry(models.Model):
             'Schema: {"version": "0.0.1", "serial_number": "SN123456", ' '"value": 5.2}'
         )
     )
+    # Typed copies of payload fields, so aggregates and compression work on
+    # native columns. Filled at ingest; older rows by backfill_telemetry_values.
+    value = models.FloatField(null=True, blank=True)
+    metric = models.CharField(max_length=20, null=True, blank=True)
+    schema_version = models.CharField(max_length=20, null=True, blank=True)
 
     class Meta:
         db_table = "telemetry"
@@ -23,9 +27,29 @@ class Telemetry(models.Model):
             models.Index(
                 fields=["device", "timestamp"], name="idx_telemetry_device_time"
             ),
-            GinIndex(fields=["payload"], name="idx_telemetry_payload_gin"),
         ]
         verbose_name_plural = "Telemetry"
 
     def __str__(self):
         return f"Telemetry {self.id} - {self.device.name} at {self.timestamp}"
+
+
+class DeviceLatestTelemetry(models.Model):
+    """Newest reading per device, maintained by ingest for fleet overviews."""
+
+    device = models.OneToOneField(
+        Device,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="latest_telemetry",
+    )
+    timestamp = models.DateTimeField()
+    value = models.FloatField(null=True, blank=True)
+    metric = models.CharField(max_length=20, null=True, blank=True)
+
+    class Meta:
+        db_table = "device_latest_telemetry"
+        verbose_name_plural = "Device latest telemetry"
+
+    def __str__(self):
+        return f"Latest telemetry of {self.device_id} at {self.timestamp}"
@@ -0,0 +1,188 @@
+"""MQTT to telemetry ingest bridge.
+
+Subscribes to telemetry topics on a broker and feeds the messages into the
+same ``ingest_readings`` pipeline as ``POST /api/v1/telemetry``. A message
+body is one reading or a JSON array of readings, exactly like the HTTP body.
+
+Messages are collected and ingested together once ``batch_size`` readings
+are waiting or every ``flush_interval`` seconds. QoS 1 messages are
+acknowledged only after their batch is persisted, so a crashed bridge leaves
+them to be redelivered. That needs a persistent session: ``create_client``
+connects with a stable client id and ``clean_session=False``, so the broker
+resends the unacknowledged messages when that id reconnects.
+
+Subscribing through a shared subscription (``$share/<group>/<topic>``) lets
+the broker spread messages over every bridge process in the group.
+"""
+
+import json
+import logging
+import socket
+import threading
+from urllib.parse import urlsplit
+
+import paho.mqtt.client as mqtt
+from django.core.exceptions import ValidationError
+from django.db import InterfaceError, OperationalError
+
+from apps.core.flusher import PeriodicFlusher
+from config.metrics import TELEMETRY_MQTT_MESSAGES_TOTAL
+
+from .ingest import decode_batch, ingest_readings
+
+logger = logging.getLogger(__name__)
+
+
+def parse_broker_url(url):
+    """Split ``mqtt[s]://[user:password@]host[:port]`` into connection options."""
+    parts = urlsplit(url)
+    if parts.scheme not in ("mqtt", "mqtts") or not parts.hostname:
+        raise ValueError(f"Invalid MQTT broker URL {url!r}")
+    tls = parts.scheme == "mqtts"
+    return {
+        "host": parts.hostname,
+        "port": parts.port or (8883 if tls else 1883),
+        "username": parts.username,
+        "password": parts.password,
+        "tls": tls,
+    }
+
+
+def default_client_id():
+    """Client id stable across restarts of the same host or container."""
+    return f"iot-hub-ingest-{socket.gethostname()}"
+
+
+def create_client(client_id):
+    """Return a paho client for the bridge with a persistent broker session."""
+    return mqtt.Client(
+        mqtt.CallbackAPIVersion.VERSION2,
+        client_id=client_id,
+        clean_session=False,
+        manual_ack=True,
+    )
+
+
+def shared_topic(topic, group):
+    """Return the shared subscription filter for ``topic``, or ``topic`` itself."""
+    return f"$share/{group}/{topic}" if group else topic
+
+
+def decode_message(payload):
+    """Decode an MQTT payload into a list of raw readings."""
+    if payload.lstrip()[:1] == b"[":
+        return decode_batch(payload, "application/json")
+    try:
+        return [json.loads(payload)]
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise ValidationError("Invalid JSON body")
+
+
+class MqttIngestBridge(PeriodicFlusher):
+    """Batches readings from a paho-mqtt client into ``ingest_readings``.
+
+    The client must be created with ``manual_ack=True``; the bridge installs
+    its own ``on_connect`` and ``on_message`` callbacks.
+    """
+
+    thread_name = "mqtt-ingest"
+
+    def __init__(
+        self,
+        client,
+        topics,
+        shared_group="",
+        qos=1,
+        batch_size=500,
+        flush_interval=0.2,
+        ingest=ingest_readings,
+    ):
+        super().__init__(flush_interval)
+        self.client = client
+        self.topics = topics
+        self.shared_group = shared_group
+        self.qos = qos
+        self.batch_size = batch_size
+        self.ingest = ingest
+
+        self._items = []
+        self._acks = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+        client.on_connect = self._on_connect
+        client.on_message = self._on_message
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+    def subscriptions(self):
+        return [
+            (shared_topic(topic, self.shared_group), self.qos) for topic in self.topics
+        ]
+
+    def _on_connect(self, client, userdata, flags, reason_code, properties):
+        if reason_code.is_failure:
+            logger.error(
+                "telemetry.mqtt_connect_failed", extra={"reason": str(reason_code)}
+            )
+            return
+        # Subscribing on every connect restores subscriptions after a reconnect
+        client.subscribe(self.subscriptions())
+        logger.info(
+            "telemetry.mqtt_subscribed",
+            extra={"topics": [topic for topic, _ in self.subscriptions()]},
+        )
+
+    def _on_message(self, client, userdata, message):
+        try:
+            items = decode_message(message.payload)
+        except ValidationError:
+            logger.warning(
+                "telemetry.mqtt_message_invalid", extra={"topic": message.topic}
+            )
+            TELEMETRY_MQTT_MESSAGES_TOTAL.labels(result="invalid").inc()
+            client.ack(message.mid, message.qos)
+            return
+
+        TELEMETRY_MQTT_MESSAGES_TOTAL.labels(result="received").inc()
+        with self._lock:
+            self._items.extend(items)
+            self._acks.append((message.mid, message.qos))
+            depth = len(self._items)
+
+        if depth >= self.batch_size:
+            # Flushing on the network thread stops reading from the broker
+            # until the batch is written, which is the backpressure we want
+            self.flush("size")
+
+    def flush(self, reason="manual"):
+        """Ingest every waiting reading, then acknowledge their messages."""
+        with self._flush_lock:
+            with self._lock:
+                items, self._items = self._items, []
+                acks, self._acks = self._acks, []
+            if not acks:
+                return 0
+
+            try:
+                if items:
+                    self.ingest(items)
+            except (OperationalError, InterfaceError):
+                # Keep the messages unacknowledged and retry on the next flush
+                logger.exception(
+                    "telemetry.mqtt_flush_failed", extra={"readings": len(items)}
+                )
+                with self._lock:
+                    self._items[:0] = items
+                    self._acks[:0] = acks
+                return 0
+            except Exception:
+                logger.exception(
+                    "telemetry.mqtt_flush_rejected", extra={"readings": len(items)}
+                )
+
+            for mid, qos in acks:
+                self.client.ack(mid, qos)
+            return len(items)
@@ -0,0 +1,178 @@
+"""Per-device telemetry rollups backed by TimescaleDB continuous aggregates.
+
+``setup_timescaledb`` creates one continuous aggregate per ``Rollup``. The
+1-hour and 1-day aggregates are built on the next finer one (hierarchical
+aggregates), so refreshing them never rescans raw rows. They store ``sum``
+and ``count`` rather than ``avg`` so averages stay exact when rolled up.
+
+``query_rollups`` serves chart queries from the finest rollup that fits the
+caller's point budget. Without TimescaleDB (tests, plain Postgres) the same
+buckets are computed from the raw table.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from config.db_router import read_connection
+
+from .models import Telemetry
+
+# time_bucket() and date_bin() agree on this origin for minute/hour/day buckets
+BUCKET_ORIGIN = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class Rollup:
+    name: str
+    bucket: timedelta
+    interval: str
+    # Finer rollup this one is computed from; None means the raw table
+    source: "Rollup | None"
+    refresh_start: str
+    refresh_end: str
+    refresh_every: str
+
+    @property
+    def view(self):
+        return f"{Telemetry._meta.db_table}_{self.name}"
+
+
+ROLLUP_1M = Rollup(
+    "1m", timedelta(minutes=1), "1 minute", None, "2 hours", "1 minute", "1 minute"
+)
+ROLLUP_1H = Rollup(
+    "1h", timedelta(hours=1), "1 hour", ROLLUP_1M, "2 days", "1 hour", "30 minutes"
+)
+ROLLUP_1D = Rollup(
+    "1d", timedelta(days=1), "1 day", ROLLUP_1H, "7 days", "1 day", "1 hour"
+)
+
+# Finest first
+ROLLUPS = (ROLLUP_1M, ROLLUP_1H, ROLLUP_1D)
+
+
+def create_view_sql(rollup):
+    """``CREATE MATERIALIZED VIEW`` statement for a continuous aggregate."""
+    if rollup.source is None:
+        select = f"""
+            SELECT device_id,
+                   time_bucket(INTERVAL '{rollup.interval}', timestamp) AS bucket,
+                   min(value) AS min_value,
+                   max(value) AS max_value,
+                   sum(value) AS sum_value,
+                   count(value) AS count,
+                   last(value, timestamp) AS last_value
+            FROM {Telemetry._meta.db_table}
+            GROUP BY device_id, bucket
+        """
+    else:
+        select = f"""
+            SELECT device_id,
+                   time_bucket(INTERVAL '{rollup.interval}', bucket) AS bucket,
+                   min(min_value) AS min_value,
+                   max(max_value) AS max_value,
+                   sum(sum_value) AS sum_value,
+                   sum(count) AS count,
+                   last(last_value, bucket) AS last_value
+            FROM {rollup.source.view}
+            GROUP BY device_id, time_bucket(INTERVAL '{rollup.interval}', bucket)
+        """
+    # materialized_only = false adds not-yet-materialized rows at query time
+    return f"""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS {rollup.view}
+        WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+        {select}
+        WITH NO DATA
+    """
+
+
+def choose_rollup(start, end, max_points):
+    """Return the finest rollup whose bucket count for the window fits.
+
+    Falls back to the coarsest rollup when even that exceeds ``max_points``.
+    """
+    window = end - start
+    for rollup in ROLLUPS:
+        if window / rollup.bucket <= max_points:
+            return rollup
+    return ROLLUPS[-1]
+
+
+def align(moment, bucket, up=False):
+    """Round ``moment`` down (or up) to a bucket boundary."""
+    buckets, remainder = divmod(moment - BUCKET_ORIGIN, bucket)
+    if up and remainder:
+        buckets += 1
+    return BUCKET_ORIGIN + buckets * bucket
+
+
+def rollups_available():
+    """Whether the continuous aggregates exist in this database."""
+    with read_connection(Telemetry).cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM pg_class WHERE relname = ANY(%s)",
+            [[rollup.view for rollup in ROLLUPS]],
+        )
+        return cursor.fetchone()[0] == len(ROLLUPS)
+
+
+def _raw_sql():
+    return f"""
+        SELECT date_bin(%s::interval, timestamp, %s::timestamptz) AS bucket,
+               min(value), max(value), sum(value), count(value),
+               (array_agg(value ORDER BY timestamp DESC))[1]
+        FROM {Telemetry._meta.db_table}
+        WHERE device_id = %s AND timestamp >= %s AND timestamp < %s
+        GROUP BY 1
+        ORDER BY 1
+    """
+
+
+def _rollup_sql(rollup):
+    return f"""
+        SELECT bucket, min_value, max_value, sum_value, count, last_value
+        FROM {rollup.view}
+        WHERE device_id = %s AND bucket >= %s AND bucket < %s
+        ORDER BY bucket
+    """
+
+
+def query_rollups(device_id, start, end, max_points, use_rollups=None):
+    """Return ``(rollup, buckets)`` for one device over ``[start, end)``.
+
+    Every bucket overlapping the window is returned whole. Each bucket is a
+    dict with ``bucket``, ``min``, ``max``, ``avg``, ``count`` and ``last``;
+    buckets without readings are omitted.
+    """
+    rollup = choose_rollup(start, end, max_points)
+    start = align(start, rollup.bucket)
+    end = align(end, rollup.bucket, up=True)
+    return rollup, fetch_buckets(rollup, device_id, start, end, use_rollups)
+
+
+def fetch_buckets(rollup, device_id, start, end, use_rollups=None):
+    """Buckets of ``rollup`` in ``[start, end)``; both must be bucket-aligned."""
+    if use_rollups is None:
+        use_rollups = rollups_available()
+
+    with read_connection(Telemetry).cursor() as cursor:
+        if use_rollups:
+            cursor.execute(_rollup_sql(rollup), [device_id, start, end])
+        else:
+            cursor.execute(
+                _raw_sql(), [rollup.bucket, BUCKET_ORIGIN, device_id, start, end]
+            )
+        rows = cursor.fetchall()
+
+    return [
+        {
+            "bucket": bucket,
+            "min": min_value,
+            "max": max_value,
+            "avg": sum_value / count if count else None,
+            # sum() over the finer rollup's counts comes back as Decimal
+            "count": int(count),
+            "last": last_value,
+        }
+        for bucket, min_value, max_value, sum_value, count, last_value in rows
+    ]
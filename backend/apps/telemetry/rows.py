@@ -0,0 +1,38 @@
+"""Row type shared by every telemetry write path (COPY, buffer, stream)."""
+
+import json
+import uuid
+from datetime import datetime
+from typing import NamedTuple
+
+# Column order used by every bulk write into ``telemetry``
+COLUMNS = ("device_id", "timestamp", "payload", "value", "metric", "schema_version")
+
+
+class TelemetryRow(NamedTuple):
+    """A validated reading matched to its device, ready to be written."""
+
+    device_id: uuid.UUID
+    timestamp: datetime
+    payload: dict
+    metric: str | None = None
+
+    @property
+    def value(self):
+        """The payload value as a float, ``None`` if it is not numeric."""
+        value = self.payload.get("value")
+        return float(value) if isinstance(value, (int, float)) else None
+
+    def values(self, encode_payload=json.dumps):
+        """Return the row in ``COLUMNS`` order.
+
+        ``value`` and ``schema_version`` are typed copies of payload fields.
+        """
+        return (
+            self.device_id,
+            self.timestamp,
+            encode_payload(self.payload),
+            self.value,
+            self.metric,
+            self.payload.get("version"),
+        )
@@ -0,0 +1,14 @@
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from apps.devices.models import Device
+
+from .latest import forget_latest
+
+
+@receiver(post_delete, sender=Device)
+def forget_deleted_device(sender, instance, **kwargs):
+    """Drop the device from the latest-reading mirror; its row cascades."""
+    device_id = instance.pk
+    transaction.on_commit(lambda: forget_latest([device_id]))
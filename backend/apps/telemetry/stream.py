@@ -0,0 +1,317 @@
+"""Redis Streams queue between telemetry acceptance and persistence.
+
+With ``TELEMETRY_STREAM_ENABLED`` the ingest view appends validated rows to a
+Redis Stream and returns ``202`` without waiting for Postgres. Celery workers
+(``tasks.consume_telemetry_stream``) read the stream as members of one
+consumer group, write each batch with ``COPY`` and acknowledge it with one
+``XACK``. Entries left pending by a crashed worker are reclaimed with
+``XAUTOCLAIM`` once they have been idle for ``claim_idle_ms``.
+
+``XADD`` never trims, since that would discard accepted readings the group
+has not read. Instead workers delete the entries the group has acknowledged
+(``XTRIM MINID``), and once the stream holds ``maxlen`` entries ``append``
+refuses rows, which ingest then writes directly. Consumers idle for longer
+than ``consumer_idle_ms`` with nothing pending are removed from the group.
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime
+
+import redis
+from django.conf import settings
+from django.db import InterfaceError, OperationalError
+
+from config.metrics import (
+    CELERY_QUEUE_LENGTH,
+    TELEMETRY_STREAM_DROPPED_TOTAL,
+    TELEMETRY_STREAM_OVERFLOW_TOTAL,
+)
+
+from .rows import TelemetryRow
+
+logger = logging.getLogger(__name__)
+
+# Share of maxlen at which the backlog is reported as near capacity
+WARN_FRACTION = 0.8
+
+
+def consumer_name():
+    """Name this process uses in the consumer group."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class TelemetryStream:
+    """Producer and consumer side of the telemetry ingest stream."""
+
+    def __init__(
+        self,
+        client,
+        key,
+        group,
+        maxlen=1000000,
+        batch_size=500,
+        claim_idle_ms=60000,
+        consumer_idle_ms=3600000,
+    ):
+        self.redis = client
+        self.key = key
+        self.group = group
+        self.maxlen = maxlen
+        self.batch_size = batch_size
+        self.claim_idle_ms = claim_idle_ms
+        self.consumer_idle_ms = consumer_idle_ms
+        self._group_ready = False
+        # Set once an append saw the stream at maxlen
+        self._full = False
+
+    def append(self, rows):
+        """Queue ``TelemetryRow`` rows with one round trip.
+
+        Returns the number of rows queued, 0 when the stream is full.
+        """
+        if not rows:
+            return 0
+        if self._full and self.redis.xlen(self.key) >= self.maxlen:
+            TELEMETRY_STREAM_OVERFLOW_TOTAL.inc(len(rows))
+            return 0
+        with self.redis.pipeline(transaction=False) as pipe:
+            for row in rows:
+                pipe.xadd(
+                    self.key,
+                    {
+                        "device_id": str(row.device_id),
+                        "ts": row.timestamp.isoformat(),
+                        "payload": json.dumps(row.payload),
+                        "metric": row.metric or "",
+                    },
+                )
+            pipe.xlen(self.key)
+            length = pipe.execute()[-1]
+        self._full = length >= self.maxlen
+        if self._full:
+            logger.warning(
+                "telemetry.stream_full", extra={"length": length, "maxlen": self.maxlen}
+            )
+        return len(rows)
+
+    def ensure_group(self):
+        """Create the consumer group (and the stream) if it does not exist yet."""
+        if self._group_ready:
+            return
+        try:
+            self.redis.xgroup_create(self.key, self.group, id="0", mkstream=True)
+        except redis.ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+        self._group_ready = True
+
+    def reclaim(self, consumer, count=None):
+        """Take over entries another consumer read but never acknowledged."""
+        response = self.redis.xautoclaim(
+            self.key,
+            self.group,
+            consumer,
+            min_idle_time=self.claim_idle_ms,
+            start_id="0-0",
+            count=count or self.batch_size,
+        )
+        # Redis 7 also returns ids of entries that were trimmed meanwhile
+        return [entry for entry in response[1] if entry[1]]
+
+    def read(self, consumer, count=None, block=None):
+        """Read entries never delivered to any consumer of the group."""
+        response = self.redis.xreadgroup(
+            self.group,
+            consumer,
+            {self.key: ">"},
+            count=count or self.batch_size,
+            block=block,
+        )
+        return response[0][1] if response else []
+
+    def ack(self, entry_ids):
+        if entry_ids:
+            self.redis.xack(self.key, self.group, *entry_ids)
+
+    def backlog(self):
+        """Entries not yet written: undelivered (lag) plus delivered but unacked."""
+        for group in self.redis.xinfo_groups(self.key):
+            if _text(group["name"]) != self.group:
+                continue
+            lag = group.get("lag")
+            if lag is None:
+                # Lag is unknown after trimming past the group; fall back to length
+                lag = self.redis.xlen(self.key)
+            return lag + group["pending"]
+        return self.redis.xlen(self.key)
+
+    def consume(self, consumer, writer, block=None):
+        """Write one batch of entries and acknowledge it.
+
+        Reclaimed entries go first so a crashed worker's batch is not starved
+        by new traffic. Returns the number of entries acknowledged. Rows stay
+        pending (and are retried) when the database is unavailable; rows the
+        database rejects are acknowledged and dropped, like the write buffer.
+        A group lost with its stream is recreated; other Redis errors are
+        logged and count as an empty batch.
+        """
+        try:
+            entries = self._fetch(consumer, block)
+        except redis.RedisError as exc:
+            logger.warning("telemetry.stream_read_failed", extra={"error": str(exc)})
+            return 0
+        if not entries:
+            return 0
+
+        rows, entry_ids = [], []
+        for entry_id, fields in entries:
+            entry_ids.append(entry_id)
+            try:
+                rows.append(_decode(fields))
+            except (KeyError, ValueError):
+                logger.warning(
+                    "telemetry.stream_entry_invalid", extra={"entry_id": entry_id}
+                )
+                TELEMETRY_STREAM_DROPPED_TOTAL.inc()
+
+        try:
+            writer(rows)
+        except (OperationalError, InterfaceError):
+            logger.exception("telemetry.stream_write_failed", extra={"rows": len(rows)})
+            return 0
+        except Exception:
+            logger.exception("telemetry.stream_rows_dropped", extra={"rows": len(rows)})
+            TELEMETRY_STREAM_DROPPED_TOTAL.inc(len(rows))
+
+        try:
+            self.ack(entry_ids)
+        except redis.RedisError as exc:
+            # Written but still pending; redelivered once reclaimed
+            logger.warning("telemetry.stream_ack_failed", extra={"error": str(exc)})
+            return 0
+        return len(entry_ids)
+
+    def _fetch(self, consumer, block):
+        self.ensure_group()
+        try:
+            return self.reclaim(consumer) or self.read(consumer, block=block)
+        except redis.ResponseError as exc:
+            if "NOGROUP" not in str(exc):
+                raise
+        # The stream was lost (Redis restart without persistence, FLUSHDB) and
+        # XADD recreated it without the group
+        logger.warning(
+            "telemetry.stream_group_recreated",
+            extra={"stream": self.key, "group": self.group},
+        )
+        self._group_ready = False
+        self.ensure_group()
+        return self.reclaim(consumer) or self.read(consumer, block=block)
+
+    def trim(self):
+        """Delete the entries every consumer of the group has acknowledged."""
+        for group in self.redis.xinfo_groups(self.key):
+            if _text(group["name"]) != self.group:
+                continue
+            pending = self.redis.xpending(self.key, self.group)
+            oldest = pending["min"] if pending["pending"] else None
+            # MINID keeps the given id, so the last delivered entry stays
+            min_id = oldest or group["last-delivered-id"]
+            return self.redis.xtrim(self.key, minid=min_id, approximate=True)
+        return 0
+
+    def prune_consumers(self):
+        """Remove consumers idle past ``consumer_idle_ms`` with nothing pending.
+
+        Consumers still holding entries are kept until those are reclaimed,
+        deleting them would drop the entries from the pending list.
+        """
+        removed = []
+        for consumer in self.redis.xinfo_consumers(self.key, self.group):
+            if consumer["pending"] or consumer["idle"] < self.consumer_idle_ms:
+                continue
+            name = _text(consumer["name"])
+            self.redis.xgroup_delconsumer(self.key, self.group, name)
+            removed.append(name)
+        return removed
+
+    def maintain(self):
+        """Trim acknowledged entries and prune dead consumers."""
+        try:
+            self.trim()
+            removed = self.prune_consumers()
+        except redis.RedisError as exc:
+            logger.warning(
+                "telemetry.stream_maintain_failed", extra={"error": str(exc)}
+            )
+            return
+        if removed:
+            logger.info(
+                "telemetry.stream_consumers_pruned", extra={"consumers": removed}
+            )
+
+    def report_backlog(self):
+        """Publish the backlog to the ``celery_queue_length`` gauge."""
+        try:
+            backlog = self.backlog()
+        except redis.RedisError as exc:
+            logger.warning("telemetry.stream_backlog_failed", extra={"error": str(exc)})
+            return None
+        CELERY_QUEUE_LENGTH.labels(queue_name=self.key).set(backlog)
+        if backlog >= self.maxlen * WARN_FRACTION:
+            logger.warning(
+                "telemetry.stream_near_capacity",
+                extra={"backlog": backlog, "maxlen": self.maxlen},
+            )
+        return backlog
+
+
+def _text(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _decode(fields):
+    fields = {_text(key): _text(value) for key, value in fields.items()}
+    return TelemetryRow(
+        uuid.UUID(fields["device_id"]),
+        datetime.fromisoformat(fields["ts"]),
+        json.loads(fields["payload"]),
+        fields.get("metric") or None,
+    )
+
+
+_stream = None
+_stream_lock = threading.Lock()
+
+
+def get_telemetry_stream():
+    """Return the process-wide stream configured from settings."""
+    global _stream
+
+    if _stream is None:
+        with _stream_lock:
+            if _stream is None:
+                _stream = TelemetryStream(
+                    client=redis.Redis.from_url(
+                        getattr(settings, "TELEMETRY_STREAM_REDIS_URL", ""),
+                        socket_timeout=1,
+                    ),
+                    key=getattr(settings, "TELEMETRY_STREAM_KEY", "iot:telemetry"),
+                    group=getattr(
+                        settings, "TELEMETRY_STREAM_GROUP", "telemetry-writers"
+                    ),
+                    maxlen=getattr(settings, "TELEMETRY_STREAM_MAXLEN", 1000000),
+                    batch_size=getattr(settings, "TELEMETRY_STREAM_BATCH_SIZE", 500),
+                    claim_idle_ms=getattr(
+                        settings, "TELEMETRY_STREAM_CLAIM_IDLE_MS", 60000
+                    ),
+                    consumer_idle_ms=getattr(
+                        settings, "TELEMETRY_STREAM_CONSUMER_IDLE_MS", 3600000
+                    ),
+                )
+    return _stream
@@ -0,0 +1,36 @@
+from celery import shared_task
+
+from .archive import archive_expiring, drop_archived
+from .ingest import write_telemetry
+from .stream import consumer_name, get_telemetry_stream
+
+
+@shared_task(name="telemetry.consume_stream", ignore_result=True)
+def consume_telemetry_stream(max_batches=100):
+    """Drain the telemetry ingest stream into the ``telemetry`` table.
+
+    Scheduled by beat every ``TELEMETRY_STREAM_POLL_SECONDS``; several workers
+    can run it at once since each reads its own entries from the group.
+    """
+    stream = get_telemetry_stream()
+    consumer = consumer_name()
+    consumed = 0
+    for _ in range(max_batches):
+        count = stream.consume(consumer, write_telemetry)
+        if not count:
+            break
+        consumed += count
+    stream.maintain()
+    stream.report_backlog()
+    return consumed
+
+
+@shared_task(name="telemetry.archive_expiring", ignore_result=True)
+def archive_expiring_telemetry():
+    """Archive days about to expire to Parquet, then drop expired chunks.
+
+    Scheduled daily by beat when ``TELEMETRY_ARCHIVE_ENABLED`` is set.
+    """
+    archived = archive_expiring()
+    drop_archived()
+    return sum(rows for _, rows in archived)
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.urls import path
+
+from .views import (
+    telemetry_aggregates,
+    telemetry_collection,
+    telemetry_collection_async,
+    telemetry_export,
+    telemetry_latest,
+    telemetry_series,
+)
+
+# The ASGI deployment sets TELEMETRY_INGEST_ASYNC so ingest never blocks a thread
+collection_view = (
+    telemetry_collection_async
+    if getattr(settings, "TELEMETRY_INGEST_ASYNC", False)
+    else telemetry_collection
+)
+
+urlpatterns = [
+    path("telemetry", collection_view, name="telemetry-ingest"),
+    path("telemetry/aggregates", telemetry_aggregates, name="telemetry-aggregates"),
+    path("telemetry/export", telemetry_export, name="telemetry-export"),
+    path("telemetry/latest", telemetry_latest, name="telemetry-latest"),
+    path("telemetry/series", telemetry_series, name="telemetry-series"),
+]
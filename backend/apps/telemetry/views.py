@@ -0,0 +1,302 @@
+import json
+import uuid
+from datetime import timedelta, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import (
+    require_GET,
+    require_http_methods,
+    require_POST,
+)
+
+from apps.devices.models import Device
+
+from .aggregate_cache import query_aggregates
+from .archive import archive_batches
+from .async_ingest import aingest_readings
+from .downsampling import METHODS, downsample, series_chunks
+from .export import EXPORT_FORMATS, stream_batches, stream_export
+from .ingest import NDJSON_CONTENT_TYPES, decode_batch, ingest_readings
+from .latest import get_fleet_snapshot
+from .models import Telemetry
+from .pagination import telemetry_page
+
+DEFAULT_QUERY_WINDOW = timedelta(hours=24)
+DEFAULT_QUERY_POINTS = 500
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def _error(message, status=400):
+    return JsonResponse({"error": message}, status=status)
+
+
+def _decode_request(request):
+    """Return ``(items, is_batch)`` for an ingest request body."""
+    is_ndjson = request.content_type in NDJSON_CONTENT_TYPES
+    if not is_ndjson and request.body.lstrip()[:1] != b"[":
+        try:
+            return [json.loads(request.body)], False
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            raise ValidationError("Invalid JSON body")
+
+    try:
+        items = decode_batch(request.body, request.content_type)
+    except UnicodeDecodeError:
+        raise ValidationError("Invalid request body")
+
+    max_batch = getattr(settings, "TELEMETRY_INGEST_MAX_BATCH", 1000)
+    if not items:
+        raise ValidationError("Batch must contain at least one reading")
+    if len(items) > max_batch:
+        raise ValidationError(f"Batch must not contain more than {max_batch} readings")
+    return items, True
+
+
+def _ingest_response(results, is_batch):
+    if not is_batch:
+        result = results[0]
+        if result["status"] != "accepted":
+            return _error(result["error"])
+        return JsonResponse({"status": "accepted"}, status=202)
+
+    accepted = sum(1 for result in results if result["status"] == "accepted")
+    return JsonResponse(
+        {
+            "accepted": accepted,
+            "rejected": len(results) - accepted,
+            "results": results,
+        },
+        status=202,
+    )
+
+
+@csrf_exempt
+@require_POST
+def telemetry_ingest(request):
+    """Ingest a single reading (JSON object) or a batch (JSON array / NDJSON)."""
+    try:
+        items, is_batch = _decode_request(request)
+    except ValidationError as exc:
+        return _error(exc.message)
+    return _ingest_response(ingest_readings(items), is_batch)
+
+
+@csrf_exempt
+@require_POST
+async def telemetry_ingest_async(request):
+    """Async variant of ``telemetry_ingest`` served by the ASGI deployment."""
+    try:
+        items, is_batch = _decode_request(request)
+    except ValidationError as exc:
+        return _error(exc.message)
+    return _ingest_response(await aingest_readings(items), is_batch)
+
+
+@require_GET
+def telemetry_list(request):
+    """One page of telemetry, newest first, optionally for a single device.
+
+    Paginated with an opaque ``cursor`` rather than page numbers; the
+    response carries ``next_cursor`` and no total count.
+    """
+    device_id = request.GET.get("device_id")
+    if device_id is not None:
+        try:
+            device_id = uuid.UUID(device_id)
+        except ValueError:
+            return _error("device_id must be a device UUID")
+    try:
+        page_size = int(request.GET.get("page_size", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        page_size = 0
+    if not 0 < page_size <= MAX_PAGE_SIZE:
+        return _error(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+
+    try:
+        data, next_cursor = telemetry_page(
+            page_size, device_id=device_id, cursor=request.GET.get("cursor")
+        )
+    except ValidationError as exc:
+        return _error(exc.message)
+    return JsonResponse(
+        {
+            "data": data,
+            "pagination": {"page_size": page_size, "next_cursor": next_cursor},
+        }
+    )
+
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+def telemetry_collection(request):
+    """``/telemetry``: GET lists readings, POST ingests them."""
+    if request.method == "GET":
+        return telemetry_list(request)
+    return telemetry_ingest(request)
+
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+async def telemetry_collection_async(request):
+    """Async variant of ``telemetry_collection`` for the ASGI deployment."""
+    if request.method == "GET":
+        return await sync_to_async(telemetry_list)(request)
+    return await telemetry_ingest_async(request)
+
+
+def _parse_time(request, name, default):
+    raw = request.GET.get(name)
+    if raw is None:
+        return default
+    value = parse_datetime(raw)
+    if value is None:
+        raise ValidationError(f"{name} must be an ISO 8601 date-time")
+    if timezone.is_naive(value):
+        value = value.replace(tzinfo=dt_timezone.utc)
+    return value
+
+
+def _parse_query_window(request):
+    """Return ``(device_id, start, end, points)`` from the query string."""
+    try:
+        device_id = uuid.UUID(request.GET.get("device", ""))
+    except ValueError:
+        raise ValidationError("device must be a device UUID")
+
+    end = _parse_time(request, "to", timezone.now())
+    start = _parse_time(request, "from", end - DEFAULT_QUERY_WINDOW)
+    if start >= end:
+        raise ValidationError("from must be earlier than to")
+
+    max_points = getattr(settings, "TELEMETRY_QUERY_MAX_POINTS", 5000)
+    try:
+        points = int(request.GET.get("points", DEFAULT_QUERY_POINTS))
+    except ValueError:
+        points = 0
+    if not 0 < points <= max_points:
+        raise ValidationError(f"points must be between 1 and {max_points}")
+    return device_id, start, end, points
+
+
+@require_GET
+def telemetry_aggregates(request):
+    """Per-bucket min/max/avg/count/last for one device over a time window.
+
+    The resolution (1m, 1h or 1d) is the finest one that returns at most
+    ``points`` buckets.
+    """
+    try:
+        device_id, start, end, points = _parse_query_window(request)
+    except ValidationError as exc:
+        return _error(exc.message)
+    if not Device.objects.filter(pk=device_id).exists():
+        return _error("Device not found", status=404)
+
+    rollup, buckets = query_aggregates(device_id, start, end, points)
+    for bucket in buckets:
+        bucket["bucket"] = bucket["bucket"].isoformat()
+    return JsonResponse(
+        {
+            "device": str(device_id),
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "resolution": rollup.name,
+            "buckets": buckets,
+        }
+    )
+
+
+@require_GET
+def telemetry_series(request):
+    """A device's raw readings downsampled to at most ``points`` points.
+
+    ``method`` is ``lttb`` (default, keeps the line's shape) or ``minmax``
+    (keeps every bucket's extremes). Points are ``[epoch_ms, value]`` pairs.
+    """
+    try:
+        device_id, start, end, points = _parse_query_window(request)
+    except ValidationError as exc:
+        return _error(exc.message)
+    method = request.GET.get("method", METHODS[0])
+    if method not in METHODS:
+        return _error(f"method must be one of {', '.join(METHODS)}")
+    if not Device.objects.filter(pk=device_id).exists():
+        return _error("Device not found", status=404)
+
+    times, values, raw_count, method = downsample(
+        series_chunks(device_id, start, end), start, end, points, method
+    )
+    millis = (times * 1000).round().astype("int64")
+    return JsonResponse(
+        {
+            "device": str(device_id),
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "method": method,
+            "raw_count": raw_count,
+            "points": list(zip(millis.tolist(), values.tolist())),
+        }
+    )
+
+
+@require_GET
+def telemetry_export(request):
+    """Stream telemetry in a time window as CSV, NDJSON or Parquet.
+
+    ``device`` is optional; without it every device's readings are exported.
+    ``source=archive`` reads the Parquet cold storage instead of the table.
+    """
+    export_format = request.GET.get("format", "csv")
+    if export_format not in EXPORT_FORMATS:
+        return _error(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    try:
+        end = _parse_time(request, "to", timezone.now())
+        start = _parse_time(request, "from", end - DEFAULT_QUERY_WINDOW)
+    except ValidationError as exc:
+        return _error(exc.message)
+    if start >= end:
+        return _error("from must be earlier than to")
+
+    device_id = request.GET.get("device")
+    if device_id is not None:
+        try:
+            device_id = uuid.UUID(device_id)
+        except ValueError:
+            return _error("device must be a device UUID")
+
+    source = request.GET.get("source", "live")
+    if source == "archive":
+        return stream_batches(
+            archive_batches(start, end, device_id), export_format, "telemetry_archive"
+        )
+    if source != "live":
+        return _error("source must be live or archive")
+    queryset = Telemetry.objects.filter(
+        timestamp__gte=start, timestamp__lt=end
+    ).order_by("timestamp")
+    if device_id is not None:
+        queryset = queryset.filter(device_id=device_id)
+    return stream_export(queryset, export_format)
+
+
+@require_GET
+def telemetry_latest(request):
+    """Latest reading of every device, for wallboards and fleet overviews.
+
+    Served from ``device_latest_telemetry`` (or its Redis mirror) and
+    re-rendered at most once per ``TELEMETRY_LATEST_SNAPSHOT_TTL_SECONDS``.
+    """
+    body, etag = get_fleet_snapshot().get()
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    return response
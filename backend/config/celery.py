@@ -15,8 +15,12 @@ app.autodiscover_tasks()
 @signals.task_prerun.connect
 def task_prerun_handler(sender=None, task_id=None, task=None, **kwargs):
     """Record task start time for duration calculation."""
+    from config.db_router import reset_routing
     from config.metrics import CELERY_TASKS_TOTAL
 
+    # Each task picks its own replica and is pinned only by its own writes
+    reset_routing()
+
     # Store start time on task for duration calculation in postrun
     task._start_time = time.time()
 
@@ -0,0 +1,171 @@
+"""Route analytical reads to read replicas.
+
+``ReplicaRouter`` sends reads of telemetry and event models, and every read
+made while rendering an admin changelist (see ``replica_reads``), to one of
+the aliases in ``settings.DB_REPLICAS``. Everything else, and every write,
+uses ``default``.
+
+Routing state is kept per request (or Celery task) in a context variable:
+
+* one replica is chosen per request, so its reads see a single snapshot;
+* after the first write the request is pinned to ``default`` so it reads
+  its own writes. Writes made with raw SQL bypass the router and should
+  call ``pin_primary()`` themselves.
+
+Replicas lagging more than ``DB_REPLICA_MAX_LAG_SECONDS`` behind, or not
+reachable, are skipped; their lag is measured at most once per
+``DB_REPLICA_LAG_CHECK_SECONDS`` per process. Without a usable replica,
+reads fall back to ``default``. ``DB_REPLICA_READS = False`` turns replica
+reads off without removing the replicas from ``DATABASES``.
+"""
+
+import contextvars
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, router
+
+from .metrics import DB_REPLICA_LAG_SECONDS
+
+logger = logging.getLogger(__name__)
+
+REPLICA_APPS = {"telemetry", "events"}
+
+# Replay lag; zero when everything received has been replayed, since the
+# last replay timestamp of an idle primary's replica only grows
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+
+class _RoutingState:
+    __slots__ = ("replica", "pinned", "replica_reads")
+
+    def __init__(self):
+        self.replica = None
+        self.pinned = False
+        self.replica_reads = 0
+
+
+_state = contextvars.ContextVar("db_routing_state", default=None)
+
+
+def _current():
+    state = _state.get()
+    if state is None:
+        state = _RoutingState()
+        _state.set(state)
+    return state
+
+
+def reset_routing():
+    """Start a new unit of work: forget the replica choice and any pin."""
+    _state.set(_RoutingState())
+
+
+def pin_primary():
+    """Send the remaining reads of this request to ``default``."""
+    _current().pinned = True
+
+
+@contextmanager
+def replica_reads():
+    """Route every model's reads to a replica inside the block."""
+    state = _current()
+    state.replica_reads += 1
+    try:
+        yield
+    finally:
+        state.replica_reads -= 1
+
+
+class ReplicaMonitor:
+    """Measures replica lag and caches it for ``DB_REPLICA_LAG_CHECK_SECONDS``."""
+
+    def __init__(self):
+        self._lag = {}
+        self._checked = {}
+        self._lock = threading.Lock()
+
+    def lag(self, alias):
+        """Replay lag of ``alias`` in seconds, ``None`` when unreachable."""
+        interval = getattr(settings, "DB_REPLICA_LAG_CHECK_SECONDS", 5)
+        now = time.monotonic()
+        if now - self._checked.get(alias, float("-inf")) >= interval:
+            with self._lock:
+                if now - self._checked.get(alias, float("-inf")) >= interval:
+                    self._lag[alias] = self.measure(alias)
+                    self._checked[alias] = time.monotonic()
+        return self._lag[alias]
+
+    def measure(self, alias):
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(LAG_SQL)
+                (lag,) = cursor.fetchone()
+        except DatabaseError as exc:
+            logger.warning(
+                "db.replica_unavailable", extra={"alias": alias, "error": str(exc)}
+            )
+            return None
+        # NULL before the replica replayed its first transaction
+        lag = float(lag) if lag is not None else None
+        if lag is not None:
+            DB_REPLICA_LAG_SECONDS.labels(alias=alias).set(lag)
+        return lag
+
+    def healthy(self, aliases):
+        max_lag = getattr(settings, "DB_REPLICA_MAX_LAG_SECONDS", 5)
+        return [
+            alias
+            for alias in aliases
+            if (lag := self.lag(alias)) is not None and lag <= max_lag
+        ]
+
+
+_monitor = ReplicaMonitor()
+
+
+class ReplicaRouter:
+    """Reads of ``REPLICA_APPS`` go to a healthy replica, writes to ``default``."""
+
+    def __init__(self, monitor=None):
+        self.monitor = monitor or _monitor
+
+    def _replica(self, state):
+        if state.replica is None:
+            healthy = self.monitor.healthy(getattr(settings, "DB_REPLICAS", []))
+            # Without a healthy replica, stay on default for this request
+            state.replica = random.choice(healthy) if healthy else DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_read(self, model, **hints):
+        if not getattr(settings, "DB_REPLICA_READS", True):
+            return None
+        state = _current()
+        if state.pinned:
+            return DEFAULT_DB_ALIAS
+        if model._meta.app_label in REPLICA_APPS or state.replica_reads:
+            return self._replica(state)
+        return None
+
+    def db_for_write(self, model, **hints):
+        pin_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as default
+        return True
+
+
+def read_connection(model):
+    """Connection for raw SQL reads of ``model``'s tables."""
+    return connections[router.db_for_read(model)]
@@ -23,6 +23,12 @@ DB_CONNECTIONS = Gauge(
     ["database"],
 )
 
+DB_REPLICA_LAG_SECONDS = Gauge(
+    "django_db_replica_lag_seconds",
+    "Replay lag of a read replica when last measured",
+    ["alias"],
+)
+
 # Celery Queue Metrics
 CELERY_QUEUE_LENGTH = Gauge(
     "celery_queue_length",
@@ -42,3 +48,113 @@ CELERY_TASK_DURATION_SECONDS = Histogram(
     ["task_name"],
     buckets=(0.1, 0.5, 1.0, 5.0, 10.0),
 )
+
+# Telemetry Write Buffer Metrics
+TELEMETRY_BUFFER_FLUSH_ROWS = Histogram(
+    "telemetry_buffer_flush_rows",
+    "Rows written per telemetry write buffer flush",
+    ["reason"],
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 5000, 10000),
+)
+
+TELEMETRY_BUFFER_FLUSH_DURATION_SECONDS = Histogram(
+    "telemetry_buffer_flush_duration_seconds",
+    "Telemetry write buffer flush duration",
+    ["reason"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0),
+)
+
+TELEMETRY_BUFFER_ROWS = Gauge(
+    "telemetry_buffer_rows",
+    "Rows waiting in the telemetry write buffer",
+)
+
+TELEMETRY_BUFFER_DROPPED_TOTAL = Counter(
+    "telemetry_buffer_dropped_total",
+    "Rows dropped by the telemetry write buffer (full or rejected)",
+)
+
+# Telemetry Deduplication Metrics
+TELEMETRY_DEDUP_LOOKUPS_TOTAL = Counter(
+    "telemetry_dedup_lookups_total",
+    "Deduplication key lookups (hit = duplicate reading dropped)",
+    ["tier", "result"],
+)
+
+# Latest Telemetry Projection Metrics
+TELEMETRY_LATEST_UPSERT_DURATION_SECONDS = Histogram(
+    "telemetry_latest_upsert_duration_seconds",
+    "device_latest_telemetry upsert duration",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0),
+)
+
+# Telemetry Aggregate Cache Metrics
+TELEMETRY_AGG_CACHE_LOOKUPS_TOTAL = Counter(
+    "telemetry_agg_cache_lookups_total",
+    "Aggregate cache lookups (partial = only the buckets after a write recomputed)",
+    ["result"],
+)
+
+# Telemetry Ingest Stream Metrics
+TELEMETRY_STREAM_DROPPED_TOTAL = Counter(
+    "telemetry_stream_dropped_total",
+    "Telemetry stream entries acknowledged without being written",
+)
+
+TELEMETRY_STREAM_OVERFLOW_TOTAL = Counter(
+    "telemetry_stream_overflow_total",
+    "Rows written directly because the ingest stream was at its maxlen",
+)
+
+# MQTT Ingest Bridge Metrics
+TELEMETRY_MQTT_MESSAGES_TOTAL = Counter(
+    "telemetry_mqtt_messages_total",
+    "MQTT messages received by the ingest bridge",
+    ["result"],
+)
+
+# Cache Invalidation Metrics
+CACHE_INVALIDATIONS_TOTAL = Counter(
+    "cache_invalidations_total",
+    "Keys evicted on cache invalidation notifications from Postgres",
+    ["cache"],
+)
+
+# Rule Cooldown Metrics
+RULE_COOLDOWN_DECISIONS_TOTAL = Counter(
+    "rule_cooldown_decisions_total",
+    "Matched rules allowed to fire or suppressed by their cooldown",
+    ["result"],
+)
+
+RULE_LAST_TRIGGERED_FLUSH_RULES = Histogram(
+    "rule_last_triggered_flush_rules",
+    "Rules updated per last_triggered_at write-behind flush",
+    buckets=(1, 10, 100, 1000, 10000),
+)
+
+RULE_WINDOW_SNAPSHOT_RULES = Histogram(
+    "rule_window_snapshot_rules",
+    "Windowed rule states written per snapshot",
+    buckets=(1, 10, 100, 1000, 10000),
+)
+
+# Device Resolution Cache Metrics
+DEVICE_CACHE_LOOKUPS_TOTAL = Counter(
+    "device_cache_lookups_total",
+    "Serial number lookups in the device cache",
+    ["tier", "result"],
+)
+
+# Device last_seen Write-behind Metrics
+DEVICE_LAST_SEEN_FLUSH_DEVICES = Histogram(
+    "device_last_seen_flush_devices",
+    "Devices updated per last_seen write-behind flush",
+    buckets=(1, 10, 100, 1000, 10000, 50000),
+)
+
+DEVICE_LAST_SEEN_FLUSH_DURATION_SECONDS = Histogram(
+    "device_last_seen_flush_duration_seconds",
+    "last_seen write-behind flush duration",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0),
+)
@@ -3,21 +3,39 @@ import logging
 import time
 import uuid
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.conf import settings
 
+from .db_router import reset_routing
 from .logging import bind_request_context
 from .metrics import REQUEST_COUNT, REQUEST_LATENCY
 
 
 class RequestContextMiddleware:
+    """Assign a request id, bind logging context and record HTTP metrics.
+
+    Works in both sync (WSGI) and async (ASGI) stacks. Request state lives in
+    context variables, so concurrent requests on one event loop stay isolated.
+    """
+
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def _get_request_id(self, request):
         request_id = getattr(request, "request_id", None)
         if request_id:
             return request_id
 
+        header = getattr(settings, "REQUEST_ID_HEADER", "HTTP_X_REQUEST_ID")
+        request_id = request.META.get(header) if header else None
+        if request_id:
+            return request_id
+
         generator_path = getattr(
             settings,
             "REQUEST_ID_GENERATOR",
@@ -34,15 +52,14 @@ class RequestContextMiddleware:
             )
             return str(uuid.uuid4())
 
-    def __call__(self, request):
+    def _process_request(self, request):
         request.request_id = self._get_request_id(request)
         bind_request_context(request)
 
         # Record request start time for metrics
-        start_time = time.time()
-
-        response = self.get_response(request)
+        return time.time()
 
+    def _process_response(self, request, response, start_time):
         # Record request latency
         latency = time.time() - start_time
         REQUEST_LATENCY.labels(
@@ -63,3 +80,42 @@ class RequestContextMiddleware:
             response[header] = request_id
 
         return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        start_time = self._process_request(request)
+        response = self.get_response(request)
+        return self._process_response(request, response, start_time)
+
+    async def __acall__(self, request):
+        start_time = self._process_request(request)
+        response = await self.get_response(request)
+        return self._process_response(request, response, start_time)
+
+
+class DatabaseRoutingMiddleware:
+    """Start every request with fresh replica routing state.
+
+    Without it a worker thread would keep the replica choice, and the pin to
+    the primary after a write, of the previous request it served.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        reset_routing()
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        reset_routing()
+        return await self.get_response(request)
@@ -1,7 +1,9 @@
+import json
 import logging
 import os
 from pathlib import Path
 
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -33,9 +35,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
-    "request_id.middleware.RequestIdMiddleware",
-    "django.middleware.security.SecurityMiddleware",
     "config.middleware.RequestContextMiddleware",
+    "config.middleware.DatabaseRoutingMiddleware",
+    "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -82,6 +84,46 @@ DATABASES = {
 if os.getenv("DB_CONN_HEALTH_CHECKS", "False").lower() == "true":
     DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
 
+# Read replicas as "host[:port]" separated by commas, with the credentials of
+# default. config.db_router sends telemetry, event and admin changelist reads
+# to them unless they lag more than DB_REPLICA_MAX_LAG_SECONDS.
+DB_REPLICAS = []
+for _number, _replica in enumerate(
+    filter(None, os.getenv("DB_REPLICA_HOSTS", "").split(",")), start=1
+):
+    _host, _, _port = _replica.strip().partition(":")
+    DATABASES[f"replica_{_number}"] = {
+        **DATABASES["default"],
+        "HOST": _host,
+        "PORT": _port or DATABASES["default"]["PORT"],
+        "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+    }
+    DB_REPLICAS.append(f"replica_{_number}")
+DB_REPLICA_READS = os.getenv("DB_REPLICA_READS", "True").lower() in ("true", "1", "yes")
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+DB_REPLICA_LAG_CHECK_SECONDS = float(os.getenv("DB_REPLICA_LAG_CHECK_SECONDS", "5"))
+DATABASE_ROUTERS = ["config.db_router.ReplicaRouter"]
+
+# JSONB indexes maintained by manage.py sync_jsonb_indexes (apps/core/indexes.py)
+# rather than by migrations; the compose migrate service runs it after migrate.
+# Each entry has a name, table, index expression and optionally method (gin,
+# btree, hash) and a partial-index predicate. Replace the list with a JSON array
+# in JSONB_INDEXES; manage.py index_advisor shows which indexes are used.
+_jsonb_indexes = os.getenv("JSONB_INDEXES")
+JSONB_INDEXES = (
+    json.loads(_jsonb_indexes)
+    if _jsonb_indexes
+    else [
+        # telemetry_snapshot @> '{...}' containment filters. telemetry.payload
+        # is not indexed by default: every reading would write GIN entries
+        {
+            "name": "idx_event_telemetry_snap_path",
+            "table": "events",
+            "expression": "telemetry_snapshot jsonb_path_ops",
+        },
+    ]
+)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -113,7 +155,63 @@ MEDIA_ROOT = BASE_DIR / "media"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
-from .telemetry import TELEMETRY_RETENTION_DAYS  # noqa: E402
+from .telemetry import (  # noqa: E402
+    CACHE_INVALIDATION_LISTEN,
+    DEVICE_CACHE_MAX_SIZE,
+    DEVICE_CACHE_NEGATIVE_TTL,
+    DEVICE_CACHE_REDIS_TTL,
+    DEVICE_CACHE_REDIS_URL,
+    DEVICE_CACHE_TTL,
+    DEVICE_LAST_SEEN_FLUSH_SECONDS,
+    DEVICE_LAST_SEEN_WRITE_BEHIND,
+    MQTT_BATCH_SIZE,
+    MQTT_BROKER_URL,
+    MQTT_CLIENT_ID,
+    MQTT_FLUSH_MS,
+    MQTT_QOS,
+    MQTT_SHARED_GROUP,
+    MQTT_TELEMETRY_TOPIC,
+    RULE_COOLDOWN_REDIS_URL,
+    RULE_LAST_TRIGGERED_FLUSH_SECONDS,
+    RULE_WINDOW_MAX_SAMPLES,
+    RULE_WINDOW_SNAPSHOT_SECONDS,
+    TELEMETRY_AGG_CACHE_LIVE_TTL_SECONDS,
+    TELEMETRY_AGG_CACHE_MAX_BYTES,
+    TELEMETRY_AGG_CACHE_REDIS_URL,
+    TELEMETRY_ARCHIVE_DIR,
+    TELEMETRY_ARCHIVE_ENABLED,
+    TELEMETRY_ARCHIVE_LEAD_DAYS,
+    TELEMETRY_ASYNC_POOL_MAX_SIZE,
+    TELEMETRY_ASYNC_POOL_MIN_SIZE,
+    TELEMETRY_CHUNK_TIME_INTERVAL,
+    TELEMETRY_COMPRESS_ORDERBY,
+    TELEMETRY_COMPRESS_SEGMENTBY,
+    TELEMETRY_DEDUP_ENABLED,
+    TELEMETRY_DEDUP_MAX_KEYS,
+    TELEMETRY_DEDUP_REDIS_URL,
+    TELEMETRY_DEDUP_WINDOW_SECONDS,
+    TELEMETRY_INGEST_ASYNC,
+    TELEMETRY_INGEST_MAX_BATCH,
+    TELEMETRY_LATEST_FLUSH_SECONDS,
+    TELEMETRY_LATEST_REDIS_URL,
+    TELEMETRY_LATEST_SNAPSHOT_TTL_SECONDS,
+    TELEMETRY_LATEST_WRITE_BEHIND,
+    TELEMETRY_QUERY_MAX_POINTS,
+    TELEMETRY_RETENTION_DAYS,
+    TELEMETRY_STREAM_BATCH_SIZE,
+    TELEMETRY_STREAM_CLAIM_IDLE_MS,
+    TELEMETRY_STREAM_CONSUMER_IDLE_MS,
+    TELEMETRY_STREAM_ENABLED,
+    TELEMETRY_STREAM_GROUP,
+    TELEMETRY_STREAM_KEY,
+    TELEMETRY_STREAM_MAXLEN,
+    TELEMETRY_STREAM_POLL_SECONDS,
+    TELEMETRY_STREAM_REDIS_URL,
+    TELEMETRY_WRITE_BUFFER_ENABLED,
+    TELEMETRY_WRITE_BUFFER_FLUSH_MS,
+    TELEMETRY_WRITE_BUFFER_FLUSH_ROWS,
+    TELEMETRY_WRITE_BUFFER_MAX_ROWS,
+)
 
 LOGGING_BASE = {
     "version": 1,
@@ -179,6 +277,20 @@ LOGGING = LOGGING_BASE
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://redis:6379/0")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://redis:6379/0")
 
+CELERY_BEAT_SCHEDULE = {}
+if TELEMETRY_STREAM_ENABLED:
+    CELERY_BEAT_SCHEDULE["consume-telemetry-stream"] = {
+        "task": "telemetry.consume_stream",
+        "schedule": TELEMETRY_STREAM_POLL_SECONDS,
+        # Skip runs that waited longer than a poll interval in the broker
+        "options": {"expires": TELEMETRY_STREAM_POLL_SECONDS},
+    }
+if TELEMETRY_ARCHIVE_ENABLED:
+    CELERY_BEAT_SCHEDULE["archive-expiring-telemetry"] = {
+        "task": "telemetry.archive_expiring",
+        "schedule": crontab(hour=1, minute=30),
+    }
+
 REQUEST_ID_HEADER = "HTTP_X_REQUEST_ID"
 REQUEST_ID_RESPONSE_HEADER = "X-Request-ID"
 REQUEST_ID_GENERATOR = "request_id.uuid4"
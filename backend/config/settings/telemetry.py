@@ -2,5 +2,166 @@ import os
 
 TELEMETRY_RETENTION_DAYS = int(os.getenv("TELEMETRY_RETENTION_DAYS", "90"))
 
+# Hypertable layout applied by setup_timescaledb (apps/telemetry/layout.py).
+# Compare candidates with manage.py benchmark_layout before changing them.
+TELEMETRY_CHUNK_TIME_INTERVAL = os.getenv("TELEMETRY_CHUNK_TIME_INTERVAL", "7 days")
+TELEMETRY_COMPRESS_SEGMENTBY = os.getenv("TELEMETRY_COMPRESS_SEGMENTBY", "device_id")
+TELEMETRY_COMPRESS_ORDERBY = os.getenv("TELEMETRY_COMPRESS_ORDERBY", "timestamp DESC")
+
 # Number of recent telemetry records shown on Device detail page in admin
 DEVICE_TELEMETRY_INLINE_LIMIT = int(os.getenv("DEVICE_TELEMETRY_INLINE_LIMIT", "10"))
+
+# Maximum number of readings accepted in one batch ingest request
+TELEMETRY_INGEST_MAX_BATCH = int(os.getenv("TELEMETRY_INGEST_MAX_BATCH", "1000"))
+
+# Serve POST /api/v1/telemetry with the async view (ASGI deployments only)
+TELEMETRY_INGEST_ASYNC = os.getenv("TELEMETRY_INGEST_ASYNC", "False").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+
+# asyncpg pool used by the async ingest view, per worker process
+TELEMETRY_ASYNC_POOL_MIN_SIZE = int(os.getenv("TELEMETRY_ASYNC_POOL_MIN_SIZE", "1"))
+TELEMETRY_ASYNC_POOL_MAX_SIZE = int(os.getenv("TELEMETRY_ASYNC_POOL_MAX_SIZE", "10"))
+
+# In-process write buffer that micro-batches telemetry inserts (sync ingest path).
+# Rows are flushed when FLUSH_ROWS are queued or every FLUSH_MS milliseconds;
+# MAX_ROWS bounds memory if the database falls behind.
+TELEMETRY_WRITE_BUFFER_ENABLED = os.getenv(
+    "TELEMETRY_WRITE_BUFFER_ENABLED", "False"
+).lower() in ("true", "1", "yes")
+TELEMETRY_WRITE_BUFFER_FLUSH_ROWS = int(
+    os.getenv("TELEMETRY_WRITE_BUFFER_FLUSH_ROWS", "500")
+)
+TELEMETRY_WRITE_BUFFER_FLUSH_MS = int(os.getenv("TELEMETRY_WRITE_BUFFER_FLUSH_MS", "200"))
+TELEMETRY_WRITE_BUFFER_MAX_ROWS = int(
+    os.getenv("TELEMETRY_WRITE_BUFFER_MAX_ROWS", "50000")
+)
+
+# Serial number -> device cache used by ingest. The Redis tier is optional and
+# shared between processes; leave DEVICE_CACHE_REDIS_URL empty to disable it.
+DEVICE_CACHE_MAX_SIZE = int(os.getenv("DEVICE_CACHE_MAX_SIZE", "10000"))
+DEVICE_CACHE_TTL = int(os.getenv("DEVICE_CACHE_TTL", "60"))
+DEVICE_CACHE_NEGATIVE_TTL = int(os.getenv("DEVICE_CACHE_NEGATIVE_TTL", "30"))
+DEVICE_CACHE_REDIS_URL = os.getenv("DEVICE_CACHE_REDIS_URL", "")
+DEVICE_CACHE_REDIS_TTL = int(os.getenv("DEVICE_CACHE_REDIS_TTL", "300"))
+
+# Evict cached devices and rules in every process when they change anywhere,
+# admin bulk actions and raw SQL included: table triggers NOTIFY and each
+# process with a cache LISTENs on a dedicated connection
+# (apps/core/invalidation.py).
+CACHE_INVALIDATION_LISTEN = os.getenv("CACHE_INVALIDATION_LISTEN", "False").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+
+# Coalesce Device.last_seen updates in memory and write them every N seconds
+DEVICE_LAST_SEEN_WRITE_BEHIND = os.getenv(
+    "DEVICE_LAST_SEEN_WRITE_BEHIND", "False"
+).lower() in ("true", "1", "yes")
+DEVICE_LAST_SEEN_FLUSH_SECONDS = float(
+    os.getenv("DEVICE_LAST_SEEN_FLUSH_SECONDS", "5")
+)
+
+# Rule cooldown (apps/rules/cooldown.py). Set RULE_COOLDOWN_REDIS_URL to share
+# cooldowns between processes; last_triggered_at is written every FLUSH_SECONDS.
+RULE_COOLDOWN_REDIS_URL = os.getenv("RULE_COOLDOWN_REDIS_URL", "")
+RULE_LAST_TRIGGERED_FLUSH_SECONDS = float(
+    os.getenv("RULE_LAST_TRIGGERED_FLUSH_SECONDS", "5")
+)
+
+# Windowed rules (apps/rules/windows.py): state is snapshotted to Postgres every
+# SNAPSHOT_SECONDS; each rule buffers at most MAX_SAMPLES readings.
+RULE_WINDOW_SNAPSHOT_SECONDS = float(os.getenv("RULE_WINDOW_SNAPSHOT_SECONDS", "30"))
+RULE_WINDOW_MAX_SAMPLES = int(os.getenv("RULE_WINDOW_MAX_SAMPLES", "4096"))
+
+# Queue accepted readings on a Redis Stream and let Celery workers write them.
+# Workers read the stream in one consumer group and reclaim entries left
+# pending longer than CLAIM_IDLE_MS by a crashed worker. Readings are written
+# directly while the stream holds MAXLEN unacknowledged entries, and consumers
+# idle for CONSUMER_IDLE_MS with nothing pending leave the group.
+TELEMETRY_STREAM_ENABLED = os.getenv("TELEMETRY_STREAM_ENABLED", "False").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+TELEMETRY_STREAM_REDIS_URL = os.getenv(
+    "TELEMETRY_STREAM_REDIS_URL", "redis://redis:6379/1"
+)
+TELEMETRY_STREAM_KEY = os.getenv("TELEMETRY_STREAM_KEY", "iot:telemetry")
+TELEMETRY_STREAM_GROUP = os.getenv("TELEMETRY_STREAM_GROUP", "telemetry-writers")
+TELEMETRY_STREAM_MAXLEN = int(os.getenv("TELEMETRY_STREAM_MAXLEN", "1000000"))
+TELEMETRY_STREAM_BATCH_SIZE = int(os.getenv("TELEMETRY_STREAM_BATCH_SIZE", "500"))
+TELEMETRY_STREAM_CLAIM_IDLE_MS = int(
+    os.getenv("TELEMETRY_STREAM_CLAIM_IDLE_MS", "60000")
+)
+TELEMETRY_STREAM_CONSUMER_IDLE_MS = int(
+    os.getenv("TELEMETRY_STREAM_CONSUMER_IDLE_MS", "3600000")
+)
+TELEMETRY_STREAM_POLL_SECONDS = float(os.getenv("TELEMETRY_STREAM_POLL_SECONDS", "1"))
+
+# MQTT ingest bridge (manage.py ingest_mqtt). Bridges in the same shared
+# subscription group split the topic's messages between them.
+MQTT_BROKER_URL = os.getenv("MQTT_BROKER_URL", "mqtt://mosquitto:1883")
+MQTT_TELEMETRY_TOPIC = os.getenv("MQTT_TELEMETRY_TOPIC", "telemetry/#")
+MQTT_SHARED_GROUP = os.getenv("MQTT_SHARED_GROUP", "iot-hub")
+# Persistent session id; empty uses iot-hub-ingest-<hostname>
+MQTT_CLIENT_ID = os.getenv("MQTT_CLIENT_ID", "")
+MQTT_QOS = int(os.getenv("MQTT_QOS", "1"))
+MQTT_BATCH_SIZE = int(os.getenv("MQTT_BATCH_SIZE", "500"))
+MQTT_FLUSH_MS = int(os.getenv("MQTT_FLUSH_MS", "200"))
+
+# Drop retried readings (same message_id, or same device timestamp and payload)
+# seen within the last WINDOW_SECONDS. The Redis tier catches retries that land
+# on another process; leave TELEMETRY_DEDUP_REDIS_URL empty to disable it.
+TELEMETRY_DEDUP_ENABLED = os.getenv("TELEMETRY_DEDUP_ENABLED", "False").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+TELEMETRY_DEDUP_WINDOW_SECONDS = int(os.getenv("TELEMETRY_DEDUP_WINDOW_SECONDS", "600"))
+TELEMETRY_DEDUP_MAX_KEYS = int(os.getenv("TELEMETRY_DEDUP_MAX_KEYS", "100000"))
+TELEMETRY_DEDUP_REDIS_URL = os.getenv("TELEMETRY_DEDUP_REDIS_URL", "")
+
+# Upper bound on the points a chart query may ask for
+TELEMETRY_QUERY_MAX_POINTS = int(os.getenv("TELEMETRY_QUERY_MAX_POINTS", "5000"))
+
+# Redis cache of aggregate query results (apps/telemetry/aggregate_cache.py);
+# empty TELEMETRY_AGG_CACHE_REDIS_URL disables it. Windows reaching past now
+# expire after LIVE_TTL_SECONDS, the total size of entries is capped at
+# MAX_BYTES.
+TELEMETRY_AGG_CACHE_REDIS_URL = os.getenv("TELEMETRY_AGG_CACHE_REDIS_URL", "")
+TELEMETRY_AGG_CACHE_LIVE_TTL_SECONDS = int(
+    os.getenv("TELEMETRY_AGG_CACHE_LIVE_TTL_SECONDS", "60")
+)
+TELEMETRY_AGG_CACHE_MAX_BYTES = int(
+    os.getenv("TELEMETRY_AGG_CACHE_MAX_BYTES", str(64 * 2**20))
+)
+
+# Newest reading per device (device_latest_telemetry) for fleet overviews.
+# With WRITE_BEHIND the upsert is coalesced and done every FLUSH_SECONDS.
+# Set TELEMETRY_LATEST_REDIS_URL to mirror it in Redis; the snapshot endpoint
+# is re-rendered at most once per SNAPSHOT_TTL_SECONDS per process.
+TELEMETRY_LATEST_WRITE_BEHIND = os.getenv(
+    "TELEMETRY_LATEST_WRITE_BEHIND", "False"
+).lower() in ("true", "1", "yes")
+TELEMETRY_LATEST_FLUSH_SECONDS = float(os.getenv("TELEMETRY_LATEST_FLUSH_SECONDS", "1"))
+TELEMETRY_LATEST_REDIS_URL = os.getenv("TELEMETRY_LATEST_REDIS_URL", "")
+TELEMETRY_LATEST_SNAPSHOT_TTL_SECONDS = float(
+    os.getenv("TELEMETRY_LATEST_SNAPSHOT_TTL_SECONDS", "1")
+)
+
+# Parquet cold storage (apps/telemetry/archive.py). Days expiring within
+# LEAD_DAYS are archived daily; with archiving enabled the archive task drops
+# chunks past TELEMETRY_RETENTION_DAYS itself instead of the retention policy.
+TELEMETRY_ARCHIVE_ENABLED = os.getenv("TELEMETRY_ARCHIVE_ENABLED", "False").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+TELEMETRY_ARCHIVE_DIR = os.getenv(
+    "TELEMETRY_ARCHIVE_DIR", "/var/lib/iot-hub/telemetry-archive"
+)
+TELEMETRY_ARCHIVE_LEAD_DAYS = int(os.getenv("TELEMETRY_ARCHIVE_LEAD_DAYS", "2"))
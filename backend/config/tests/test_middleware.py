@@ -0,0 +1,34 @@
+from asgiref.sync import iscoroutinefunction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from config.logging import _context
+from config.middleware import RequestContextMiddleware
+
+
+class RequestContextMiddlewareTest(SimpleTestCase):
+    def test_sync_request_id_from_header(self):
+        """Verify the incoming X-Request-ID is reused and echoed back"""
+        middleware = RequestContextMiddleware(lambda request: HttpResponse("ok"))
+        request = RequestFactory().get("/", HTTP_X_REQUEST_ID="req-123")
+
+        response = middleware(request)
+
+        self.assertFalse(iscoroutinefunction(middleware))
+        self.assertEqual(response["X-Request-ID"], "req-123")
+        self.assertEqual(_context.request_id.get(), "req-123")
+
+    async def test_async_request_id_generated(self):
+        """Verify the middleware runs natively in an async stack"""
+
+        async def get_response(request):
+            return HttpResponse(_context.request_id.get())
+
+        middleware = RequestContextMiddleware(get_response)
+        request = RequestFactory().get("/")
+
+        response = await middleware(request)
+
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertTrue(response["X-Request-ID"])
+        self.assertEqual(response.content.decode(), response["X-Request-ID"])
@@ -3,5 +3,6 @@ from django.urls import path, include
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("api/v1/", include("apps.telemetry.urls")),
     path("", include("apps.core.urls")),
 ]
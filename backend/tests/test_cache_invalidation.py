@@ -0,0 +1,112 @@
+import json
+import select
+import threading
+import uuid
+from unittest import mock
+
+from django.test import SimpleTestCase, TransactionTestCase
+from django.utils import timezone
+
+from apps.core.invalidation import CHANNEL, InvalidationListener, _connect, _handlers
+from apps.devices.models import Device, DeviceType
+from apps.rules.engine import RuleIndex
+from apps.rules.models import Rule
+
+
+class InvalidationTriggerTest(TransactionTestCase):
+    """Test the table triggers notify only changes of cached columns."""
+
+    def setUp(self):
+        self.device_type = DeviceType.objects.create(
+            name="Notify Sensor", metric_name="temperature", metric_unit="°C"
+        )
+        self.device = Device.objects.create(
+            device_type=self.device_type, name="Notify", serial_number="NOTIFY-SN-1"
+        )
+        self.rule = Rule.objects.create(
+            device=self.device,
+            name="Notify rule",
+            comparison_operator="gt",
+            threshold=1,
+            action_config=[],
+        )
+        self.conn = _connect()
+        self.addCleanup(self.conn.close)
+        with self.conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+
+    def notifications(self):
+        messages = []
+        while select.select([self.conn], [], [], 0.2)[0]:
+            self.conn.poll()
+            while self.conn.notifies:
+                messages.append(json.loads(self.conn.notifies.pop(0).payload))
+        return messages
+
+    def test_cached_column_changes_notify(self):
+        """Test update() of cached columns notifies their keys, other writes not"""
+        # The admin bulk actions
+        Rule.objects.filter(pk=self.rule.pk).update(is_enabled=False)
+        Device.objects.filter(pk=self.device.pk).update(status="inactive")
+        DeviceType.objects.filter(pk=self.device_type.pk).update(metric_max=50)
+        # Frequent writes of uncached columns
+        Device.objects.filter(pk=self.device.pk).update(last_seen=timezone.now())
+        Rule.objects.filter(pk=self.rule.pk).update(last_triggered_at=timezone.now())
+
+        self.assertEqual(
+            self.notifications(),
+            [
+                {"cache": "rules", "keys": [str(self.device.pk)] * 2},
+                {"cache": "devices", "keys": ["NOTIFY-SN-1"] * 2},
+                {"cache": "device_types", "keys": [str(self.device_type.pk)] * 2},
+            ],
+        )
+
+    def test_listener_dispatches_to_handler(self):
+        """Test a running listener evicts the notified keys"""
+        received = []
+        cleared, called = threading.Event(), threading.Event()
+
+        def handler(keys):
+            received.append(keys)
+            (cleared if keys is None else called).set()
+
+        listener = InvalidationListener({"rules": handler}, poll_interval=0.1)
+        listener.start()
+        self.addCleanup(listener.close)
+        # Connecting clears the cache first
+        self.assertTrue(cleared.wait(5))
+
+        Rule.objects.filter(pk=self.rule.pk).update(threshold=5)
+
+        self.assertTrue(called.wait(5))
+        self.assertEqual(received, [None, [str(self.device.pk)] * 2])
+
+
+class InvalidationDispatchTest(SimpleTestCase):
+    """Test payload handling and the rule index handler."""
+
+    def test_rules_handler_evicts_device(self):
+        """Test a rules notification drops only that device from the index"""
+        device_id, other = uuid.uuid4(), uuid.uuid4()
+        index = RuleIndex(loader=lambda device_ids: {})
+        index.rules_for([device_id, other])
+
+        with mock.patch("apps.rules.signals.get_rule_index", return_value=index):
+            InvalidationListener(_handlers).dispatch(
+                json.dumps({"cache": "rules", "keys": [str(device_id), None]})
+            )
+
+        self.assertEqual(len(index), 1)
+        self.assertIn(other, index.rules_for([other]))
+
+    def test_malformed_payload_ignored(self):
+        """Test unknown caches and bad payloads do not raise"""
+        handler = mock.Mock()
+        listener = InvalidationListener({"rules": handler})
+
+        listener.dispatch("not json")
+        listener.dispatch(json.dumps({"cache": "other", "keys": ["x"]}))
+        listener.dispatch(json.dumps({"cache": "rules"}))
+
+        handler.assert_not_called()
@@ -0,0 +1,176 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.devices.models import Device, DeviceType
+from apps.telemetry.models import Telemetry
+from config.db_router import (
+    ReplicaMonitor,
+    ReplicaRouter,
+    pin_primary,
+    replica_reads,
+    reset_routing,
+)
+
+User = get_user_model()
+
+
+class StubMonitor:
+    def __init__(self, healthy):
+        self._healthy = healthy
+
+    def healthy(self, aliases):
+        return [alias for alias in aliases if alias in self._healthy]
+
+
+class CountingMonitor(ReplicaMonitor):
+    def __init__(self, lags):
+        super().__init__()
+        self.lags = lags
+        self.measured = []
+
+    def measure(self, alias):
+        self.measured.append(alias)
+        return self.lags[alias]
+
+
+@override_settings(DB_REPLICAS=["replica_1", "replica_2"], DB_REPLICA_READS=True)
+class ReplicaRouterTest(SimpleTestCase):
+    """Test routing decisions without replica connections."""
+
+    def setUp(self):
+        reset_routing()
+        self.addCleanup(reset_routing)
+        self.router = ReplicaRouter(StubMonitor({"replica_1", "replica_2"}))
+
+    def test_telemetry_and_event_reads_use_one_replica(self):
+        """Test analytical reads stick to one replica per request"""
+        replica = self.router.db_for_read(Telemetry)
+        self.assertIn(replica, ("replica_1", "replica_2"))
+        for _ in range(10):
+            self.assertEqual(self.router.db_for_read(Telemetry), replica)
+        self.assertIsNone(self.router.db_for_read(Device))
+
+    def test_read_your_writes(self):
+        """Test reads after a write in the same request go to the primary"""
+        self.assertNotEqual(self.router.db_for_read(Telemetry), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.router.db_for_write(Device), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.router.db_for_read(Telemetry), DEFAULT_DB_ALIAS)
+
+        reset_routing()
+        self.assertNotEqual(self.router.db_for_read(Telemetry), DEFAULT_DB_ALIAS)
+        pin_primary()
+        self.assertEqual(self.router.db_for_read(Telemetry), DEFAULT_DB_ALIAS)
+
+    def test_replica_reads_block(self):
+        """Test every model is read from a replica inside replica_reads()"""
+        with replica_reads():
+            self.assertNotEqual(self.router.db_for_read(Device), DEFAULT_DB_ALIAS)
+        self.assertIsNone(self.router.db_for_read(Device))
+
+    def test_no_healthy_replica(self):
+        """Test reads fall back to the primary when every replica lags"""
+        router = ReplicaRouter(StubMonitor(set()))
+        self.assertEqual(router.db_for_read(Telemetry), DEFAULT_DB_ALIAS)
+
+    @override_settings(DB_REPLICA_READS=False)
+    def test_disabled(self):
+        """Test DB_REPLICA_READS turns replica reads off"""
+        self.assertIsNone(self.router.db_for_read(Telemetry))
+
+    @override_settings(DB_REPLICA_MAX_LAG_SECONDS=5, DB_REPLICA_LAG_CHECK_SECONDS=60)
+    def test_monitor(self):
+        """Test lagging and unreachable replicas are skipped, lag is cached"""
+        monitor = CountingMonitor(
+            {"replica_1": 1.5, "replica_2": 30.0, "replica_3": None}
+        )
+        aliases = ["replica_1", "replica_2", "replica_3"]
+        self.assertEqual(monitor.healthy(aliases), ["replica_1"])
+        self.assertEqual(monitor.healthy(aliases), ["replica_1"])
+        self.assertEqual(monitor.measured, aliases)
+
+        with override_settings(DB_REPLICA_LAG_CHECK_SECONDS=0):
+            monitor.lags["replica_2"] = 0.0
+            self.assertEqual(monitor.healthy(aliases), ["replica_1", "replica_2"])
+
+
+@skipUnless("replica_1" in settings.DATABASES, "set DB_REPLICA_HOSTS")
+@override_settings(
+    DB_REPLICAS=["replica_1"],
+    DB_REPLICA_READS=True,
+    DB_REPLICA_MAX_LAG_SECONDS=5,
+    DB_REPLICA_LAG_CHECK_SECONDS=0,
+)
+class ReplicaRoutingIntegrationTest(TestCase):
+    """Test routing against a second Postgres instance configured as replica_1.
+
+    The instance is not a real replica, so the rows it should have received
+    by replication are written to it directly.
+    """
+
+    databases = {DEFAULT_DB_ALIAS, "replica_1"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.devices = {}
+        for alias in (DEFAULT_DB_ALIAS, "replica_1"):
+            device_type = DeviceType.objects.using(alias).create(
+                name="Replica Sensor", metric_name="temperature"
+            )
+            cls.devices[alias] = Device.objects.using(alias).create(
+                device_type=device_type,
+                name=f"Device on {alias}",
+                serial_number=f"REPLICA-SN-{alias}",
+            )
+            Telemetry.objects.using(alias).create(
+                device=cls.devices[alias],
+                payload={"version": "1.0", "value": 1},
+                value=1,
+            )
+        cls.admin_user = User.objects.create_superuser(
+            username="replica_admin", email="replica@test.com", password="pass12345"
+        )
+
+    def setUp(self):
+        reset_routing()
+        self.addCleanup(reset_routing)
+
+    def test_reads_go_to_replica(self):
+        """Test telemetry is read from the replica, devices from the primary"""
+        self.assertEqual(
+            Telemetry.objects.get().device_id, self.devices["replica_1"].pk
+        )
+        self.assertEqual(Device.objects.get().pk, self.devices[DEFAULT_DB_ALIAS].pk)
+
+    def test_read_your_writes(self):
+        """Test a write pins the rest of the request to the primary"""
+        Device.objects.filter(pk=self.devices[DEFAULT_DB_ALIAS].pk).update(
+            name="Renamed"
+        )
+        self.assertEqual(
+            Telemetry.objects.get().device_id, self.devices[DEFAULT_DB_ALIAS].pk
+        )
+
+    @override_settings(DB_REPLICA_MAX_LAG_SECONDS=-1)
+    def test_lagging_replica_skipped(self):
+        """Test a replica over the lag budget is not used"""
+        self.assertEqual(
+            Telemetry.objects.get().device_id, self.devices[DEFAULT_DB_ALIAS].pk
+        )
+
+    def test_api_reads_replica(self):
+        """Test each request routes its own reads"""
+        response = self.client.get("/api/v1/telemetry")
+        self.assertEqual(
+            [row["ssn"] for row in response.json()["data"]], ["REPLICA-SN-replica_1"]
+        )
+
+    def test_admin_changelist_reads_replica(self):
+        """Test admin changelists of any model are rendered from the replica"""
+        self.client.force_login(self.admin_user)
+        response = self.client.get("/admin/devices/device/")
+        self.assertContains(response, "Device on replica_1")
+        self.assertNotContains(response, "Device on default")
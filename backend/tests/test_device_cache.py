@@ -0,0 +1,184 @@
+import time
+import uuid
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from apps.devices.cache import DeviceCache, DeviceInfo, get_device_cache
+from apps.devices.models import Device, DeviceType
+
+
+def make_info(**overrides):
+    data = {
+        "id": uuid.uuid4(),
+        "status": "active",
+        "device_type_id": uuid.uuid4(),
+        "metric_name": "temperature",
+        "metric_min": -10.0,
+        "metric_max": 120.0,
+    }
+    data.update(overrides)
+    return DeviceInfo(**data)
+
+
+class FakeRedis:
+    """Dict-backed stand-in for the few redis commands the cache uses."""
+
+    def __init__(self):
+        self.store = {}
+
+    def mget(self, keys):
+        return [self.store.get(key) for key in keys]
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value.encode()
+
+    def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+    def scan_iter(self, match, count=None):
+        prefix = match.rstrip("*")
+        return [key for key in list(self.store) if key.startswith(prefix)]
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class DeviceCacheTest(SimpleTestCase):
+    """Test the local and Redis tiers of the device cache."""
+
+    def setUp(self):
+        self.info = make_info()
+        self.loader = mock.Mock(return_value={"SN-1": self.info})
+
+    def test_local_hit_skips_loader(self):
+        """Test repeated lookups are served from the local tier"""
+        cache = DeviceCache(loader=self.loader)
+        self.assertEqual(cache.get_many({"SN-1"}), {"SN-1": self.info})
+        self.assertEqual(cache.get_many({"SN-1"}), {"SN-1": self.info})
+        self.loader.assert_called_once_with({"SN-1"})
+
+    def test_unknown_serials_are_negatively_cached(self):
+        """Test unknown serials hit the loader only once"""
+        cache = DeviceCache(loader=self.loader)
+        for _ in range(3):
+            self.assertEqual(cache.get_many({"SN-1", "UNKNOWN"}), {"SN-1": self.info})
+        self.loader.assert_called_once()
+
+    def test_entries_expire(self):
+        """Test entries are reloaded after their TTL"""
+        cache = DeviceCache(loader=self.loader, ttl=0.01)
+        cache.get_many({"SN-1"})
+        time.sleep(0.02)
+        cache.get_many({"SN-1"})
+        self.assertEqual(self.loader.call_count, 2)
+
+    def test_lru_eviction(self):
+        """Test the local tier stays within max_size"""
+        cache = DeviceCache(loader=self.loader, max_size=2)
+        cache.store_local({"A": self.info, "B": self.info})
+        cache.get_local({"A"})
+        cache.store_local({"C": self.info})
+
+        found, misses = cache.get_local({"A", "B", "C"})
+        self.assertEqual(set(found), {"A", "C"})
+        self.assertEqual(misses, {"B"})
+
+    def test_redis_tier_shared_between_processes(self):
+        """Test a second process resolves from Redis instead of the database"""
+        shared = FakeRedis()
+        DeviceCache(loader=self.loader, redis_client=shared).get_many(
+            {"SN-1", "UNKNOWN"}
+        )
+
+        other_loader = mock.Mock(return_value={})
+        other = DeviceCache(loader=other_loader, redis_client=shared)
+        self.assertEqual(other.get_many({"SN-1", "UNKNOWN"}), {"SN-1": self.info})
+        other_loader.assert_not_called()
+
+    def test_invalidate_drops_every_tier(self):
+        """Test invalidation removes local and Redis entries"""
+        shared = FakeRedis()
+        cache = DeviceCache(loader=self.loader, redis_client=shared)
+        cache.get_many({"SN-1"})
+
+        cache.invalidate(["SN-1"])
+
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(shared.store, {})
+
+    def test_clear_drops_redis_tier(self):
+        """Test clearing after missed invalidations empties Redis as well"""
+        shared = FakeRedis()
+        shared.store["unrelated"] = b"kept"
+        DeviceCache(loader=self.loader, redis_client=shared).get_many({"SN-1"})
+        cache = DeviceCache(loader=self.loader, redis_client=shared)
+
+        cache.clear()
+
+        self.assertEqual(shared.store, {"unrelated": b"kept"})
+        cache.get_many({"SN-1"})
+        self.assertEqual(self.loader.call_count, 2)
+
+
+class DeviceCacheSignalTest(TestCase):
+    """Test model signals keep the shared device cache fresh."""
+
+    def setUp(self):
+        self.cache = get_device_cache()
+        self.cache.clear()
+        self.device_type = DeviceType.objects.create(
+            name="Cache Temperature Sensor",
+            metric_name="temperature",
+            metric_unit="°C",
+            metric_max=100,
+        )
+        self.device = Device.objects.create(
+            device_type=self.device_type,
+            name="Cache Device 1",
+            serial_number="CACHE-SN-0001",
+        )
+
+    def test_resolves_device_with_bounds(self):
+        """Test cached entries carry the device type bounds"""
+        info = self.cache.get_many({"CACHE-SN-0001"})["CACHE-SN-0001"]
+        self.assertEqual(info.id, self.device.id)
+        self.assertEqual(info.metric_max, 100.0)
+        self.assertIsNone(info.metric_min)
+
+    def test_device_save_invalidates(self):
+        """Test saving a device evicts both old and new serial numbers"""
+        self.cache.get_many({"CACHE-SN-0001", "CACHE-SN-0002"})
+
+        self.device.serial_number = "CACHE-SN-0002"
+        self.device.save()
+
+        _, misses = self.cache.get_local({"CACHE-SN-0001", "CACHE-SN-0002"})
+        self.assertEqual(misses, {"CACHE-SN-0001", "CACHE-SN-0002"})
+        self.assertIn("CACHE-SN-0002", self.cache.get_many({"CACHE-SN-0002"}))
+
+    def test_device_type_save_invalidates(self):
+        """Test changing device type bounds evicts its devices"""
+        self.cache.get_many({"CACHE-SN-0001"})
+
+        self.device_type.metric_max = 50
+        self.device_type.save()
+
+        info = self.cache.get_many({"CACHE-SN-0001"})["CACHE-SN-0001"]
+        self.assertEqual(info.metric_max, 50.0)
+
+    def test_device_delete_invalidates(self):
+        """Test deleted devices stop resolving"""
+        self.cache.get_many({"CACHE-SN-0001"})
+        self.device.delete()
+        self.assertEqual(self.cache.get_many({"CACHE-SN-0001"}), {})
@@ -0,0 +1,95 @@
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.devices.last_seen import LastSeenTracker
+from apps.devices.models import Device, DeviceType
+
+
+class LastSeenTrackerTest(TestCase):
+    """Test write-behind coalescing of Device.last_seen."""
+
+    @classmethod
+    def setUpTestData(cls):
+        device_type = DeviceType.objects.create(
+            name="Last Seen Sensor", metric_name="pressure", metric_unit="bar"
+        )
+        cls.devices = [
+            Device.objects.create(
+                device_type=device_type,
+                name=f"Last Seen Device {index}",
+                serial_number=f"SEEN-SN-{index:04d}",
+            )
+            for index in range(3)
+        ]
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.tracker = LastSeenTracker()
+
+    def test_keeps_newest_timestamp_per_device(self):
+        """Test repeated touches coalesce to the newest timestamp"""
+        device_id = self.devices[0].id
+        self.tracker.touch([device_id], self.now)
+        self.tracker.touch([device_id], self.now - timedelta(seconds=5))
+        self.tracker.touch([device_id], self.now + timedelta(seconds=1))
+
+        self.assertEqual(len(self.tracker), 1)
+        self.assertEqual(
+            self.tracker._pending[device_id], self.now + timedelta(seconds=1)
+        )
+
+    def test_flush_updates_all_devices_in_one_statement(self):
+        """Test a flush writes every pending device with one UPDATE"""
+        self.tracker.touch([device.id for device in self.devices], self.now)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.tracker.flush(), 3)
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(
+            Device.objects.filter(last_seen=self.now).count(), len(self.devices)
+        )
+        self.assertEqual(len(self.tracker), 0)
+
+    def test_flush_never_moves_last_seen_back(self):
+        """Test an older pending timestamp does not overwrite a newer one"""
+        device = self.devices[0]
+        Device.objects.filter(pk=device.pk).update(last_seen=self.now)
+
+        self.tracker.touch([device.id], self.now - timedelta(minutes=1))
+        self.tracker.flush()
+
+        device.refresh_from_db()
+        self.assertEqual(device.last_seen, self.now)
+
+    def test_ingest_defers_last_seen_update(self):
+        """Test ingest leaves last_seen to the tracker when write-behind is on"""
+        reading = {"schema_version": "1.0", "ssn": "SEEN-SN-0000", "value": 1}
+
+        with (
+            self.settings(DEVICE_LAST_SEEN_WRITE_BEHIND=True),
+            mock.patch(
+                "apps.telemetry.ingest.get_last_seen_tracker",
+                return_value=self.tracker,
+            ),
+        ):
+            response = self.client.post(
+                "/api/v1/telemetry",
+                data=json.dumps(reading),
+                content_type="application/json",
+            )
+
+        self.assertEqual(response.status_code, 202)
+        device = self.devices[0]
+        device.refresh_from_db()
+        self.assertIsNone(device.last_seen)
+
+        self.tracker.flush()
+        device.refresh_from_db()
+        self.assertIsNotNone(device.last_seen)
@@ -0,0 +1,171 @@
+from io import StringIO
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import override_settings
+
+from apps.core.indexes import JsonbIndex, configured_indexes, index_usage, sync_indexes
+
+PATH_INDEX = {
+    "name": "idx_test_rule_action_path",
+    "table": "rules",
+    "expression": "action_config jsonb_path_ops",
+}
+EXPRESSION_INDEX = {
+    "name": "idx_test_rule_action_channel",
+    "table": "rules",
+    "expression": "((action_config->>'channel'))",
+    "method": "btree",
+    "where": "is_enabled",
+}
+
+
+class JsonbIndexConfigTest(SimpleTestCase):
+    """Test parsing of settings.JSONB_INDEXES."""
+
+    def test_defaults(self):
+        """Test the defaults leave telemetry, the hot insert path, unindexed"""
+        self.assertEqual(
+            [(index.table, index.expression) for index in configured_indexes()],
+            [
+                ("events", "telemetry_snapshot jsonb_path_ops"),
+            ],
+        )
+
+    def test_create_sql(self):
+        """Test plain tables are indexed concurrently, hypertables per chunk"""
+        index = JsonbIndex(**EXPRESSION_INDEX)
+        self.assertEqual(
+            index.create_sql(),
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_test_rule_action_channel "
+            "ON rules USING btree (((action_config->>'channel'))) WHERE is_enabled",
+        )
+        self.assertIn(
+            "ON rules USING btree (((action_config->>'channel'))) "
+            "WITH (timescaledb.transaction_per_chunk)",
+            index.create_sql(hypertable=True),
+        )
+        self.assertNotIn("CONCURRENTLY", index.create_sql(hypertable=True))
+
+    def test_invalid_entries(self):
+        """Test invalid entries are rejected"""
+        for spec in (
+            {**PATH_INDEX, "table": "no_such_table"},
+            {**PATH_INDEX, "name": "idx; DROP TABLE rules"},
+            {**PATH_INDEX, "method": "brin"},
+            {**PATH_INDEX, "column": "action_config"},
+        ):
+            with self.subTest(spec=spec), override_settings(JSONB_INDEXES=[spec]):
+                with self.assertRaises(ImproperlyConfigured):
+                    configured_indexes()
+        with override_settings(JSONB_INDEXES=[PATH_INDEX, PATH_INDEX]):
+            with self.assertRaisesMessage(ImproperlyConfigured, "Duplicate"):
+                configured_indexes()
+
+
+class SyncIndexesTest(TransactionTestCase):
+    """Test indexes are created, rebuilt and dropped to match the settings."""
+
+    def setUp(self):
+        self.addCleanup(self._sync, [])
+
+    def _sync(self, specs, **kwargs):
+        with connection.cursor() as cursor:
+            return sync_indexes(
+                cursor, [JsonbIndex(**spec) for spec in specs], **kwargs
+            )
+
+    def _execute(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+
+    def _definitions(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indexname, indexdef FROM pg_indexes "
+                "WHERE indexname LIKE 'idx_test_%%'"
+            )
+            return dict(cursor.fetchall())
+
+    def test_sync(self):
+        """Test the full lifecycle of managed indexes"""
+        self.assertEqual(
+            self._sync([PATH_INDEX, EXPRESSION_INDEX], dry_run=True),
+            [("create", EXPRESSION_INDEX["name"]), ("create", PATH_INDEX["name"])],
+        )
+        self.assertEqual(self._definitions(), {})
+
+        self._sync([PATH_INDEX, EXPRESSION_INDEX])
+        definitions = self._definitions()
+        self.assertIn(
+            "USING gin (action_config jsonb_path_ops)", definitions[PATH_INDEX["name"]]
+        )
+        self.assertIn("WHERE is_enabled", definitions[EXPRESSION_INDEX["name"]])
+
+        changed = {**EXPRESSION_INDEX, "where": ""}
+        self.assertEqual(
+            self._sync([PATH_INDEX, changed]),
+            [("rebuild", EXPRESSION_INDEX["name"]), ("keep", PATH_INDEX["name"])],
+        )
+        self.assertNotIn("WHERE", self._definitions()[EXPRESSION_INDEX["name"]])
+
+        self.assertEqual(
+            self._sync([changed], tables={"events"}),
+            [],
+        )
+        self.assertEqual(
+            self._sync([changed]),
+            [("keep", EXPRESSION_INDEX["name"]), ("drop", PATH_INDEX["name"])],
+        )
+        self.assertEqual(list(self._definitions()), [EXPRESSION_INDEX["name"]])
+
+    def test_unmanaged_index_is_not_replaced(self):
+        """Test an index created by a migration is never dropped or replaced"""
+        with self.assertRaisesMessage(ValueError, "not managed"):
+            self._sync([{**PATH_INDEX, "name": "idx_rule_is_enabled"}])
+
+    def test_failed_build_is_rebuilt(self):
+        """Test an invalid index left by a failed concurrent build is rebuilt"""
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE TABLE test_index_duplicates (value integer)")
+            self.addCleanup(self._execute, "DROP TABLE IF EXISTS test_index_duplicates")
+            cursor.execute("INSERT INTO test_index_duplicates VALUES (1), (1)")
+            with self.assertRaises(IntegrityError):
+                cursor.execute(
+                    f"CREATE UNIQUE INDEX CONCURRENTLY {PATH_INDEX['name']} "
+                    "ON test_index_duplicates (value)"
+                )
+
+        self.assertEqual(self._sync([PATH_INDEX]), [("rebuild", PATH_INDEX["name"])])
+        self.assertIn("USING gin", self._definitions()[PATH_INDEX["name"]])
+        self.assertEqual(self._sync([PATH_INDEX]), [("keep", PATH_INDEX["name"])])
+
+    def test_command(self):
+        """Test sync_jsonb_indexes applies settings.JSONB_INDEXES"""
+        out = StringIO()
+        with override_settings(JSONB_INDEXES=[PATH_INDEX]):
+            call_command("sync_jsonb_indexes", stdout=out)
+        self.assertIn(f"create  {PATH_INDEX['name']}", out.getvalue())
+        self.assertEqual(list(self._definitions()), [PATH_INDEX["name"]])
+
+
+class IndexAdvisorTest(TestCase):
+    """Test index usage statistics."""
+
+    def test_index_usage(self):
+        """Test usage is reported per index of the selected tables"""
+        with connection.cursor() as cursor:
+            usage = index_usage(cursor, tables=["rules"])
+        names = {entry.name for entry in usage}
+        self.assertIn("idx_rule_is_enabled", names)
+        self.assertEqual({entry.table for entry in usage}, {"rules"})
+        self.assertTrue(all(entry.scans >= 0 and entry.writes >= 0 for entry in usage))
+
+    def test_command(self):
+        """Test index_advisor prints a row per index"""
+        out = StringIO()
+        call_command("index_advisor", table=["rules"], stdout=out)
+        self.assertIn("idx_rule_device_enabled", out.getvalue())
+        self.assertIn("writes/scan", out.getvalue())
@@ -0,0 +1,154 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.devices.models import Device, DeviceType
+from apps.rules.cooldown import CooldownGate
+from apps.rules.engine import CompiledRule
+from apps.rules.models import Rule
+
+
+class FakeRedis:
+    """Dict-backed stand-in for ``SET NX PX`` and ``PTTL``, on a shared clock."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.expiry = {}
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and self.expiry.get(key, 0) > self.clock():
+            return None
+        self.expiry[key] = self.clock() + px / 1000
+        return True
+
+    def pttl(self, key):
+        remaining = self.expiry.get(key, 0) - self.clock()
+        return int(remaining * 1000) if remaining > 0 else -2
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _rule(cooldown_minutes=None, last_triggered_at=None):
+    actions = [{"type": "notification", "template_id": 1}]
+    if cooldown_minutes is not None:
+        actions.append({"type": "log", "cooldown_minutes": cooldown_minutes})
+    return CompiledRule.from_db(
+        uuid.uuid4(), uuid.uuid4(), "rule", "gt", 1, actions, last_triggered_at
+    )
+
+
+class CooldownGateTest(SimpleTestCase):
+    """Test cooldown decisions in one and several processes."""
+
+    def setUp(self):
+        self.clock = Clock()
+        self.written = []
+        self.gate = CooldownGate(writer=self.written.append, clock=self.clock)
+
+    def test_cooldown_from_longest_action(self):
+        """Test the rule cooldown is the longest cooldown_minutes of its actions"""
+        self.assertEqual(_rule().cooldown, 0)
+        self.assertEqual(_rule(cooldown_minutes=5).cooldown, 300)
+
+    def test_suppressed_until_cooldown_elapses(self):
+        """Test a rule fires again only after its cooldown"""
+        rule, free = _rule(cooldown_minutes=1), _rule()
+        self.assertEqual(
+            self.gate.allow_matches([(rule, 0), (free, 0), (rule, 1), (free, 1)]),
+            [(rule, 0), (free, 0), (free, 1)],
+        )
+
+        self.clock.now += 59
+        self.assertFalse(self.gate.allow(rule))
+        self.clock.now += 1
+        self.assertTrue(self.gate.allow(rule))
+
+    def test_loaded_last_triggered_at_seeds_gate(self):
+        """Test a restarted process respects a cooldown started before it"""
+        triggered = datetime.fromtimestamp(self.clock.now - 30, timezone.utc)
+        rule = _rule(cooldown_minutes=1, last_triggered_at=triggered)
+
+        self.assertFalse(self.gate.allow(rule))
+        self.clock.now += 30
+        self.assertTrue(self.gate.allow(rule))
+
+    def test_redis_claim_shared_between_processes(self):
+        """Test only one process fires, the other then suppresses locally"""
+        shared = FakeRedis(self.clock)
+        first = CooldownGate(redis_client=shared, clock=self.clock)
+        second = CooldownGate(redis_client=shared, clock=self.clock)
+        rule = _rule(cooldown_minutes=1)
+
+        self.assertTrue(first.allow(rule))
+        self.clock.now += 20
+        self.assertFalse(second.allow(rule))
+
+        shared.expiry.clear()
+        self.clock.now += 39
+        self.assertFalse(second.allow(rule))
+        self.clock.now += 1
+        self.assertTrue(second.allow(rule))
+
+    def test_flush_writes_newest_trigger_per_rule(self):
+        """Test fired rules are written back once per flush, with the newest time"""
+        rule = _rule()
+        self.gate.allow(rule)
+        self.clock.now += 5
+        self.gate.allow(rule)
+
+        self.assertEqual(self.gate.flush(), 1)
+        self.assertEqual(
+            self.written,
+            [{rule.id: datetime.fromtimestamp(self.clock.now, timezone.utc)}],
+        )
+        self.assertEqual(self.gate.flush(), 0)
+
+
+class LastTriggeredWriteTest(TestCase):
+    """Test the batched last_triggered_at write-back."""
+
+    @classmethod
+    def setUpTestData(cls):
+        device_type = DeviceType.objects.create(
+            name="Cooldown Sensor", metric_name="temperature", metric_unit="°C"
+        )
+        device = Device.objects.create(
+            device_type=device_type, name="Cooldown", serial_number="COOL-SN-1"
+        )
+        cls.rules = [
+            Rule.objects.create(
+                device=device,
+                name=f"Cooldown rule {index}",
+                comparison_operator="gt",
+                threshold=1,
+                action_config=[],
+            )
+            for index in range(3)
+        ]
+
+    def test_one_statement_never_moves_back(self):
+        """Test one UPDATE writes every rule and keeps newer stored values"""
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        newer = now + timedelta(minutes=1)
+        Rule.objects.filter(pk=self.rules[0].pk).update(last_triggered_at=newer)
+        gate = CooldownGate(clock=lambda: now.timestamp())
+        for rule in Rule.objects.all():
+            gate.allow(CompiledRule.from_db(rule.pk, rule.device_id, "", "gt", 1, []))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(gate.flush(), 3)
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(
+            sorted(Rule.objects.values_list("last_triggered_at", flat=True)),
+            [now, now, newer],
+        )
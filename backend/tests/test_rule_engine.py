@@ -0,0 +1,257 @@
+import operator
+import random
+import uuid
+from datetime import datetime, timezone
+from io import StringIO
+from unittest import mock
+
+import numpy as np
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from apps.devices.models import Device, DeviceType
+from apps.rules.admin import disable_rules
+from apps.rules.engine import CompiledRule, DeviceRules, RuleIndex
+from apps.rules.vectorized import RuleSnapshot
+from apps.rules.models import Rule
+from apps.telemetry.rows import TelemetryRow
+
+DEVICE = uuid.UUID("6b0d8f7e-2b1c-4f0a-9a52-3c5e1d7f9b20")
+
+PYTHON_OPERATORS = {
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "eq": operator.eq,
+    "neq": operator.ne,
+}
+
+
+def _rule(operator_name, threshold, device_id=DEVICE):
+    return CompiledRule(uuid.uuid4(), device_id, "rule", operator_name, threshold, [])
+
+
+class DeviceRulesTest(SimpleTestCase):
+    """Test bisect matching against a linear scan."""
+
+    def test_matches_linear_scan(self):
+        """Test every operator, including thresholds equal to the value"""
+        rng = random.Random(7)
+        rules = [
+            _rule(rng.choice(list(PYTHON_OPERATORS)), float(rng.randint(0, 20)))
+            for _ in range(300)
+        ]
+        device_rules = DeviceRules(rules)
+
+        self.assertEqual(len(device_rules), 300)
+        for value in [-1.0, 0.0, 7.0, 7.5, 20.0, 21.0]:
+            expected = {
+                rule.id
+                for rule in rules
+                if PYTHON_OPERATORS[rule.operator](value, rule.threshold)
+            }
+            self.assertEqual(
+                {rule.id for rule in device_rules.match(value)}, expected, value
+            )
+
+    def test_missing_values_match_nothing(self):
+        """Test non-numeric readings never match, not even != rules"""
+        device_rules = DeviceRules([_rule("neq", 1.0), _rule("lt", 5.0)])
+
+        self.assertEqual(device_rules.match(None), [])
+        self.assertEqual(device_rules.match(float("nan")), [])
+
+
+class RuleSnapshotTest(SimpleTestCase):
+    """Test vectorized batch matching against the bisect index."""
+
+    def test_matches_device_rules(self):
+        """Test a batch yields the same (rule, reading) pairs as DeviceRules"""
+        rng = random.Random(11)
+        devices = [uuid.uuid4() for _ in range(5)]
+        rules = [
+            _rule(
+                rng.choice(list(PYTHON_OPERATORS)),
+                float(rng.randint(0, 10)),
+                rng.choice(devices),
+            )
+            for _ in range(200)
+        ]
+        device_ids = [rng.choice(devices + [uuid.uuid4()]) for _ in range(500)]
+        values = [rng.randint(0, 20) / 2 for _ in range(500)]
+        values[3] = float("nan")
+
+        snapshot = RuleSnapshot(rules)
+        matches = snapshot.evaluate(device_ids, values)
+
+        got = {
+            (snapshot.rules[rule].id, reading)
+            for rule, reading in zip(matches.rule, matches.reading)
+        }
+        expected = set()
+        for reading, (device_id, value) in enumerate(zip(device_ids, values)):
+            device_rules = DeviceRules(
+                rule for rule in rules if rule.device_id == device_id
+            )
+            expected.update((rule.id, reading) for rule in device_rules.match(value))
+        self.assertEqual(len(matches.rule), len(got))
+        self.assertEqual(got, expected)
+        self.assertTrue(np.all(np.diff(matches.reading) >= 0))
+
+    def test_matches_ordered_by_timestamp(self):
+        """Test readings are matched oldest first"""
+        snapshot = RuleSnapshot([_rule("gt", 0.0)])
+        timestamps = np.array(
+            ["2026-03-01T00:02", "2026-03-01T00:00", "2026-03-01T00:01"],
+            dtype="datetime64[s]",
+        )
+
+        matches = snapshot.evaluate([DEVICE] * 3, [1.0, 2.0, 3.0], timestamps)
+
+        self.assertEqual(matches.reading.tolist(), [1, 2, 0])
+
+    def test_empty_snapshot(self):
+        """Test no rules and no readings match nothing"""
+        self.assertEqual(len(RuleSnapshot([]).evaluate([DEVICE], [1.0]).rule), 0)
+        self.assertEqual(len(RuleSnapshot([_rule("gt", 0.0)]).evaluate([], []).rule), 0)
+
+    def test_benchmark_command(self):
+        """Test the benchmark reports every strategy"""
+        out = StringIO()
+        call_command("benchmark_rules", readings=200, rules=50, devices=5, stdout=out)
+
+        for strategy in ("scan", "bisect", "vectorized"):
+            self.assertIn(strategy, out.getvalue())
+
+
+class RuleIndexTest(SimpleTestCase):
+    """Test loading and invalidation of the per-device index."""
+
+    def setUp(self):
+        self.rules = {DEVICE: [_rule("gt", 10.0)]}
+        self.loader = mock.Mock(
+            side_effect=lambda device_ids: {
+                device_id: self.rules[device_id]
+                for device_id in device_ids
+                if device_id in self.rules
+            }
+        )
+        self.index = RuleIndex(loader=self.loader)
+
+    def test_batch_loads_devices_once(self):
+        """Test a batch loads its devices together and later batches hit"""
+        other = uuid.uuid4()
+        ts = datetime(2026, 3, 1, tzinfo=timezone.utc)
+        rows = [
+            TelemetryRow(DEVICE, ts, {"value": 11}),
+            TelemetryRow(DEVICE, ts, {"value": 9}),
+            TelemetryRow(other, ts, {"value": 50}),
+        ]
+
+        matches = self.index.match_rows(rows)
+        self.index.match_rows(rows)
+
+        self.assertEqual(
+            [(rule.threshold, row) for rule, row in matches], [(10.0, rows[0])]
+        )
+        self.loader.assert_called_once_with({DEVICE, other})
+
+    def test_invalidate_reloads_only_that_device(self):
+        """Test an invalidated device is rebuilt on its next reading"""
+        other = uuid.uuid4()
+        self.index.rules_for([DEVICE, other])
+        self.rules[DEVICE] = [_rule("gt", 20.0)]
+
+        self.index.invalidate([DEVICE])
+
+        self.assertEqual(self.index.match(DEVICE, 15.0), [])
+        self.loader.assert_called_with({DEVICE})
+        self.assertEqual(len(self.index), 2)
+
+    def test_snapshot_rebuilt_after_invalidation(self):
+        """Test the columnar snapshot is cached until any rule changes"""
+        self.loader.side_effect = lambda device_ids: self.rules
+
+        self.assertIs(self.index.snapshot(), self.index.snapshot())
+        self.rules[DEVICE] = [_rule("gt", 20.0), _rule("lt", 0.0)]
+        self.index.invalidate([uuid.uuid4()])
+
+        self.assertEqual(len(self.index.snapshot()), 2)
+        self.assertEqual(self.loader.call_count, 2)
+
+    def test_load_racing_invalidation_is_not_kept(self):
+        """Test rules loaded before a concurrent invalidation are not cached"""
+
+        def load(device_ids):
+            self.index.invalidate(device_ids)
+            return {DEVICE: self.rules[DEVICE]}
+
+        self.index.loader = load
+
+        self.assertEqual(len(self.index.match(DEVICE, 11.0)), 1)
+        self.assertEqual(len(self.index), 0)
+
+
+class RuleIndexInvalidationTest(TestCase):
+    """Test rule changes evict their device from the process-wide index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        device_type = DeviceType.objects.create(
+            name="Rule Sensor", metric_name="temperature", metric_unit="°C"
+        )
+        cls.device = Device.objects.create(
+            device_type=device_type, name="Rule Device", serial_number="RULE-SN-1"
+        )
+        cls.rule = Rule.objects.create(
+            device=cls.device,
+            name="Too hot",
+            comparison_operator="gt",
+            threshold=30,
+            action_config=[],
+        )
+
+    def setUp(self):
+        self.index = RuleIndex()
+        patcher = mock.patch(
+            "apps.rules.engine.get_rule_index", return_value=self.index
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_loads_enabled_rules_in_one_query(self):
+        """Test one query loads the device's rules"""
+        Rule.objects.create(
+            device=self.device,
+            name="Disabled",
+            comparison_operator="gt",
+            threshold=0,
+            action_config=[],
+            is_enabled=False,
+        )
+        with self.assertNumQueries(1):
+            matched = self.index.match(self.device.id, 31.0)
+
+        self.assertEqual([rule.id for rule in matched], [self.rule.id])
+
+    def test_save_and_delete_invalidate(self):
+        """Test saving or deleting a rule rebuilds its device's entry"""
+        self.index.match(self.device.id, 31.0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rule.threshold = 40
+            self.rule.save()
+        self.assertEqual(self.index.match(self.device.id, 31.0), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rule.delete()
+        self.assertEqual(len(self.index.rules_for([self.device.id])[self.device.id]), 0)
+
+    def test_admin_bulk_action_invalidates(self):
+        """Test the disable action evicts devices although update() sends no signal"""
+        self.index.match(self.device.id, 31.0)
+
+        disable_rules(mock.Mock(), None, Rule.objects.filter(pk=self.rule.pk))
+
+        self.assertEqual(self.index.match(self.device.id, 31.0), [])
@@ -0,0 +1,177 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.test import SimpleTestCase, TestCase
+
+from apps.devices.models import Device, DeviceType
+from apps.rules.engine import CompiledRule, RuleIndex
+from apps.rules.models import Rule, RuleWindowState
+from apps.rules.windows import WindowStore
+from apps.telemetry.rows import TelemetryRow
+
+DEVICE = uuid.UUID("0c6f3f63-5d0e-4b8e-9f57-8a3a0f2d4c11")
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _rule(kind, operator_name, threshold, window_seconds=60, rule_id=None):
+    return CompiledRule.from_db(
+        rule_id or uuid.uuid4(),
+        DEVICE,
+        kind,
+        operator_name,
+        threshold,
+        [],
+        None,
+        kind,
+        window_seconds,
+    )
+
+
+def _feed(store, rule, values, step=10):
+    """Feed one reading every ``step`` seconds, return the matching offsets."""
+    return [
+        offset
+        for offset, value in zip(range(0, step * len(values), step), values)
+        if store.update(rule, START + timedelta(seconds=offset), value)
+    ]
+
+
+class WindowStateTest(SimpleTestCase):
+    """Test the incremental evaluation of each window kind."""
+
+    def setUp(self):
+        self.store = WindowStore(loader=lambda rule_ids: {}, writer=dict)
+
+    def test_sustained_needs_whole_window(self):
+        """Test a sustained rule matches once the condition held for the window"""
+        rule = _rule("sustained", "gt", 5, window_seconds=30)
+        values = [9, 9, 9, 1, 9, 9, 9, 9, 9]
+        self.assertEqual(_feed(self.store, rule, values), [70, 80])
+
+    def test_rolling_average(self):
+        """Test the mean of the window, only once a whole window was seen"""
+        rule = _rule("average", "gt", 5, window_seconds=30)
+        # Window (t - 30, t] holds three readings
+        values = [9, 9, 9, 9, 0, 0, 9, 9]
+        self.assertEqual(_feed(self.store, rule, values), [30, 40, 70])
+
+    def test_rate_of_change(self):
+        """Test the change per second since the window start"""
+        rule = _rule("rate", "gte", 0.5, window_seconds=20)
+        values = [0, 1, 2, 12, 13, 14]
+        self.assertEqual(_feed(self.store, rule, values), [30, 40])
+
+    def test_stale_and_missing_values_skipped(self):
+        """Test out-of-order and non-numeric readings leave the state alone"""
+        rule = _rule("average", "lt", 5, window_seconds=10)
+        self.assertFalse(self.store.update(rule, START, 1))
+        self.assertFalse(self.store.update(rule, START - timedelta(seconds=5), 100))
+        self.assertFalse(self.store.update(rule, START, None))
+        self.assertTrue(self.store.update(rule, START + timedelta(seconds=10), 1))
+
+    def test_missing_window_never_matches(self):
+        """Test a windowed rule without a window length is not evaluated"""
+        for kind in ("sustained", "average", "rate"):
+            for window_seconds in (None, 0):
+                rule = _rule(kind, "gte", 0, window_seconds=window_seconds)
+                self.assertEqual(_feed(self.store, rule, [1, 2, 3]), [])
+
+    def test_sample_cap_drops_oldest(self):
+        """Test the ring buffer stays bounded"""
+        store = WindowStore(loader=lambda rule_ids: {}, writer=dict, max_samples=4)
+        rule = _rule("average", "gt", 5, window_seconds=3600)
+        _feed(store, rule, [100] + [1] * 10)
+        self.assertEqual(store._states[rule.id].total, 4)
+
+    def test_match_rows_mixes_point_and_windowed(self):
+        """Test the index evaluates windowed rules for every reading"""
+        point = _rule("point", "gt", 5)
+        sustained = _rule("sustained", "gt", 5, window_seconds=10)
+        index = RuleIndex(
+            loader=lambda device_ids: {DEVICE: [point, sustained]}, windows=self.store
+        )
+        rows = [
+            TelemetryRow(DEVICE, START + timedelta(seconds=offset), {"value": value})
+            for offset, value in [(0, 9), (10, 9), (20, 1)]
+        ]
+
+        self.assertEqual(
+            [(rule, row.timestamp) for rule, row in index.match_rows(rows)],
+            [
+                (point, rows[0].timestamp),
+                (point, rows[1].timestamp),
+                (sustained, rows[1].timestamp),
+            ],
+        )
+        self.assertEqual(len(index.snapshot()), 1)
+
+
+class RuleWindowSnapshotTest(TestCase):
+    """Test window state survives a restart through snapshots."""
+
+    @classmethod
+    def setUpTestData(cls):
+        device_type = DeviceType.objects.create(
+            name="Window Sensor", metric_name="vibration", metric_unit="mm/s"
+        )
+        cls.device = Device.objects.create(
+            device_type=device_type, name="Window", serial_number="WINDOW-SN-1"
+        )
+        cls.rule = Rule.objects.create(
+            device=cls.device,
+            name="Vibration average",
+            comparison_operator="gt",
+            threshold=5,
+            window_kind="average",
+            window_seconds=30,
+            action_config=[],
+        )
+
+    def compiled(self, threshold=5):
+        return _rule("average", "gt", threshold, 30, rule_id=self.rule.pk)
+
+    def test_restart_resumes_from_snapshot(self):
+        """Test a new store continues the window of the flushed one"""
+        store = WindowStore()
+        _feed(store, self.compiled(), [9, 9, 9])
+        self.assertEqual(store.flush(), 1)
+        self.assertEqual(store.flush(), 0)
+
+        restarted = WindowStore()
+        restarted.prepare([self.compiled()])
+        self.assertTrue(
+            restarted.update(self.compiled(), START + timedelta(seconds=30), 9)
+        )
+
+        # A changed threshold starts over
+        changed = WindowStore()
+        changed.prepare([self.compiled(threshold=1)])
+        self.assertFalse(
+            changed.update(self.compiled(threshold=1), START + timedelta(seconds=30), 9)
+        )
+
+    def test_deleted_rule_state_not_written(self):
+        """Test a snapshot of a rule deleted meanwhile is skipped"""
+        store = WindowStore()
+        _feed(store, self.compiled(), [1])
+        _feed(store, _rule("average", "gt", 5), [1])
+
+        store.flush()
+
+        self.assertEqual(
+            list(RuleWindowState.objects.values_list("rule_id", flat=True)),
+            [self.rule.pk],
+        )
+
+    def test_windowed_rule_needs_window(self):
+        """Test validation rejects windowed rules without a window length"""
+        self.rule.window_seconds = None
+        with self.assertRaises(ValidationError):
+            self.rule.full_clean()
+
+    def test_database_rejects_missing_window(self):
+        """Test the check constraint rejects windowed rules without a window"""
+        with self.assertRaises(IntegrityError):
+            Rule.objects.filter(pk=self.rule.pk).update(window_seconds=None)
@@ -0,0 +1,328 @@
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from apps.devices.models import Device, DeviceType
+from apps.telemetry.aggregate_cache import (
+    BYTES_KEY,
+    EVICT_SCRIPT,
+    LRU_KEY,
+    SIZES_KEY,
+    STORE_SCRIPT,
+    WRITE_HISTORY,
+    AggregateCache,
+)
+from apps.telemetry.ingest import write_telemetry
+from apps.telemetry.rollups import ROLLUP_1H
+from apps.telemetry.rows import TelemetryRow
+
+START = datetime(2026, 3, 1, tzinfo=timezone.utc)
+DEVICE = "3f1c9a52-8a0e-4c4b-9d43-0e5d1c6b7a10"
+
+
+def _key(value):
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((getattr(self.client, name), args, kwargs))
+
+        return queue
+
+    def execute(self):
+        calls, self.calls = self.calls, []
+        return [method(*args, **kwargs) for method, args, kwargs in calls]
+
+
+class FakeRedis:
+    """Dict-backed stand-in for the commands the aggregate cache uses."""
+
+    def __init__(self):
+        self.values = {}
+        self.ttls = {}
+        self.hashes = {}
+        self.zsets = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def register_script(self, script):
+        """Python versions of the cache's Lua scripts, called the same way."""
+        return {STORE_SCRIPT: self._store_script, EVICT_SCRIPT: self._evict_script}[
+            script
+        ]
+
+    def _store_script(self, keys, args):
+        key, sizes_key, bytes_key, lru_key = keys
+        data, ttl, now = args
+        previous = int(self.hget(sizes_key, key) or 0)
+        self.set(key, data, ex=ttl or None)
+        self.hset(sizes_key, key, len(data))
+        self.zadd(lru_key, {key: now})
+        return self.incrby(bytes_key, len(data) - previous)
+
+    def _evict_script(self, keys, args):
+        (sizes_key, lru_key, bytes_key), entries = keys[:3], keys[3:]
+        used = int(self.get(bytes_key) or 0)
+        freed = removed = 0
+        for key in entries:
+            if used - freed <= args[0]:
+                break
+            freed += int(self.hget(sizes_key, key) or 0)
+            self.delete(key)
+            self.hdel(sizes_key, key)
+            self.zrem(lru_key, key)
+            removed += 1
+        return [self.incrby(bytes_key, -freed), removed, freed]
+
+    def get(self, key):
+        return self.values.get(_key(key))
+
+    def set(self, key, value, ex=None):
+        self.values[_key(key)] = value
+        self.ttls[_key(key)] = ex
+
+    def incr(self, key):
+        return self.incrby(key, 1)
+
+    def incrby(self, key, amount):
+        value = int(self.values.get(_key(key), 0)) + amount
+        self.values[_key(key)] = str(value).encode()
+        return value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(_key(key), None)
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(_key(field))
+
+    def hmget(self, key, fields):
+        return [self.hget(key, field) for field in fields]
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[_key(field)] = str(value).encode()
+
+    def hdel(self, key, *fields):
+        for field in fields:
+            self.hashes.get(key, {}).pop(_key(field), None)
+
+    def _sorted(self, key):
+        zset = self.zsets.get(key, {})
+        return sorted(zset, key=lambda member: (zset[member], member))
+
+    def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(
+            {_key(member): score for member, score in mapping.items()}
+        )
+
+    def zrange(self, key, start, stop):
+        members = self._sorted(key)
+        return [member.encode() for member in members[start : stop + 1 or None]]
+
+    def zrangebyscore(self, key, low, high):
+        zset = self.zsets.get(key, {})
+        return [
+            member.encode()
+            for member in self._sorted(key)
+            if low <= zset[member] <= high
+        ]
+
+    def zremrangebyrank(self, key, start, stop):
+        for member in self.zrange(key, start, stop):
+            self.zrem(key, member)
+
+    def zrem(self, key, *members):
+        for member in members:
+            self.zsets.get(key, {}).pop(_key(member), None)
+
+
+def _bucket(hour, value):
+    return {
+        "bucket": START + timedelta(hours=hour),
+        "min": value,
+        "max": value,
+        "avg": value,
+        "count": 1,
+        "last": value,
+    }
+
+
+class AggregateCacheTest(SimpleTestCase):
+    """Test hits, trailing-bucket refreshes and the memory cap."""
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        self.cache = AggregateCache(self.redis, live_ttl=60)
+        self.stored = [_bucket(hour, float(hour)) for hour in range(4)]
+        self.computed = []
+        patcher = mock.patch("apps.telemetry.aggregate_cache.pin_primary")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def compute(self, start, end):
+        self.computed.append((start, end))
+        return [bucket for bucket in self.stored if start <= bucket["bucket"] < end]
+
+    def get(self, hours=4):
+        return self.cache.get(
+            ROLLUP_1H, DEVICE, START, START + timedelta(hours=hours), self.compute
+        )
+
+    def test_repeated_query_is_a_hit(self):
+        """Test the second identical query does not touch the database"""
+        self.assertEqual(self.get(), self.stored)
+        self.assertEqual(self.get(), self.stored)
+
+        self.assertEqual(len(self.computed), 1)
+
+    def test_write_recomputes_from_the_written_bucket(self):
+        """Test only buckets from the earliest written timestamp are recomputed"""
+        self.get()
+        self.stored[3] = _bucket(3, 99.0)
+        self.cache.note_written(
+            [TelemetryRow(DEVICE, START + timedelta(hours=3, minutes=20), {})]
+        )
+
+        self.assertEqual(self.get(), self.stored)
+        self.assertEqual(
+            self.computed[1], (START + timedelta(hours=3), START + timedelta(hours=4))
+        )
+        # The refreshed entry is current again
+        self.get()
+        self.assertEqual(len(self.computed), 2)
+
+    def test_write_after_window_keeps_entry(self):
+        """Test writes past the window's end leave it cached"""
+        self.get()
+        self.cache.note_written([TelemetryRow(DEVICE, START + timedelta(hours=5), {})])
+
+        self.assertEqual(self.get(), self.stored)
+        self.assertEqual(len(self.computed), 1)
+
+    def test_forgotten_writes_rebuild_entry(self):
+        """Test an entry older than the remembered writes is rebuilt whole"""
+        self.get()
+        for _ in range(WRITE_HISTORY + 1):
+            self.cache.note_written(
+                [TelemetryRow(DEVICE, START + timedelta(hours=3), {})]
+            )
+
+        self.get()
+        self.assertEqual(self.computed[1], (START, START + timedelta(hours=4)))
+
+    def test_live_windows_expire(self):
+        """Test only windows reaching past now get a TTL"""
+        self.get()
+        live_start = datetime.now(timezone.utc).replace(
+            minute=0, second=0, microsecond=0
+        )
+        self.cache.get(
+            ROLLUP_1H, DEVICE, live_start, live_start + timedelta(hours=1), self.compute
+        )
+
+        ttls = sorted(self.redis.ttls.values(), key=lambda ttl: ttl is None)
+        self.assertEqual(ttls, [60, None])
+
+    def test_memory_cap_evicts_least_recently_used(self):
+        """Test entries beyond the byte cap are evicted oldest first"""
+        self.cache.max_bytes = 200
+        self.get(hours=2)
+        self.get(hours=3)
+        self.get(hours=4)
+
+        remaining = [member.decode() for member in self.redis.zrange(LRU_KEY, 0, -1)]
+        self.assertEqual(
+            remaining,
+            [
+                self.cache.entry_key(
+                    ROLLUP_1H, DEVICE, START, START + timedelta(hours=4)
+                )
+            ],
+        )
+        self.assertLessEqual(int(self.redis.get(BYTES_KEY)), 200)
+
+    def test_byte_total_matches_entries(self):
+        """Test overwrites and evictions by several processes keep the total"""
+        other = AggregateCache(self.redis, live_ttl=60, max_bytes=200)
+        self.get(hours=2)
+        self.stored[0] = _bucket(0, 123456.0)
+        self.cache._store(
+            self.cache.entry_key(ROLLUP_1H, DEVICE, START, START + timedelta(hours=2)),
+            1,
+            self.stored[:2],
+            live=False,
+        )
+        self.get(hours=3)
+        # Both evict from the same candidates, the second finds them gone
+        other._evict()
+        other._evict()
+
+        sizes = self.redis.hashes.get(SIZES_KEY, {}).values()
+        self.assertEqual(int(self.redis.get(BYTES_KEY)), sum(map(int, sizes)))
+        self.assertLessEqual(int(self.redis.get(BYTES_KEY)), 200)
+
+
+class AggregateCacheIngestTest(TestCase):
+    """Test the ingest pipeline and the aggregates endpoint use the cache."""
+
+    @classmethod
+    def setUpTestData(cls):
+        device_type = DeviceType.objects.create(
+            name="Cache Sensor", metric_name="temperature", metric_unit="°C"
+        )
+        cls.device = Device.objects.create(
+            device_type=device_type, name="Cache Device", serial_number="AGG-SN-1"
+        )
+
+    def setUp(self):
+        self.cache = AggregateCache(FakeRedis())
+        patcher = mock.patch(
+            "apps.telemetry.aggregate_cache.get_aggregate_cache",
+            return_value=self.cache,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _aggregates(self):
+        response = self.client.get(
+            "/api/v1/telemetry/aggregates",
+            {
+                "device": str(self.device.id),
+                "from": START.isoformat(),
+                "to": (START + timedelta(hours=3)).isoformat(),
+                "points": 10,
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()["buckets"]
+
+    def test_ingest_refreshes_cached_aggregates(self):
+        """Test committed writes show up in the next aggregates response"""
+        row = TelemetryRow(self.device.id, START + timedelta(minutes=5), {"value": 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            write_telemetry([row])
+        self.assertEqual([bucket["count"] for bucket in self._aggregates()], [1])
+
+        row = TelemetryRow(
+            self.device.id, START + timedelta(hours=2, minutes=5), {"value": 5}
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            write_telemetry([row])
+        buckets = self._aggregates()
+
+        self.assertEqual([bucket["count"] for bucket in buckets], [1, 1])
+        self.assertEqual(buckets[1]["last"], 5.0)
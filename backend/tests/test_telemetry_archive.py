@@ -0,0 +1,164 @@
+import json
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+
+from apps.devices.models import Device, DeviceType
+from apps.telemetry.archive import (
+    archive_expiring,
+    drop_archived,
+    is_archived,
+    read_archive,
+)
+from apps.telemetry.models import Telemetry
+
+DAY_1 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+# Retention 10 days, lead 2: days before 2026-01-03 expire within the lead
+NOW = datetime(2026, 1, 11, 12, tzinfo=timezone.utc)
+
+
+class TelemetryArchiveTest(TestCase):
+    """Test Parquet archival of expiring days and reading it back."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.types = [
+            DeviceType.objects.create(
+                name=f"Archive Sensor {number}", metric_name="temperature"
+            )
+            for number in range(2)
+        ]
+        cls.devices = [
+            Device.objects.create(
+                device_type=device_type,
+                name=f"Archive Device {number}",
+                serial_number=f"ARCHIVE-SN-{number}",
+            )
+            for number, device_type in enumerate(cls.types)
+        ]
+        # Three readings per device on each of three days
+        for day in range(3):
+            for device in cls.devices:
+                for hour in (1, 12, 23):
+                    telemetry = Telemetry.objects.create(
+                        device=device,
+                        payload={"version": "1.0", "value": hour},
+                        value=hour,
+                        metric="temperature",
+                    )
+                    Telemetry.objects.filter(pk=telemetry.pk).update(
+                        timestamp=DAY_1 + timedelta(days=day, hours=hour)
+                    )
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+        settings = override_settings(
+            TELEMETRY_ARCHIVE_DIR=directory.name,
+            TELEMETRY_RETENTION_DAYS=10,
+            TELEMETRY_ARCHIVE_LEAD_DAYS=2,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_expiring_days_archived_by_device_type(self):
+        """Test each expiring day is written once, one file per device type"""
+        archived = archive_expiring(now=NOW)
+
+        self.assertEqual(archived, [(date(2026, 1, 1), 6), (date(2026, 1, 2), 6)])
+        self.assertEqual(
+            sorted(
+                str(path.relative_to(self.root))
+                for path in self.root.rglob("*.parquet")
+            ),
+            sorted(
+                f"day={day}/device_type={device_type.pk}/part-0.parquet"
+                for day in ("2026-01-01", "2026-01-02")
+                for device_type in self.types
+            ),
+        )
+        self.assertEqual(archive_expiring(now=NOW), [])
+        self.assertFalse(list(self.root.glob(".*")))
+
+    def test_late_rows_appended_before_drop(self):
+        """Test readings arriving for an archived day are archived, not dropped"""
+        archive_expiring(now=NOW)
+        late = Telemetry.objects.create(
+            device=self.devices[0], payload={"value": 5}, value=5
+        )
+        Telemetry.objects.filter(pk=late.pk).update(
+            timestamp=DAY_1 + timedelta(hours=5)
+        )
+
+        self.assertFalse(is_archived(DAY_1 + timedelta(days=1)))
+        self.assertEqual(archive_expiring(now=NOW), [(date(2026, 1, 1), 1)])
+        self.assertTrue(
+            (
+                self.root
+                / "day=2026-01-01"
+                / f"device_type={self.types[0].pk}"
+                / "part-1.parquet"
+            ).exists()
+        )
+        self.assertEqual(read_archive(DAY_1, DAY_1 + timedelta(days=1)).num_rows, 7)
+        self.assertTrue(is_archived(DAY_1 + timedelta(days=1)))
+
+        # Rows gone from the table stay archived and are not written again
+        Telemetry.objects.filter(timestamp__lt=DAY_1 + timedelta(hours=6)).delete()
+        self.assertEqual(archive_expiring(now=NOW), [])
+        self.assertEqual(read_archive(DAY_1, DAY_1 + timedelta(days=1)).num_rows, 7)
+
+    def test_read_archive_filters(self):
+        """Test archived ranges are read back filtered by time and device"""
+        archive_expiring(now=NOW)
+
+        table = read_archive(
+            DAY_1 + timedelta(hours=6),
+            DAY_1 + timedelta(days=5),
+            device_id=self.devices[1].pk,
+        )
+
+        self.assertEqual(
+            table.column("value").to_pylist(), [12.0, 23.0, 1.0, 12.0, 23.0]
+        )
+        self.assertEqual(
+            set(table.column("serial_number").to_pylist()), {"ARCHIVE-SN-1"}
+        )
+        self.assertEqual(
+            json.loads(table.column("payload")[0].as_py()),
+            {"version": "1.0", "value": 12},
+        )
+
+    def test_read_empty_archive(self):
+        """Test reading before anything was archived returns no rows"""
+        self.assertEqual(read_archive(DAY_1, NOW).num_rows, 0)
+
+    def test_drop_requires_archive(self):
+        """Test nothing is dropped until expired days are archived"""
+        self.assertFalse(is_archived(DAY_1 + timedelta(days=1)))
+        archive_expiring(now=NOW)
+        self.assertTrue(is_archived(DAY_1 + timedelta(days=1)))
+        # Plain PostgreSQL: there are no chunks to drop
+        self.assertIsNone(drop_archived(now=NOW))
+        self.assertEqual(Telemetry.objects.count(), 18)
+
+    def test_export_from_archive(self):
+        """Test the export endpoint streams archived rows"""
+        archive_expiring(now=NOW)
+
+        response = self.client.get(
+            "/api/v1/telemetry/export",
+            {
+                "source": "archive",
+                "format": "ndjson",
+                "from": DAY_1.isoformat(),
+                "to": (DAY_1 + timedelta(days=1)).isoformat(),
+            },
+        )
+
+        lines = b"".join(response.streaming_content).splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(json.loads(lines[0])["payload"]["version"], "1.0")
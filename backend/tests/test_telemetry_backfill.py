@@ -0,0 +1,49 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.devices.models import Device, DeviceType
+from apps.telemetry.models import Telemetry
+
+
+class BackfillTelemetryValuesTest(TestCase):
+    """Test backfilling typed columns from legacy JSON payloads."""
+
+    @classmethod
+    def setUpTestData(cls):
+        device_type = DeviceType.objects.create(
+            name="Backfill Sensor", metric_name="humidity", metric_unit="%"
+        )
+        cls.device = Device.objects.create(
+            device_type=device_type, name="Backfill Device", serial_number="BF-SN-1"
+        )
+
+    def test_backfills_legacy_rows(self):
+        """Test value, metric and schema_version are filled from the payload"""
+        legacy = Telemetry.objects.create(
+            device=self.device,
+            payload={"version": "1.0", "serial_number": "BF-SN-1", "value": 42},
+        )
+        broken = Telemetry.objects.create(
+            device=self.device,
+            payload={"version": "0.9", "serial_number": "BF-SN-1", "value": "n/a"},
+        )
+
+        out = StringIO()
+        call_command("backfill_telemetry_values", stdout=out)
+
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.value, 42.0)
+        self.assertEqual(legacy.metric, "humidity")
+        self.assertEqual(legacy.schema_version, "1.0")
+        broken.refresh_from_db()
+        self.assertIsNone(broken.value)
+        self.assertEqual(broken.schema_version, "0.9")
+        self.assertIn("Backfilled 2 telemetry rows", out.getvalue())
+
+    def test_nothing_to_backfill(self):
+        """Test the command exits cleanly when every row is typed"""
+        out = StringIO()
+        call_command("backfill_telemetry_values", stdout=out)
+        self.assertIn("Nothing to backfill", out.getvalue())
@@ -0,0 +1,128 @@
+import json
+import time
+from unittest import mock
+
+from django.db import IntegrityError, OperationalError
+from django.test import SimpleTestCase, TestCase
+
+from apps.devices.models import Device, DeviceType
+from apps.telemetry.buffer import TelemetryWriteBuffer
+from apps.telemetry.ingest import write_telemetry
+from apps.telemetry.models import Telemetry
+
+
+class TelemetryWriteBufferTest(SimpleTestCase):
+    """Test flush triggers and bounds of the telemetry write buffer."""
+
+    def setUp(self):
+        self.written = []
+
+    def writer(self, rows):
+        self.written.append(list(rows))
+
+    def test_flushes_when_flush_rows_reached(self):
+        """Test an unstarted buffer flushes inline once flush_rows are queued"""
+        buffer = TelemetryWriteBuffer(self.writer, flush_rows=3)
+        buffer.add([1, 2])
+        self.assertEqual(self.written, [])
+
+        buffer.add([3])
+        self.assertEqual(self.written, [[1, 2, 3]])
+        self.assertEqual(len(buffer), 0)
+
+    def test_background_thread_flushes_on_interval(self):
+        """Test the background thread flushes rows below flush_rows"""
+        buffer = TelemetryWriteBuffer(self.writer, flush_rows=100, flush_interval=0.01)
+        buffer.start()
+        try:
+            buffer.add([1])
+            deadline = time.monotonic() + 2
+            while not self.written and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            buffer.close()
+        self.assertEqual(self.written, [[1]])
+
+    def test_close_flushes_remaining_rows(self):
+        """Test closing the buffer writes what is still queued"""
+        buffer = TelemetryWriteBuffer(self.writer, flush_rows=100, flush_interval=60)
+        buffer.start()
+        buffer.add([1, 2])
+        buffer.close()
+        self.assertEqual(self.written, [[1, 2]])
+
+    def test_connection_failure_requeues_within_bound(self):
+        """Test transient failures keep the newest rows up to max_rows"""
+        writer = mock.Mock(side_effect=OperationalError("db down"))
+        buffer = TelemetryWriteBuffer(writer, flush_rows=2, max_rows=3)
+
+        buffer.add([1, 2])
+        buffer.add([3, 4])
+
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual(buffer._rows, [2, 3, 4])
+
+    def test_rejected_rows_are_dropped(self):
+        """Test rows the database rejects are not retried forever"""
+        writer = mock.Mock(side_effect=IntegrityError("fk violation"))
+        buffer = TelemetryWriteBuffer(writer, flush_rows=2)
+
+        buffer.add([1, 2])
+
+        self.assertEqual(len(buffer), 0)
+
+    def test_dropped_rows_release_dedup_keys(self):
+        """Test claims of dropped readings are released so retries get through"""
+        released = []
+        writer = mock.Mock(side_effect=OperationalError("db down"))
+        buffer = TelemetryWriteBuffer(
+            writer, flush_rows=2, max_rows=3, release=released.extend
+        )
+
+        buffer.add([1, 2], ["k1", None])
+        buffer.add([3, 4], ["k3", "k4"])
+        self.assertEqual(released, ["k1"])
+        self.assertEqual(buffer._keys, [None, "k3", "k4"])
+
+        writer.side_effect = IntegrityError("fk violation")
+        buffer.flush()
+        self.assertEqual(released, ["k1", "k3", "k4"])
+
+
+class BufferedIngestTest(TestCase):
+    """Test ingest hands rows to the write buffer when it is enabled."""
+
+    @classmethod
+    def setUpTestData(cls):
+        device_type = DeviceType.objects.create(
+            name="Buffered Vibration Sensor",
+            metric_name="vibration",
+            metric_unit="mm/s",
+        )
+        cls.device = Device.objects.create(
+            device_type=device_type,
+            name="Buffered Device 1",
+            serial_number="BUFFER-SN-0001",
+        )
+
+    def test_readings_written_on_flush(self):
+        """Test buffered readings reach the telemetry table on flush"""
+        buffer = TelemetryWriteBuffer(write_telemetry, flush_rows=10)
+        reading = {"schema_version": "1.0", "ssn": "BUFFER-SN-0001", "value": 4.2}
+
+        with (
+            self.settings(TELEMETRY_WRITE_BUFFER_ENABLED=True),
+            mock.patch("apps.telemetry.ingest.get_write_buffer", return_value=buffer),
+        ):
+            response = self.client.post(
+                "/api/v1/telemetry",
+                data=json.dumps([reading] * 3),
+                content_type="application/json",
+            )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Telemetry.objects.count(), 0)
+        self.assertEqual(len(buffer), 3)
+
+        self.assertEqual(buffer.flush(), 3)
+        self.assertEqual(Telemetry.objects.filter(device=self.device).count(), 3)
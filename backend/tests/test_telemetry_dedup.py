@@ -0,0 +1,160 @@
+import json
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.devices.models import Device, DeviceType
+from apps.telemetry.dedup import Deduplicator
+from apps.telemetry.models import Telemetry
+
+
+class FakeRedis:
+    """Dict-backed stand-in for SET NX and DEL."""
+
+    def __init__(self):
+        self.store = {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.results = []
+
+    def set(self, *args, **kwargs):
+        self.results.append(self.redis.set(*args, **kwargs))
+
+    def execute(self):
+        return self.results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class DeduplicatorTest(SimpleTestCase):
+    """Test the local and Redis tiers of the deduplication window."""
+
+    def test_claim_once(self):
+        """Test a key is new only the first time, also within one batch"""
+        dedup = Deduplicator()
+        self.assertEqual(dedup.claim(["a", "b", "a"]), [True, True, False])
+        self.assertEqual(dedup.claim(["a", "c"]), [False, True])
+
+    def test_window_expires(self):
+        """Test a key can be claimed again after the window"""
+        dedup = Deduplicator(window=0.01)
+        dedup.claim(["a"])
+        time.sleep(0.02)
+        self.assertEqual(dedup.claim(["a"]), [True])
+
+    def test_bounded_size(self):
+        """Test the local tier keeps at most max_size keys"""
+        dedup = Deduplicator(max_size=2)
+        dedup.claim(["a", "b", "c"])
+        self.assertEqual(len(dedup), 2)
+
+    def test_redis_catches_retry_on_other_process(self):
+        """Test a key claimed by one process is a duplicate in another"""
+        shared = FakeRedis()
+        Deduplicator(redis_client=shared).claim(["a"])
+        self.assertEqual(
+            Deduplicator(redis_client=shared).claim(["a", "b"]), [False, True]
+        )
+
+    def test_release(self):
+        """Test released keys can be claimed again in every tier"""
+        shared = FakeRedis()
+        dedup = Deduplicator(redis_client=shared)
+        dedup.claim(["a"])
+        dedup.release(["a"])
+        self.assertEqual(shared.store, {})
+        self.assertEqual(dedup.claim(["a"]), [True])
+
+
+@override_settings(TELEMETRY_DEDUP_ENABLED=True)
+class IngestDedupTest(TestCase):
+    """Test duplicates are dropped before the telemetry insert."""
+
+    @classmethod
+    def setUpTestData(cls):
+        device_type = DeviceType.objects.create(
+            name="Dedup Sensor", metric_name="temperature", metric_unit="°C"
+        )
+        Device.objects.create(
+            device_type=device_type, name="Dedup Device 1", serial_number="DEDUP-SN-1"
+        )
+
+    def setUp(self):
+        self.dedup = Deduplicator()
+        patcher = mock.patch(
+            "apps.telemetry.ingest.get_deduplicator", return_value=self.dedup
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, data):
+        return self.client.post(
+            "/api/v1/telemetry", data=json.dumps(data), content_type="application/json"
+        )
+
+    def reading(self, **extra):
+        return {"schema_version": "1.0", "ssn": "DEDUP-SN-1", "value": 20, **extra}
+
+    def test_retry_with_message_id_stored_once(self):
+        """Test a retried message id is accepted but not written again"""
+        reading = self.reading(message_id="gw-1")
+        self.assertEqual(self.post(reading).status_code, 202)
+        self.assertEqual(self.post(reading).status_code, 202)
+
+        telemetry = Telemetry.objects.get()
+        self.assertEqual(telemetry.payload["message_id"], "gw-1")
+
+    def test_retry_with_timestamp_stored_once(self):
+        """Test the same device timestamp and payload is a duplicate"""
+        first = self.reading(ts="2026-01-01T00:00:00Z")
+        changed = self.reading(ts="2026-01-01T00:00:00Z", value=21)
+
+        response = self.post([first, first, changed])
+
+        self.assertEqual(response.json()["accepted"], 3)
+        self.assertTrue(response.json()["results"][1]["duplicate"])
+        self.assertEqual(Telemetry.objects.count(), 2)
+
+    def test_readings_without_key_never_deduplicated(self):
+        """Test identical readings without ts or message_id are all stored"""
+        self.post([self.reading(), self.reading()])
+        self.assertEqual(Telemetry.objects.count(), 2)
+
+    def test_rejected_reading_releases_claim(self):
+        """Test a reading rejected once is not treated as a duplicate later"""
+        reading = self.reading(ssn="DEDUP-SN-2", message_id="gw-2")
+        self.assertEqual(self.post(reading).status_code, 400)
+        self.assertEqual(self.dedup.claim(["DEDUP-SN-2|id|gw-2"]), [True])
+
+    def test_failed_write_releases_claim(self):
+        """Test a retry goes through when the first write failed"""
+        reading = self.reading(message_id="gw-3")
+        with mock.patch(
+            "apps.telemetry.ingest.persist_rows", side_effect=RuntimeError("down")
+        ):
+            with self.assertRaises(RuntimeError):
+                self.post(reading)
+
+        self.assertEqual(self.post(reading).status_code, 202)
+        self.assertEqual(Telemetry.objects.count(), 1)
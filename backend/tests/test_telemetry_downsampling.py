@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+
+from apps.devices.models import Device, DeviceType
+from apps.telemetry.downsampling import (
+    downsample,
+    lttb_downsample,
+    minmax_downsample,
+    series_chunks,
+)
+from apps.telemetry.models import Telemetry
+
+START = datetime(2026, 3, 1, tzinfo=timezone.utc)
+END = START + timedelta(days=1)
+
+
+def chunked(times, values, size):
+    for offset in range(0, len(times), size):
+        yield times[offset : offset + size], values[offset : offset + size]
+
+
+class DownsamplingTest(SimpleTestCase):
+    """Test the LTTB and min/max samplers on a noisy series with a spike."""
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.times = np.sort(rng.uniform(START.timestamp(), END.timestamp(), 50000))
+        self.values = np.sin(self.times / 3000) + rng.normal(0, 0.1, len(self.times))
+        self.values[12345] = 50.0
+
+    def sample(self, sampler, chunk_size, points=200):
+        return sampler(chunked(self.times, self.values, chunk_size), START, END, points)
+
+    def test_lttb(self):
+        """Test LTTB keeps the ends and the spike within the point budget"""
+        times, values = self.sample(lttb_downsample, len(self.times))
+
+        self.assertLessEqual(len(times), 200)
+        self.assertEqual((times[0], times[-1]), (self.times[0], self.times[-1]))
+        self.assertTrue(np.all(np.diff(times) > 0))
+        self.assertIn(50.0, values)
+
+    def test_minmax(self):
+        """Test min/max keeps every bucket's extremes in time order"""
+        times, values = self.sample(minmax_downsample, len(self.times))
+
+        self.assertLessEqual(len(times), 200)
+        self.assertTrue(np.all(np.diff(times) > 0))
+        self.assertEqual(values.max(), 50.0)
+        self.assertEqual(values.min(), self.values.min())
+
+    def test_chunking_does_not_change_result(self):
+        """Test streaming in small chunks gives the same series as one chunk"""
+        for sampler in (lttb_downsample, minmax_downsample):
+            with self.subTest(sampler=sampler.__name__):
+                whole = self.sample(sampler, len(self.times))
+                streamed = self.sample(sampler, 997)
+                np.testing.assert_array_equal(whole[0], streamed[0])
+                np.testing.assert_array_equal(whole[1], streamed[1])
+
+    def test_short_series_returned_raw(self):
+        """Test series within the budget are not downsampled"""
+        times, values, raw_count, method = downsample(
+            chunked(self.times[:50], self.values[:50], 20), START, END, 100
+        )
+        self.assertEqual((raw_count, method), (50, "raw"))
+        np.testing.assert_array_equal(values, self.values[:50])
+
+        _, _, raw_count, method = downsample(
+            chunked(self.times, self.values, 1000), START, END, 100, "minmax"
+        )
+        self.assertEqual((raw_count, method), (len(self.times), "minmax"))
+
+
+class TelemetrySeriesTest(TestCase):
+    """Test the series endpoint and its chunked raw query."""
+
+    @classmethod
+    def setUpTestData(cls):
+        device_type = DeviceType.objects.create(
+            name="Series Sensor", metric_name="temperature", metric_unit="°C"
+        )
+        cls.device = Device.objects.create(
+            device_type=device_type, name="Series Device", serial_number="SERIES-SN-1"
+        )
+        for minute in range(30):
+            telemetry = Telemetry.objects.create(
+                device=cls.device, payload={"value": minute}, value=minute
+            )
+            Telemetry.objects.filter(pk=telemetry.pk).update(
+                timestamp=START + timedelta(minutes=minute)
+            )
+
+    def test_series_chunks(self):
+        """Test raw rows stream in order across chunks"""
+        chunks = list(series_chunks(self.device.id, START, END, chunk_size=7))
+
+        self.assertEqual([len(times) for times, _ in chunks], [7, 7, 7, 7, 2])
+        values = np.concatenate([values for _, values in chunks])
+        np.testing.assert_array_equal(values, np.arange(30))
+
+    def test_series_endpoint(self):
+        """Test the endpoint downsamples to the requested point count"""
+        response = self.client.get(
+            "/api/v1/telemetry/series",
+            {
+                "device": str(self.device.id),
+                "from": START.isoformat(),
+                "to": (START + timedelta(hours=1)).isoformat(),
+                "points": 10,
+                "method": "minmax",
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["method"], body["raw_count"]), ("minmax", 30))
+        self.assertLessEqual(len(body["points"]), 10)
+        self.assertEqual(body["points"][0], [int(START.timestamp() * 1000), 0.0])
+
+    def test_invalid_method(self):
+        """Test unknown methods are rejected"""
+        response = self.client.get(
+            "/api/v1/telemetry/series",
+            {"device": str(self.device.id), "method": "average"},
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,223 @@
+import json
+import socket
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase
+
+from apps.devices.models import Device, DeviceType
+from apps.telemetry.async_ingest import close_pool
+from apps.telemetry.models import DeviceLatestTelemetry, Telemetry
+from apps.telemetry.views import telemetry_ingest_async
+
+INGEST_URL = "/api/v1/telemetry"
+
+
+class TelemetryIngestTest(TestCase):
+    """Test single and batch telemetry ingest."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.device_type = DeviceType.objects.create(
+            name="Ingest Temperature Sensor",
+            metric_name="temperature",
+            metric_unit="°C",
+        )
+        cls.device = Device.objects.create(
+            device_type=cls.device_type,
+            name="Ingest Device 1",
+            serial_number="INGEST-SN-0001",
+        )
+        cls.inactive_device = Device.objects.create(
+            device_type=cls.device_type,
+            name="Ingest Device 2",
+            serial_number="INGEST-SN-0002",
+            status="inactive",
+        )
+
+    def reading(self, **overrides):
+        data = {
+            "schema_version": "1.0",
+            "ssn": self.device.serial_number,
+            "value": 21.5,
+        }
+        data.update(overrides)
+        return data
+
+    def post_json(self, data):
+        return self.client.post(
+            INGEST_URL, data=json.dumps(data), content_type="application/json"
+        )
+
+    def test_single_reading_accepted(self):
+        """Test a single valid reading is stored and returns 202"""
+        response = self.post_json(self.reading())
+        self.assertEqual(response.status_code, 202)
+
+        telemetry = Telemetry.objects.get(device=self.device)
+        self.assertEqual(telemetry.payload["value"], 21.5)
+        self.assertEqual(telemetry.payload["serial_number"], "INGEST-SN-0001")
+        self.assertEqual(telemetry.value, 21.5)
+        self.assertEqual(telemetry.metric, "temperature")
+        self.assertEqual(telemetry.schema_version, "1.0")
+        self.device.refresh_from_db()
+        self.assertIsNotNone(self.device.last_seen)
+
+    def test_single_reading_rejected(self):
+        """Test a malformed single reading returns 400"""
+        response = self.post_json({"schema_version": "1.0", "ssn": "X"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("error", response.json())
+        self.assertEqual(Telemetry.objects.count(), 0)
+
+    def test_unknown_device_rejected(self):
+        """Test readings for unregistered serial numbers are rejected"""
+        response = self.post_json(self.reading(ssn="UNKNOWN"))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Unknown device serial number")
+
+    def test_batch_reports_per_item_results(self):
+        """Test one bad reading does not fail the whole batch"""
+        batch = [
+            self.reading(value=1, ts="2026-01-16T22:53:00Z"),
+            self.reading(value="hot"),
+            self.reading(ssn=self.inactive_device.serial_number),
+            self.reading(value=3, ts="2026-01-16T22:53:01Z"),
+        ]
+        response = self.post_json(batch)
+        self.assertEqual(response.status_code, 202)
+
+        body = response.json()
+        self.assertEqual(body["accepted"], 2)
+        self.assertEqual(body["rejected"], 2)
+        statuses = [result["status"] for result in body["results"]]
+        self.assertEqual(statuses, ["accepted", "rejected", "rejected", "accepted"])
+
+        values = list(
+            Telemetry.objects.order_by("timestamp").values_list(
+                "payload__value", flat=True
+            )
+        )
+        self.assertEqual(values, [1, 3])
+
+    def test_ndjson_batch(self):
+        """Test NDJSON batches reject malformed lines individually"""
+        lines = [json.dumps(self.reading(value=5)), "{not json", ""]
+        response = self.client.post(
+            INGEST_URL,
+            data="\n".join(lines),
+            content_type="application/x-ndjson",
+        )
+        self.assertEqual(response.status_code, 202)
+
+        body = response.json()
+        self.assertEqual(body["accepted"], 1)
+        self.assertEqual(body["results"][1]["status"], "rejected")
+        self.assertEqual(Telemetry.objects.count(), 1)
+
+    def test_batch_size_limit(self):
+        """Test empty and oversized batches are rejected"""
+        self.assertEqual(self.post_json([]).status_code, 400)
+        with self.settings(TELEMETRY_INGEST_MAX_BATCH=2):
+            response = self.post_json([self.reading()] * 3)
+        self.assertEqual(response.status_code, 400)
+
+
+class TelemetryIngestAsyncTest(TransactionTestCase):
+    """Test the async ingest view used by the ASGI deployment.
+
+    The async path writes through its own connection pool, so test data has
+    to be committed rather than kept inside a per-test transaction.
+    """
+
+    def setUp(self):
+        device_type = DeviceType.objects.create(
+            name="Async Pressure Sensor",
+            metric_name="pressure",
+            metric_unit="bar",
+        )
+        self.device = Device.objects.create(
+            device_type=device_type,
+            name="Async Device 1",
+            serial_number="ASYNC-SN-0001",
+        )
+        self.factory = AsyncRequestFactory()
+
+    async def post_async(self, data):
+        request = self.factory.post(
+            INGEST_URL, data=json.dumps(data), content_type="application/json"
+        )
+        try:
+            return await telemetry_ingest_async(request)
+        finally:
+            await close_pool()
+
+    async def test_single_reading_accepted(self):
+        """Test the async view stores a single reading"""
+        response = await self.post_async(
+            {"schema_version": "1.0", "ssn": "ASYNC-SN-0001", "value": 3.5}
+        )
+        self.assertEqual(response.status_code, 202)
+
+        telemetry = await Telemetry.objects.aget(device_id=self.device.id)
+        self.assertEqual(telemetry.payload["value"], 3.5)
+        self.assertEqual(telemetry.value, 3.5)
+        self.assertEqual(telemetry.schema_version, "1.0")
+        device = await Device.objects.aget(pk=self.device.pk)
+        self.assertIsNotNone(device.last_seen)
+        latest = await DeviceLatestTelemetry.objects.aget(device_id=self.device.id)
+        self.assertEqual(latest.value, 3.5)
+
+    async def test_batch_reports_per_item_results(self):
+        """Test the async view reports per-item results for batches"""
+        response = await self.post_async(
+            [
+                {"schema_version": "1.0", "ssn": "ASYNC-SN-0001", "value": 1},
+                {"schema_version": "1.0", "ssn": "UNKNOWN", "value": 2},
+            ]
+        )
+        self.assertEqual(response.status_code, 202)
+
+        body = json.loads(response.content)
+        self.assertEqual(body["accepted"], 1)
+        self.assertEqual(body["results"][1]["error"], "Unknown device serial number")
+        self.assertEqual(await Telemetry.objects.acount(), 1)
+
+
+class BenchmarkIngestTest(TestCase):
+    """Test the ingest benchmark reports failing targets instead of crashing."""
+
+    @classmethod
+    def setUpTestData(cls):
+        device_type = DeviceType.objects.create(
+            name="Benchmark Sensor", metric_name="temperature", metric_unit="°C"
+        )
+        Device.objects.create(
+            device_type=device_type, name="Benchmark", serial_number="BENCH-SN-1"
+        )
+
+    def test_unreachable_target_reports_errors(self):
+        """Test a target without successful requests prints no percentiles"""
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        out = StringIO()
+
+        call_command(
+            "benchmark_ingest",
+            "--target",
+            f"down=http://127.0.0.1:{port}{INGEST_URL}",
+            "--requests",
+            "3",
+            stdout=out,
+        )
+
+        (row,) = [line for line in out.getvalue().splitlines() if line[:5] == "down "]
+        self.assertEqual(row.split()[-3:], ["-", "-", "3"])
+
+    def test_requests_must_be_positive(self):
+        """Test --requests 0 is rejected"""
+        with self.assertRaisesMessage(CommandError, "must be >= 1"):
+            call_command(
+                "benchmark_ingest", "--target", "x=http://localhost/", "--requests", "0"
+            )
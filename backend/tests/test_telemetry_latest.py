@@ -0,0 +1,219 @@
+import importlib
+import json
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from apps.devices.models import Device, DeviceType
+from apps.telemetry.latest import (
+    COMPLETE_FIELD,
+    REDIS_KEY,
+    FleetSnapshot,
+    LatestTelemetryTracker,
+    write_latest,
+)
+from apps.telemetry.models import DeviceLatestTelemetry, Telemetry
+from apps.telemetry.rows import TelemetryRow
+
+START = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+class FakeRedis:
+    """Dict-backed stand-in for the hash commands of the mirror."""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(
+            {field: value.encode() for field, value in mapping.items()}
+        )
+
+    def hgetall(self, key):
+        return {
+            field.encode(): value for field, value in self.hashes.get(key, {}).items()
+        }
+
+    def hdel(self, key, *fields):
+        for field in fields:
+            self.hashes.get(key, {}).pop(field, None)
+
+
+class LatestTelemetryTest(TestCase):
+    """Test the latest-reading projection, its mirror and the snapshot."""
+
+    @classmethod
+    def setUpTestData(cls):
+        device_type = DeviceType.objects.create(
+            name="Latest Sensor", metric_name="temperature", metric_unit="°C"
+        )
+        cls.devices = [
+            Device.objects.create(
+                device_type=device_type,
+                name=f"Latest Device {number}",
+                serial_number=f"LATEST-SN-{number}",
+            )
+            for number in range(2)
+        ]
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = mock.patch(
+            "apps.telemetry.latest.get_latest_redis", return_value=self.redis
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, data):
+        return self.client.post(
+            "/api/v1/telemetry", data=json.dumps(data), content_type="application/json"
+        )
+
+    def reading(self, number, value, minutes):
+        return {
+            "schema_version": "1.0",
+            "ssn": f"LATEST-SN-{number}",
+            "value": value,
+            "ts": (START + timedelta(minutes=minutes)).isoformat(),
+        }
+
+    def mirrored(self):
+        entries = [
+            json.loads(raw)
+            for field, raw in self.redis.hashes.get(REDIS_KEY, {}).items()
+            if field != COMPLETE_FIELD
+        ]
+        return {entry["device"]: entry["value"] for entry in entries}
+
+    def test_ingest_keeps_newest_reading(self):
+        """Test each batch upserts the newest reading and never moves back"""
+        self.post([self.reading(0, 1, 1), self.reading(0, 2, 2), self.reading(1, 5, 0)])
+        self.post(self.reading(0, 0, 0))
+
+        latest = DeviceLatestTelemetry.objects.get(device=self.devices[0])
+        self.assertEqual(latest.value, 2.0)
+        self.assertEqual(latest.timestamp, START + timedelta(minutes=2))
+        self.assertEqual(latest.metric, "temperature")
+        self.assertEqual(
+            self.mirrored(),
+            {str(self.devices[0].id): 2.0, str(self.devices[1].id): 5.0},
+        )
+
+    def test_write_behind_coalesces(self):
+        """Test the tracker upserts once per device per flush"""
+        writer = mock.Mock(side_effect=write_latest)
+        tracker = LatestTelemetryTracker(writer=writer)
+        device_id = self.devices[0].id
+        for minutes in (3, 1, 2):
+            tracker.record(
+                [
+                    TelemetryRow(
+                        device_id,
+                        START + timedelta(minutes=minutes),
+                        {"value": minutes},
+                    )
+                ]
+            )
+
+        self.assertEqual(tracker.flush(), 1)
+        self.assertEqual(tracker.flush(), 0)
+        writer.assert_called_once()
+        self.assertEqual(
+            DeviceLatestTelemetry.objects.get(device_id=device_id).value, 3.0
+        )
+
+    def test_snapshot_endpoint(self):
+        """Test the fleet snapshot lists every device and honours the ETag"""
+        self.post([self.reading(0, 1, 1), self.reading(1, 2, 1)])
+        snapshot = FleetSnapshot(ttl=0, redis_client=self.redis)
+        with mock.patch(
+            "apps.telemetry.views.get_fleet_snapshot", return_value=snapshot
+        ):
+            response = self.client.get("/api/v1/telemetry/latest")
+            body = response.json()
+            self.assertEqual(
+                sorted(entry["value"] for entry in body["data"]), [1.0, 2.0]
+            )
+
+            repeated = self.client.get(
+                "/api/v1/telemetry/latest", HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+            self.assertEqual(repeated.status_code, 304)
+
+    def test_snapshot_rebuilds_empty_mirror(self):
+        """Test a lost Redis hash is served from the table and refilled"""
+        self.post(self.reading(0, 7, 1))
+        self.redis.hashes.clear()
+
+        body, _ = FleetSnapshot(ttl=0, redis_client=self.redis).get()
+
+        self.assertEqual(json.loads(body)["data"][0]["value"], 7.0)
+        self.assertEqual(self.mirrored(), {str(self.devices[0].id): 7.0})
+
+    def test_snapshot_ignores_partial_mirror(self):
+        """Test a hash refilled by ingest after a Redis restart is not trusted"""
+        self.post([self.reading(0, 7, 1), self.reading(1, 8, 1)])
+        FleetSnapshot(ttl=0, redis_client=self.redis).get()
+        self.redis.hashes.clear()
+        self.post(self.reading(0, 9, 2))
+
+        body, _ = FleetSnapshot(ttl=0, redis_client=self.redis).get()
+
+        self.assertEqual(
+            sorted(entry["value"] for entry in json.loads(body)["data"]), [8.0, 9.0]
+        )
+        self.assertIn(COMPLETE_FIELD, self.redis.hashes[REDIS_KEY])
+        self.assertEqual(len(self.mirrored()), 2)
+
+    def test_snapshot_rendered_once_per_ttl(self):
+        """Test polls inside the TTL reuse the rendered snapshot"""
+        snapshot = FleetSnapshot(ttl=60, redis_client=self.redis)
+        first = snapshot.get()
+        self.post(self.reading(0, 7, 1))
+        self.assertIs(snapshot.get(), first)
+
+    def test_deleted_device_leaves_mirror(self):
+        """Test deleting a device removes it from the table and from Redis"""
+        self.post(self.reading(1, 3, 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.devices[1].delete()
+
+        self.assertFalse(DeviceLatestTelemetry.objects.exists())
+        self.assertEqual(self.mirrored(), {})
+
+    @override_settings(TELEMETRY_LATEST_WRITE_BEHIND=True)
+    def test_ingest_defers_upsert(self):
+        """Test ingest leaves the upsert to the tracker when write-behind is on"""
+        tracker = LatestTelemetryTracker()
+        with mock.patch(
+            "apps.telemetry.latest.get_latest_tracker", return_value=tracker
+        ):
+            self.post(self.reading(0, 1, 1))
+
+        self.assertFalse(DeviceLatestTelemetry.objects.exists())
+        tracker.flush()
+        self.assertTrue(DeviceLatestTelemetry.objects.exists())
+
+    def test_migration_backfills_from_telemetry(self):
+        """Test the backfill migration fills the table from existing telemetry"""
+        migration = importlib.import_module(
+            "apps.telemetry.migrations.0005_backfill_device_latest_telemetry"
+        )
+        for minutes, value in [(1, 4), (3, 6), (2, 5)]:
+            telemetry = Telemetry.objects.create(
+                device=self.devices[0], payload={"value": value}
+            )
+            # timestamp defaults to now on create
+            Telemetry.objects.filter(pk=telemetry.pk).update(
+                timestamp=START + timedelta(minutes=minutes)
+            )
+
+        with connection.cursor() as cursor:
+            cursor.execute(migration.BACKFILL)
+
+        latest = DeviceLatestTelemetry.objects.get()
+        self.assertEqual(latest.device_id, self.devices[0].id)
+        self.assertEqual(latest.timestamp, START + timedelta(minutes=3))
+        self.assertEqual(latest.value, 6.0)
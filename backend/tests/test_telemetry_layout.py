@@ -0,0 +1,71 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.telemetry.layout import Layout, configured_layout, parse_layout
+
+
+class LayoutTest(SimpleTestCase):
+    """Test hypertable layout settings and candidate specs."""
+
+    def test_defaults(self):
+        """Test the default layout segments by device, newest first"""
+        self.assertEqual(
+            configured_layout(), Layout("7 days", "device_id", "timestamp DESC")
+        )
+
+    @override_settings(
+        TELEMETRY_CHUNK_TIME_INTERVAL="1 day",
+        TELEMETRY_COMPRESS_SEGMENTBY="device_id, metric",
+        TELEMETRY_COMPRESS_ORDERBY="timestamp DESC, id",
+    )
+    def test_configured(self):
+        """Test the layout is read from settings"""
+        layout = configured_layout()
+        self.assertEqual(layout.chunk_interval, "1 day")
+        self.assertEqual(layout.segmentby, "device_id, metric")
+        self.assertEqual(layout.orderby, "timestamp DESC, id")
+
+    def test_parse_layout(self):
+        """Test candidate specs, including compression without segmentby"""
+        self.assertEqual(
+            parse_layout("1 day | device_id | timestamp DESC NULLS LAST"),
+            Layout("1 day", "device_id", "timestamp DESC NULLS LAST"),
+        )
+        self.assertEqual(parse_layout("12 hours||timestamp").segmentby, "")
+
+    def test_invalid_layouts(self):
+        """Test unknown columns and malformed specs are rejected"""
+        for spec in (
+            "1 day|device|timestamp DESC",
+            "1 day|device_id|time DESC",
+            "1 day|device_id|timestamp DOWN",
+            "1 day|device_id|",
+            "1 day|device_id",
+            "|device_id|timestamp",
+        ):
+            with self.subTest(spec=spec), self.assertRaises(ValueError):
+                parse_layout(spec)
+
+    @override_settings(TELEMETRY_COMPRESS_SEGMENTBY="serial_number")
+    def test_setup_rejects_invalid_settings(self):
+        """Test setup_timescaledb fails before touching the database"""
+        with self.assertRaisesMessage(CommandError, "segmentby column 'serial_number'"):
+            call_command("setup_timescaledb", stdout=StringIO())
+
+
+class BenchmarkLayoutTest(TestCase):
+    """Test the layout benchmark command's checks on plain Postgres."""
+
+    def test_requires_timescaledb(self):
+        """Test the benchmark refuses to run without TimescaleDB"""
+        with self.assertRaisesMessage(CommandError, "TimescaleDB is not installed"):
+            call_command("benchmark_layout", stdout=StringIO())
+
+    def test_rejects_invalid_layout(self):
+        """Test candidate specs are validated"""
+        with self.assertRaisesMessage(CommandError, "Unknown orderby column"):
+            call_command(
+                "benchmark_layout", layout=["1 day|device_id|ts"], stdout=StringIO()
+            )
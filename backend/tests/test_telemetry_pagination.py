@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, timezone
+
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, TestCase
+
+from apps.devices.models import Device, DeviceType
+from apps.telemetry.models import Telemetry
+from apps.telemetry.pagination import decode_cursor, encode_cursor
+
+START = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+class CursorTest(SimpleTestCase):
+    """Test cursor encoding."""
+
+    def test_round_trip(self):
+        """Test a cursor decodes to the timestamp and id it was made from"""
+        moment = START + timedelta(microseconds=5)
+        self.assertEqual(decode_cursor(encode_cursor(moment, 42)), (moment, 42))
+
+    def test_invalid_cursor(self):
+        """Test tampered cursors are rejected"""
+        for token in ("not-a-cursor", encode_cursor(START, 1)[:-3], "WzFd"):
+            with self.subTest(token=token), self.assertRaises(ValidationError):
+                decode_cursor(token)
+
+
+class TelemetryListTest(TestCase):
+    """Test keyset pagination of GET /api/v1/telemetry."""
+
+    @classmethod
+    def setUpTestData(cls):
+        device_type = DeviceType.objects.create(
+            name="Page Sensor", metric_name="temperature", metric_unit="°C"
+        )
+        cls.device = Device.objects.create(
+            device_type=device_type, name="Page Device 1", serial_number="PAGE-SN-1"
+        )
+        other = Device.objects.create(
+            device_type=device_type, name="Page Device 2", serial_number="PAGE-SN-2"
+        )
+        # Readings 2 and 3 share a timestamp so the id has to break the tie
+        offsets = [0, 1, 1, 2, 3]
+        for value, offset in enumerate(offsets):
+            telemetry = Telemetry.objects.create(
+                device=cls.device,
+                payload={"value": value},
+                value=value,
+                metric="temperature",
+            )
+            Telemetry.objects.filter(pk=telemetry.pk).update(
+                timestamp=START + timedelta(minutes=offset)
+            )
+        Telemetry.objects.create(device=other, payload={"value": 99}, value=99)
+
+    def get(self, **params):
+        return self.client.get("/api/v1/telemetry", params)
+
+    def test_pages_cover_every_row_once(self):
+        """Test following next_cursor walks all rows newest first"""
+        values, cursor = [], None
+        while True:
+            params = {"device_id": str(self.device.id), "page_size": 2}
+            if cursor:
+                params["cursor"] = cursor
+            body = self.get(**params).json()
+            values += [row["value"] for row in body["data"]]
+            cursor = body["pagination"]["next_cursor"]
+            if cursor is None:
+                break
+
+        self.assertEqual(values, [4.0, 3.0, 2.0, 1.0, 0.0])
+        self.assertNotIn("total", body["pagination"])
+
+    def test_row_format(self):
+        """Test rows carry the device serial number and typed columns"""
+        body = self.get(device_id=str(self.device.id), page_size=1).json()
+        self.assertEqual(
+            body["data"],
+            [
+                {
+                    "ssn": "PAGE-SN-1",
+                    "value": 4.0,
+                    "metric": "temperature",
+                    "ts": (START + timedelta(minutes=3)).isoformat(),
+                }
+            ],
+        )
+
+    def test_all_devices(self):
+        """Test the device filter is optional"""
+        body = self.get(page_size=10).json()
+        self.assertEqual(len(body["data"]), 6)
+        self.assertIsNone(body["pagination"]["next_cursor"])
+
+    def test_invalid_parameters(self):
+        """Test bad cursors, page sizes and device ids are rejected"""
+        self.assertEqual(self.get(cursor="garbage").status_code, 400)
+        self.assertEqual(self.get(page_size=0).status_code, 400)
+        self.assertEqual(self.get(page_size=1001).status_code, 400)
+        self.assertEqual(self.get(device_id="nope").status_code, 400)
+
+    def test_other_methods_not_allowed(self):
+        """Test the collection only serves GET and POST"""
+        self.assertEqual(self.client.delete("/api/v1/telemetry").status_code, 405)
@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta, timezone
+
+from django.test import SimpleTestCase, TestCase
+
+from apps.devices.models import Device, DeviceType
+from apps.telemetry.models import Telemetry
+from apps.telemetry.rollups import (
+    ROLLUP_1D,
+    ROLLUP_1H,
+    ROLLUP_1M,
+    align,
+    choose_rollup,
+    create_view_sql,
+    query_rollups,
+)
+
+START = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+class RollupSelectionTest(SimpleTestCase):
+    """Test resolution selection and bucket alignment."""
+
+    def test_finest_rollup_within_budget(self):
+        """Test the point budget decides the resolution"""
+        self.assertIs(choose_rollup(START, START + timedelta(hours=6), 500), ROLLUP_1M)
+        self.assertIs(choose_rollup(START, START + timedelta(days=7), 500), ROLLUP_1H)
+        self.assertIs(choose_rollup(START, START + timedelta(days=31), 500), ROLLUP_1D)
+        self.assertIs(choose_rollup(START, START + timedelta(days=3650), 10), ROLLUP_1D)
+
+    def test_align(self):
+        """Test timestamps are rounded to bucket boundaries"""
+        moment = START + timedelta(minutes=90, seconds=5)
+        self.assertEqual(align(moment, timedelta(hours=1)), START + timedelta(hours=1))
+        self.assertEqual(
+            align(moment, timedelta(hours=1), up=True), START + timedelta(hours=2)
+        )
+        self.assertEqual(align(START, timedelta(days=1), up=True), START)
+
+    def test_hierarchical_views(self):
+        """Test coarser aggregates are built on the next finer one"""
+        self.assertIn("FROM telemetry\n", create_view_sql(ROLLUP_1M))
+        self.assertIn("FROM telemetry_1m", create_view_sql(ROLLUP_1H))
+        self.assertIn("FROM telemetry_1h", create_view_sql(ROLLUP_1D))
+
+
+class RollupQueryTest(TestCase):
+    """Test rollup queries on plain Postgres (raw-table fallback)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        device_type = DeviceType.objects.create(
+            name="Rollup Sensor", metric_name="temperature", metric_unit="°C"
+        )
+        cls.device = Device.objects.create(
+            device_type=device_type, name="Rollup Device", serial_number="ROLL-SN-1"
+        )
+        readings = [
+            (START + timedelta(minutes=10), 1.0),
+            (START + timedelta(minutes=50), 3.0),
+            (START + timedelta(hours=1, minutes=5), 10.0),
+        ]
+        for timestamp, value in readings:
+            telemetry = Telemetry.objects.create(
+                device=cls.device, payload={"value": value}, value=value
+            )
+            # auto_now_add ignores explicit values on create
+            Telemetry.objects.filter(pk=telemetry.pk).update(timestamp=timestamp)
+
+    def test_hourly_buckets(self):
+        """Test min/max/avg/count/last per bucket"""
+        rollup, buckets = query_rollups(
+            self.device.id, START, START + timedelta(days=2), 100, use_rollups=False
+        )
+
+        self.assertIs(rollup, ROLLUP_1H)
+        self.assertEqual(len(buckets), 2)
+        self.assertEqual(
+            buckets[0],
+            {
+                "bucket": START,
+                "min": 1.0,
+                "max": 3.0,
+                "avg": 2.0,
+                "count": 2,
+                "last": 3.0,
+            },
+        )
+        self.assertEqual(buckets[1]["last"], 10.0)
+
+    def test_aggregates_endpoint(self):
+        """Test the API picks the resolution from the point budget"""
+        response = self.client.get(
+            "/api/v1/telemetry/aggregates",
+            {
+                "device": str(self.device.id),
+                "from": START.isoformat(),
+                "to": (START + timedelta(hours=2)).isoformat(),
+                "points": 500,
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["resolution"], "1m")
+        self.assertEqual([b["count"] for b in body["buckets"]], [1, 1, 1])
+
+    def test_aggregates_endpoint_validation(self):
+        """Test bad parameters return 400 and unknown devices 404"""
+        url = "/api/v1/telemetry/aggregates"
+        self.assertEqual(self.client.get(url, {"device": "nope"}).status_code, 400)
+        self.assertEqual(
+            self.client.get(
+                url, {"device": str(self.device.id), "points": 10**9}
+            ).status_code,
+            400,
+        )
+        self.assertEqual(
+            self.client.get(
+                url, {"device": "00000000-0000-0000-0000-000000000000"}
+            ).status_code,
+            404,
+        )
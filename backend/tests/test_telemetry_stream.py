@@ -0,0 +1,303 @@
+import json
+import time
+from unittest import mock
+
+import redis
+from django.db import OperationalError
+from django.test import TestCase
+
+from apps.devices.models import Device, DeviceType
+from apps.telemetry.models import Telemetry
+from apps.telemetry.stream import TelemetryStream
+from apps.telemetry.tasks import consume_telemetry_stream
+from config.metrics import CELERY_QUEUE_LENGTH, TELEMETRY_STREAM_OVERFLOW_TOTAL
+
+
+class FakeStreamRedis:
+    """In-memory stand-in for the redis stream commands the queue uses."""
+
+    def __init__(self):
+        self.entries = []
+        self.groups = {}
+        self.consumers = {}
+        self._seq = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def xadd(self, key, fields, maxlen=None, approximate=True):
+        self._seq += 1
+        entry_id = f"{self._seq}-0"
+        self.entries.append((entry_id, dict(fields)))
+        return entry_id
+
+    def xlen(self, key):
+        return len(self.entries)
+
+    def xgroup_create(self, key, group, id="0", mkstream=False):
+        self.groups.setdefault(group, {"last": 0, "pending": {}})
+
+    def flushdb(self):
+        self.entries, self.groups, self.consumers = [], {}, {}
+
+    def _group(self, group):
+        if group not in self.groups:
+            raise redis.ResponseError(f"NOGROUP No such consumer group '{group}'")
+        return self.groups[group]
+
+    def xreadgroup(self, group, consumer, streams, count=None, block=None):
+        state = self._group(group)
+        new = [e for e in self.entries if int(e[0].split("-")[0]) > state["last"]]
+        new = new[:count]
+        if not new:
+            return []
+        self.consumers.setdefault(group, {})[consumer] = time.monotonic()
+        for entry_id, _ in new:
+            state["pending"][entry_id] = (consumer, time.monotonic())
+        state["last"] = int(new[-1][0].split("-")[0])
+        return [[next(iter(streams)), new]]
+
+    def xautoclaim(
+        self, key, group, consumer, min_idle_time, start_id="0-0", count=None
+    ):
+        pending = self._group(group)["pending"]
+        now = time.monotonic()
+        claimed = []
+        for entry_id, fields in self.entries:
+            if entry_id not in pending:
+                continue
+            if (now - pending[entry_id][1]) * 1000 < min_idle_time:
+                continue
+            pending[entry_id] = (consumer, now)
+            claimed.append((entry_id, fields))
+            if len(claimed) == count:
+                break
+        return ["0-0", claimed, []]
+
+    def xack(self, key, group, *entry_ids):
+        for entry_id in entry_ids:
+            self.groups[group]["pending"].pop(entry_id, None)
+
+    def xinfo_groups(self, key):
+        return [
+            {
+                "name": group,
+                "pending": len(state["pending"]),
+                "last-delivered-id": f"{state['last']}-0",
+                "lag": sum(
+                    1
+                    for entry_id, _ in self.entries
+                    if int(entry_id.split("-")[0]) > state["last"]
+                ),
+            }
+            for group, state in self.groups.items()
+        ]
+
+    def xpending(self, key, group):
+        pending = sorted(self.groups[group]["pending"], key=_seq)
+        return {"pending": len(pending), "min": pending[0] if pending else None}
+
+    def xtrim(self, key, minid=None, approximate=True):
+        kept = [entry for entry in self.entries if _seq(entry[0]) >= _seq(minid)]
+        trimmed, self.entries = len(self.entries) - len(kept), kept
+        return trimmed
+
+    def xinfo_consumers(self, key, group):
+        pending = self.groups[group]["pending"].values()
+        return [
+            {
+                "name": name,
+                "pending": sum(1 for owner, _ in pending if owner == name),
+                "idle": (time.monotonic() - seen) * 1000,
+            }
+            for name, seen in self.consumers.get(group, {}).items()
+        ]
+
+    def xgroup_delconsumer(self, key, group, consumer):
+        del self.consumers[group][consumer]
+
+
+def _seq(entry_id):
+    return int(entry_id.split("-")[0])
+
+
+class FakePipeline:
+    """Runs commands right away and collects their results for ``execute``."""
+
+    def __init__(self, client):
+        self.client = client
+        self.results = []
+
+    def __getattr__(self, name):
+        command = getattr(self.client, name)
+
+        def queued(*args, **kwargs):
+            self.results.append(command(*args, **kwargs))
+
+        return queued
+
+    def execute(self):
+        return self.results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class TelemetryStreamTest(TestCase):
+    """Test the Redis Streams ingest queue and its Celery consumer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        device_type = DeviceType.objects.create(
+            name="Stream Sensor", metric_name="voltage", metric_unit="V"
+        )
+        cls.device = Device.objects.create(
+            device_type=device_type,
+            name="Stream Device 1",
+            serial_number="STREAM-SN-0001",
+        )
+
+    def setUp(self):
+        self.redis = FakeStreamRedis()
+        self.stream = TelemetryStream(
+            self.redis, key="test:telemetry", group="writers", batch_size=2
+        )
+        patcher = mock.patch(
+            "apps.telemetry.ingest.get_telemetry_stream", return_value=self.stream
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post_readings(self, count):
+        readings = [
+            {"schema_version": "1.0", "ssn": "STREAM-SN-0001", "value": index}
+            for index in range(count)
+        ]
+        with self.settings(TELEMETRY_STREAM_ENABLED=True):
+            return self.client.post(
+                "/api/v1/telemetry",
+                data=json.dumps(readings),
+                content_type="application/json",
+            )
+
+    def test_ingest_appends_to_stream(self):
+        """Test accepted readings are queued instead of written"""
+        response = self.post_readings(3)
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(len(self.redis.entries), 3)
+        self.assertFalse(Telemetry.objects.exists())
+
+    def test_task_drains_stream_in_batches(self):
+        """Test the Celery task writes every entry and acknowledges it"""
+        self.post_readings(5)
+
+        with mock.patch(
+            "apps.telemetry.tasks.get_telemetry_stream", return_value=self.stream
+        ):
+            consumed = consume_telemetry_stream.run()
+
+        self.assertEqual(consumed, 5)
+        self.assertEqual(Telemetry.objects.filter(device=self.device).count(), 5)
+        self.assertEqual(self.stream.backlog(), 0)
+        self.assertEqual(
+            CELERY_QUEUE_LENGTH.labels(queue_name="test:telemetry")._value.get(), 0
+        )
+
+    def test_database_outage_leaves_entries_pending(self):
+        """Test a failed write is not acknowledged"""
+        self.post_readings(2)
+        failing = mock.Mock(side_effect=OperationalError("connection lost"))
+
+        self.assertEqual(self.stream.consume("worker-1", failing), 0)
+        self.assertEqual(self.stream.backlog(), 2)
+        self.assertEqual(len(self.redis.groups["writers"]["pending"]), 2)
+
+    def test_pending_entries_reclaimed_from_crashed_consumer(self):
+        """Test another consumer takes over entries idle past claim_idle_ms"""
+        self.post_readings(2)
+        self.stream.ensure_group()
+        self.stream.read("crashed-worker")
+        self.stream.claim_idle_ms = 0
+
+        writer = mock.Mock()
+        self.assertEqual(self.stream.consume("worker-2", writer), 2)
+
+        self.assertEqual(len(writer.call_args.args[0]), 2)
+        self.assertEqual(self.redis.groups["writers"]["pending"], {})
+
+    def test_lost_group_recreated(self):
+        """Test the consumer recovers when Redis lost the stream and its group"""
+        self.post_readings(2)
+        self.assertEqual(self.stream.consume("worker-1", mock.Mock()), 2)
+        self.redis.flushdb()
+        self.post_readings(3)
+
+        with mock.patch(
+            "apps.telemetry.tasks.get_telemetry_stream", return_value=self.stream
+        ):
+            consumed = consume_telemetry_stream.run()
+
+        self.assertEqual(consumed, 3)
+        self.assertEqual(self.stream.backlog(), 0)
+
+    def test_redis_errors_logged_not_raised(self):
+        """Test an unreachable Redis is an empty batch, not a crashed task"""
+        self.post_readings(1)
+        with (
+            mock.patch.object(
+                self.redis, "xautoclaim", side_effect=redis.ConnectionError("down")
+            ),
+            self.assertLogs("apps.telemetry.stream", "WARNING"),
+        ):
+            self.assertEqual(self.stream.consume("worker-1", mock.Mock()), 0)
+
+    def test_rejected_rows_are_dropped(self):
+        """Test rows the database rejects are acknowledged, not retried forever"""
+        self.post_readings(1)
+        failing = mock.Mock(side_effect=ValueError("bad row"))
+
+        self.assertEqual(self.stream.consume("worker-1", failing), 1)
+        self.assertEqual(self.stream.backlog(), 0)
+
+    def test_acknowledged_entries_trimmed_unread_kept(self):
+        """Test trimming never drops entries the group has not acknowledged"""
+        self.post_readings(4)
+        self.stream.ensure_group()
+        self.stream.consume("worker-1", mock.Mock())
+        self.stream.read("worker-2", count=1)
+
+        self.stream.maintain()
+
+        # The unacknowledged third entry and the unread fourth one stay
+        self.assertEqual(
+            [entry_id for entry_id, _ in self.redis.entries], ["3-0", "4-0"]
+        )
+        self.assertEqual(self.stream.backlog(), 2)
+
+    def test_full_stream_writes_directly(self):
+        """Test readings bypass a stream holding maxlen entries"""
+        self.stream.maxlen = 2
+        self.post_readings(2)
+        overflow = TELEMETRY_STREAM_OVERFLOW_TOTAL._value.get()
+
+        response = self.post_readings(3)
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(len(self.redis.entries), 2)
+        self.assertEqual(Telemetry.objects.filter(device=self.device).count(), 3)
+        self.assertEqual(TELEMETRY_STREAM_OVERFLOW_TOTAL._value.get(), overflow + 3)
+
+    def test_idle_consumers_without_pending_pruned(self):
+        """Test dead consumer names leave the group, ones holding entries stay"""
+        self.post_readings(1)
+        self.stream.ensure_group()
+        self.stream.read("holding-worker")
+        self.redis.consumers["writers"]["idle-worker"] = time.monotonic() - 10
+        self.stream.consumer_idle_ms = 0
+
+        self.assertEqual(self.stream.prune_consumers(), ["idle-worker"])
+        self.assertEqual(list(self.redis.consumers["writers"]), ["holding-worker"])
@@ -0,0 +1,109 @@
+import json
+import math
+
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, TestCase
+
+from apps.devices.models import Device, DeviceType
+from apps.telemetry.models import Telemetry
+from apps.telemetry.validation import (
+    compile_validator,
+    get_schema,
+    validate_ranges,
+)
+
+INGEST_URL = "/api/v1/telemetry"
+
+
+class ValidatorTest(SimpleTestCase):
+    """Test schema lookup and compiled range validators."""
+
+    def test_minor_versions_share_schema(self):
+        """Test every 1.x schema_version resolves to schema 1"""
+        self.assertIs(get_schema("1.0"), get_schema("1.3"))
+        self.assertEqual(get_schema("1").major, "1")
+
+    def test_unknown_schema_rejected(self):
+        """Test an unknown major version raises ValidationError"""
+        with self.assertRaises(ValidationError):
+            get_schema("2.0")
+
+    def test_bounds_intersect_schema_range(self):
+        """Test device type bounds narrow the schema range"""
+        schema = get_schema("1.0")
+        validator = compile_validator(schema, 0.0, None)
+        self.assertEqual((validator.low, validator.high), (0.0, schema.value_max))
+
+        validator = compile_validator(schema, -1e9, 100.0)
+        self.assertEqual((validator.low, validator.high), (schema.value_min, 100.0))
+
+    def test_compiled_validators_are_cached(self):
+        """Test identical bounds reuse the same validator"""
+        schema = get_schema("1.0")
+        self.assertIs(
+            compile_validator(schema, 0.0, 10.0), compile_validator(schema, 0.0, 10.0)
+        )
+
+    def test_validate_ranges(self):
+        """Test the vectorized check, including non-finite values"""
+        schema = get_schema("1.0")
+        narrow = compile_validator(schema, 0.0, 10.0)
+        wide = compile_validator(schema, None, None)
+
+        mask = validate_ranges(
+            [5, 11, 11, math.nan, math.inf, 0],
+            [narrow, narrow, wide, wide, wide, narrow],
+        )
+        self.assertEqual(mask.tolist(), [True, False, True, False, False, True])
+        self.assertEqual(validate_ranges([], []).tolist(), [])
+
+
+class IngestValidationTest(TestCase):
+    """Test ingest applies the device type bounds."""
+
+    @classmethod
+    def setUpTestData(cls):
+        device_type = DeviceType.objects.create(
+            name="Bounded Humidity Sensor",
+            metric_name="humidity",
+            metric_unit="%",
+            metric_min=0,
+            metric_max=100,
+        )
+        Device.objects.create(
+            device_type=device_type,
+            name="Bounded Device 1",
+            serial_number="BOUND-SN-0001",
+        )
+
+    def test_batch_rejects_values_outside_device_type_bounds(self):
+        """Test out-of-bounds readings are rejected per item"""
+        readings = [
+            {"schema_version": "1.0", "ssn": "BOUND-SN-0001", "value": value}
+            for value in (50, 101, -1, 100)
+        ]
+        response = self.client.post(
+            INGEST_URL, data=json.dumps(readings), content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 202)
+        body = response.json()
+        self.assertEqual(body["accepted"], 2)
+        self.assertEqual(
+            body["results"][1],
+            {
+                "index": 1,
+                "status": "rejected",
+                "error": "value must be between 0 and 100",
+            },
+        )
+        self.assertEqual(Telemetry.objects.count(), 2)
+
+    def test_unsupported_schema_version(self):
+        """Test a single reading with an unknown schema version returns 400"""
+        reading = {"schema_version": "9.0", "ssn": "BOUND-SN-0001", "value": 1}
+        response = self.client.post(
+            INGEST_URL, data=json.dumps(reading), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("schema_version", response.json()["error"])